@@ -15,6 +15,8 @@ else
     echo "💾 Applying database migrations"
     /usr/src/model/manage.py migrate --no-input
   fi
+  echo "📦 Failing import jobs interrupted by the restart"
+  /usr/src/model/manage.py fail_interrupted_import_jobs
   if [ "$DJANGO_SUPERUSER_USERNAME" ]; then
     echo "👤 Ensuring admin user"
     /usr/src/model/manage.py create_admin \
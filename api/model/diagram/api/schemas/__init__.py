@@ -4,6 +4,7 @@ from diagram.api.schemas.diagram import (
     ReadDiagram,
     UpdateDiagram,
     FullDiagram,
+    LayoutAlgorithm,
 )
 
 from diagram.api.schemas.node import (
@@ -19,12 +20,20 @@ from diagram.api.schemas.edge import (
     EdgeSchema,
 )
 
+from diagram.api.schemas.batch import (
+    MoveNode,
+    PatchClassifier,
+    BatchDiagram,
+    BatchResult,
+)
+
 __all__ = [
     "ImportDiagram",
     "ReadDiagram",
     "CreateDiagram",
     "UpdateDiagram",
     "FullDiagram",
+    "LayoutAlgorithm",
     "CreateNode",
     "PatchNode",
     "ListNodes",
@@ -32,4 +41,8 @@ __all__ = [
     "CreateEdge",
     "ListEdges",
     "EdgeSchema",
+    "MoveNode",
+    "PatchClassifier",
+    "BatchDiagram",
+    "BatchResult",
 ]
@@ -0,0 +1,49 @@
+from typing import Dict, List
+from uuid import UUID
+
+from ninja import Schema
+
+from diagram.api.schemas.edge import CreateEdge, EdgeSchema
+from diagram.api.schemas.node import CreateNode, NodePosition, NodeSchema
+
+
+class MoveNode(Schema):
+    id: UUID
+    position: NodePosition
+
+
+class PatchClassifier(Schema):
+    id: UUID  # of the node
+    cls: dict
+
+
+class BatchDiagram(Schema):
+    """
+    Changes to a diagram applied at once. Edges may connect the created nodes by the ids given in
+    create_nodes.
+    """
+    positions: List[MoveNode] = []
+    classifiers: List[PatchClassifier] = []
+    create_nodes: List[CreateNode] = []
+    delete_nodes: List[UUID] = []
+    create_edges: List[CreateEdge] = []
+    delete_edges: List[UUID] = []
+
+
+class BatchResult(Schema):
+    # Created, moved and patched nodes and created edges
+    nodes: List[NodeSchema] = []
+    edges: List[EdgeSchema] = []
+    # Ids given in create_nodes -> ids of the created nodes
+    node_ids: Dict[str, UUID] = {}
+    # Deleted edges include those removed with their nodes
+    deleted_nodes: List[UUID] = []
+    deleted_edges: List[UUID] = []
+
+
+__all__ = [
+    "MoveNode",
+    "PatchClassifier",
+    "BatchDiagram",
+    "BatchResult",
+]
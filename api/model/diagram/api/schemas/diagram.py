@@ -3,7 +3,7 @@ from typing import List, Optional
 
 from ninja import ModelSchema, Schema
 
-from diagram.models import Diagram
+from diagram.models import Diagram, prefetch_edge_nodes
 from .node import CreateNode, NodeSchema
 from .edge import CreateEdge, EdgeSchema
 
@@ -15,6 +15,12 @@ class DiagramType(str, Enum):
     component = "component"
 
 
+class LayoutAlgorithm(str, Enum):
+    force = "force"
+    layered = "layered"
+    incremental = "incremental"
+
+
 class ReadDiagram(ModelSchema):
     project: str
 
@@ -44,11 +50,11 @@ class FullDiagram(ReadDiagram):
 
     @staticmethod
     def resolve_nodes(obj):
-        return obj.nodes.prefetch_related("cls").all()
+        return obj.nodes.select_related("cls").all()
 
     @staticmethod
     def resolve_edges(obj):
-        return obj.edges.prefetch_related("rel").all()
+        return prefetch_edge_nodes(obj, obj.edges.select_related("rel"))
 
 
 class ImportDiagram(CreateDiagram):
@@ -57,6 +63,7 @@ class ImportDiagram(CreateDiagram):
 
 
 __all__ = [
+    "LayoutAlgorithm",
     "ReadDiagram",
     "ImportDiagram",
     "CreateDiagram",
@@ -1,7 +1,9 @@
 from django.http import HttpRequest
 from diagram.models import Diagram
-from .node import create_node, delete_node
+from .node import create_node, delete_node, connected_enums, connected_enums_of_diagram
 from .edge import create_edge, delete_edge
+from .bulk import ImportDiagramError, bulk_import_elements
+from .batch import BatchDiagramError, apply_batch
 
 
 def get_diagram(request: HttpRequest) -> Diagram | None:
@@ -21,4 +23,10 @@ __all__ = [
     "create_edge",
     "delete_node",
     "delete_edge",
+    "connected_enums",
+    "connected_enums_of_diagram",
+    "ImportDiagramError",
+    "bulk_import_elements",
+    "BatchDiagramError",
+    "apply_batch",
 ]
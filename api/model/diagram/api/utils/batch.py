@@ -0,0 +1,124 @@
+from typing import Dict
+from uuid import UUID
+
+from django.db.models import Exists, OuterRef, Q
+from pydantic import TypeAdapter, ValidationError
+
+from diagram.api.utils.bulk import build_elements, create_elements
+from diagram.models import Diagram, Edge, Node, prefetch_edge_nodes
+from metadata.models import Classifier, Relation, System
+import metadata.specification as spec
+
+# Validates a patched classifier like the PATCH of a single node does
+classifier_adapter = TypeAdapter(spec.Classifier)
+
+
+class BatchDiagramError(ValueError):
+    pass
+
+
+def format_ids(ids):
+    ids = sorted(str(id) for id in ids)
+    return ", ".join(ids[:5]) + (f" and {len(ids) - 5} more" if len(ids) > 5 else "")
+
+
+def delete_orphans(relation_ids, classifier_ids):
+    """Delete the relations and classifiers that no edge or node shows anymore, like delete_edge and delete_node"""
+    Relation.objects.filter(id__in=relation_ids).exclude(
+        Exists(Edge.objects.filter(rel_id=OuterRef("pk")))
+    ).delete()
+    Classifier.objects.filter(id__in=classifier_ids).exclude(
+        Exists(Node.objects.filter(cls_id=OuterRef("pk")))
+    ).delete()
+
+
+def apply_batch(diagram: Diagram, body):
+    """
+    Apply the changes of a BatchDiagram with set based DELETEs, bulk_create and bulk_update: edges
+    and nodes are deleted first, then nodes and edges created, then classifiers patched and nodes
+    moved. All ids are checked before anything is written, an unknown id or an invalid classifier
+    raises BatchDiagramError. Call it in a transaction, the changes are only consistent together.
+
+    Returns (nodes, edges, node_ids, deleted_nodes, deleted_edges), see BatchResult.
+    """
+    created_ids = {node_in.id for node_in in body.create_nodes if node_in.id is not None}
+    edge_ends = {ptr for edge_in in body.create_edges for ptr in (edge_in.source, edge_in.target)}
+    touched_ids = {move.id for move in body.positions} | {patch.id for patch in body.classifiers}
+
+    # Every existing node the batch refers to, in one query
+    referenced_ids = touched_ids | set(body.delete_nodes) | (edge_ends - created_ids)
+    nodes = {node.id: node for node in diagram.nodes.filter(id__in=referenced_ids).select_related("cls")}
+    missing = referenced_ids - nodes.keys()
+    if missing:
+        raise BatchDiagramError(f"Nodes not found in the diagram: {format_ids(missing)}")
+
+    deleted_nodes = set(body.delete_nodes)
+    gone = (touched_ids | (edge_ends - created_ids)) & deleted_nodes
+    if gone:
+        raise BatchDiagramError(f"Nodes are changed or connected and deleted in the same batch: {format_ids(gone)}")
+
+    # Edges asked for and those of the deleted nodes' classifiers
+    deleted_cls_ids = {nodes[node_id].cls_id for node_id in deleted_nodes}
+    edges = list(
+        diagram.edges.filter(
+            Q(id__in=body.delete_edges) | Q(rel__source_id__in=deleted_cls_ids) | Q(rel__target_id__in=deleted_cls_ids)
+        ).values_list("id", "rel_id")
+    )
+    missing = set(body.delete_edges) - {edge_id for edge_id, _ in edges}
+    if missing:
+        raise BatchDiagramError(f"Edges not found in the diagram: {format_ids(missing)}")
+
+    # Patched classifiers are merged onto their current data, a classifier shown by two nodes once
+    classifiers: Dict[UUID, Classifier] = {}
+    for patch in body.classifiers:
+        classifier = classifiers.setdefault(nodes[patch.id].cls_id, nodes[patch.id].cls)
+        new_cls = {**classifier.data, **patch.cls}
+        try:
+            classifier_adapter.validate_python(new_cls)
+        except ValidationError as e:
+            raise BatchDiagramError(f"Invalid classifier of node {patch.id}: {e}")
+        classifier.data = new_cls
+
+    if edges or deleted_nodes:
+        # delete() of a queryset cascades like delete_edge and delete_node did row by row
+        Edge.objects.filter(id__in=[edge_id for edge_id, _ in edges]).delete()
+        diagram.nodes.filter(id__in=deleted_nodes).delete()
+        delete_orphans({rel_id for _, rel_id in edges}, deleted_cls_ids)
+        System.bump_relations_version(diagram.system_id)
+
+    # Edges may connect existing nodes, which are checked above already
+    known = {node_id: node for node_id, node in nodes.items() if node_id not in deleted_nodes}
+    *elements, node_map = build_elements(diagram, body.create_nodes, body.create_edges, known_nodes=known)
+    _, created_nodes, _, created_edges = elements
+    node_ids = {str(node_in.id): node_map[node_in.id].id for node_in in body.create_nodes if node_in.id is not None}
+    if created_nodes or created_edges:
+        create_elements(diagram, *elements)
+
+    if classifiers:
+        Classifier.objects.bulk_update(classifiers.values(), ["data"])
+
+    moved = []
+    for move in body.positions:
+        node = nodes[move.id]
+        node.data = {**node.data, "position": move.position.model_dump()}
+        moved.append(node)
+    if moved:
+        Node.objects.bulk_update(moved, ["data"])
+
+    # The created, moved and patched nodes and the created edges, reloaded with what the schemas read
+    changed = touched_ids | {node.id for node in created_nodes}
+    result_nodes = list(diagram.nodes.filter(id__in=changed).select_related("cls").order_by("pk"))
+    result_edges = prefetch_edge_nodes(
+        diagram, diagram.edges.filter(id__in=[edge.id for edge in created_edges]).select_related("rel")
+    )
+
+    return (
+        result_nodes,
+        result_edges,
+        node_ids,
+        sorted(deleted_nodes),
+        sorted(edge_id for edge_id, _ in edges),
+    )
+
+
+__all__ = ["BatchDiagramError", "apply_batch"]
@@ -1,7 +1,15 @@
+import os
+
 from diagram.models import Diagram, Edge, Node
-from metadata.models import Relation
+from metadata.models import Relation, System
 import metadata.specification as spec
 
+# Only reconcile the edges of a diagram when the relations_version of its system changed since
+# the last time, so that listing the edges of an unchanged diagram does not write. Everything
+# that changes relations or the nodes of a diagram bumps the version, set this to false to
+# reconcile on every read anyway.
+RECONCILE_ON_CHANGE = os.environ.get("DIAGRAM_EDGES_RECONCILE_ON_CHANGE", "true").lower() in ("1", "true")
+
 
 def create_edge(diagram: Diagram, data: spec.Relation, source: Node, target: Node):
     # Create the relation
@@ -18,6 +26,7 @@ def create_edge(diagram: Diagram, data: spec.Relation, source: Node, target: Nod
         rel=relation,
         data={},
     )
+    System.bump_relations_version(diagram.system_id)
 
     return edge
 
@@ -28,40 +37,43 @@ def delete_edge(diagram: Diagram, edge_id: str):
     edge.delete()
     if not Edge.objects.filter(rel = relation).exists():
         relation.delete()
+    System.bump_relations_version(diagram.system_id)
     return True
 
 
-def fetch_and_update_edges(diagram: Diagram):
-    # Fetch all the nodes for the diagram
-    nodes = diagram.nodes.all()
+def reconcile_edges(diagram: Diagram):
+    """
+    Give every relation between the classifiers of the diagram's nodes an edge, and remove the
+    edges whose relation is not one of them, from one set difference over the relation ids.
+    Returns the number of created and deleted edges.
+    """
+    classifiers = diagram.nodes.values("cls_id")
+    relations = Relation.objects.filter(source__in=classifiers, target__in=classifiers)
 
-    # Fetch all the classifiers for the nodes
-    classifiers = [node.cls for node in nodes]
+    relation_ids = set(relations.values_list("id", flat=True))
+    edge_relation_ids = set(diagram.edges.values_list("rel_id", flat=True))
 
-    # Get all the relations between the nodes
-    relations = Relation.objects.filter(
-        source__in=classifiers,
-        target__in=classifiers,
-    )
+    missing = relation_ids - edge_relation_ids
+    Edge.objects.bulk_create([Edge(diagram_id=diagram.id, rel_id=rel_id, data={}) for rel_id in missing])
 
-    # Fetch all the edges for the diagram
-    edges = diagram.edges.all()
+    deleted = 0
+    if edge_relation_ids - relation_ids:
+        deleted, _ = diagram.edges.exclude(rel__in=relations).delete()
 
-    # Add edges for the relations that don't have an edge
-    for relation in relations:
-        if not edges.filter(rel=relation).exists():
-            Edge.objects.create(
-                diagram=diagram,
-                rel=relation,
-                data={},
-            )
+    return len(missing), deleted
 
-    # Remove the edges that don't have a relation
-    for edge in edges:
-        if not relations.filter(id=edge.rel.id).exists():
-            edge.delete()
 
+def fetch_and_update_edges(diagram: Diagram):
+    if not RECONCILE_ON_CHANGE:
+        reconcile_edges(diagram)
+        return diagram.edges.all()
+
+    # The version is read before reconciling: a change in between is picked up next time
+    version = System.objects.values_list("relations_version", flat=True).get(pk=diagram.system_id)
+    if diagram.edges_version != version:
+        reconcile_edges(diagram)
+        Diagram.objects.filter(pk=diagram.pk).update(edges_version=version)
     return diagram.edges.all()
 
 
-__all__ = ["create_edge", "delete_edge", "fetch_and_update_edges"]
+__all__ = ["create_edge", "delete_edge", "reconcile_edges", "fetch_and_update_edges"]
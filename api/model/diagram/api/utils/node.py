@@ -1,5 +1,9 @@
-from diagram.models import Diagram, Node
-from metadata.models import Classifier
+from collections import defaultdict
+
+from django.db.models import OuterRef, Subquery
+
+from diagram.models import Diagram, Edge, Node
+from metadata.models import Classifier, System
 import metadata.specification as spec
 from diagram.api.utils.edge import delete_edge
 
@@ -19,6 +23,7 @@ def create_node(diagram: Diagram, data: spec.Classifier):
             }
         },
     )
+    System.bump_relations_version(diagram.system_id)
     return node
 
 
@@ -34,7 +39,51 @@ def delete_node(diagram: Diagram, node_id: str):
     node.delete()
     if not Node.objects.filter(cls = classifier).exists():
         classifier.delete()
+    System.bump_relations_version(diagram.system_id)
     return True
 
 
-__all__ = ["create_node", "delete_node"]
+def enum_dependencies(source_cls_ids):
+    """
+    Edges of a dependency from one of the classifiers to an enum, annotated with `target_node`,
+    the node of the enum in the edge's diagram (the first by primary key, like Edge.target)
+    """
+    target_node = Node.objects.filter(
+        diagram_id=OuterRef("diagram_id"),
+        cls_id=OuterRef("rel__target_id"),
+    ).order_by("pk").values("pk")[:1]
+    return Edge.objects.filter(
+        rel__source_id__in=source_cls_ids,
+        rel__type="dependency",
+        rel__target__type="enum",
+    ).annotate(target_node=Subquery(target_node))
+
+
+def connected_enums(node_id: str):
+    """The enum nodes a node depends on, over the edges of every diagram, in one query"""
+    source = Node.objects.filter(pk=node_id).values("cls_id")
+    targets = enum_dependencies(source).values("target_node")
+    return Node.objects.filter(pk__in=targets).select_related("cls").order_by("pk")
+
+
+def connected_enums_of_diagram(diagram: Diagram):
+    """
+    connected_enums of every class node of the diagram, as node id -> enum nodes, in three queries
+    instead of one request per class
+    """
+    sources = list(diagram.nodes.filter(cls__type="class").values_list("id", "cls_id"))
+    # An enum that is not shown in the edge's diagram has no target node
+    pairs = set(
+        enum_dependencies([cls_id for _, cls_id in sources])
+        .filter(target_node__isnull=False)
+        .values_list("rel__source_id", "target_node")
+    )
+    targets = Node.objects.select_related("cls").in_bulk({node_id for _, node_id in pairs})
+
+    enums_by_cls = defaultdict(list)
+    for cls_id, node_id in sorted(pairs, key=lambda pair: pair[1]):
+        enums_by_cls[cls_id].append(targets[node_id])
+    return {str(node_id): enums_by_cls[cls_id] for node_id, cls_id in sources}
+
+
+__all__ = ["create_node", "delete_node", "connected_enums", "connected_enums_of_diagram"]
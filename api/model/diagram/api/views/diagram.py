@@ -1,14 +1,17 @@
 from typing import List
 
 from diagram.api.schemas import (
+    BatchDiagram,
+    BatchResult,
     ImportDiagram,
     CreateDiagram,
     FullDiagram,
+    LayoutAlgorithm,
     ReadDiagram,
     UpdateDiagram,
 )
 from diagram.models import Diagram
-from diagram.api.utils import create_node, create_edge
+from diagram.api.utils import BatchDiagramError, ImportDiagramError, apply_batch, bulk_import_elements
 from metadata.models import System
 from django.db import transaction
 from ninja import Router
@@ -42,7 +45,7 @@ def create_diagram(request, body: CreateDiagram):
     return diagram
 
 
-@diagrams.post("/import", response=FullDiagram)
+@diagrams.post("/import", response={200: FullDiagram, 422: str})
 @transaction.atomic
 def import_diagram(request, body: ImportDiagram):
     system = System.objects.get(id=body.system)
@@ -52,17 +55,13 @@ def import_diagram(request, body: ImportDiagram):
         type=body.type,
     )
 
-    # We track all the UUIDs here as we generate new ones,
-    # to avoid collisions on import.
-    # TODO: See if there is a more elegant way to do this
-    nodes = dict()
-
-    for node_in in body.nodes:
-        n = create_node(diagram, node_in.cls)
-        nodes[node_in.id] = n
-
-    for edge_in in body.edges:
-        create_edge(diagram, edge_in.rel, nodes[edge_in.source], nodes[edge_in.target])
+    # Classifiers, nodes, relations and edges are written with a few batched INSERTs.
+    # The payload's node ids are mapped to the newly generated ones to connect the edges.
+    try:
+        bulk_import_elements(diagram, body.nodes, body.edges)
+    except ImportDiagramError as e:
+        transaction.set_rollback(True)
+        return 422, str(e)
 
     print("imported diagram")
 
@@ -95,16 +94,40 @@ def delete_diagram(request, diagram_id):
 
 
 @diagrams.post("/{uuid:diagram_id}/auto_layout", response=FullDiagram)
-def auto_layout_diagram(request, diagram_id):
+def auto_layout_diagram(request, diagram_id, algorithm: LayoutAlgorithm = LayoutAlgorithm.force):
     try:
         diagram = Diagram.objects.get(id=diagram_id)
     except Diagram.DoesNotExist:
         return 404
 
-    diagram.auto_layout()
+    diagram.auto_layout(algorithm=algorithm.value)
     return diagram
 
 
+@diagrams.post("/{uuid:diagram_id}/batch", response={200: BatchResult, 404: str, 422: str})
+@transaction.atomic
+def batch_diagram(request, diagram_id, body: BatchDiagram):
+    try:
+        diagram = Diagram.objects.get(id=diagram_id)
+    except Diagram.DoesNotExist:
+        return 404, "Diagram not found"
+
+    # All changes are applied or none, with a few queries for the whole batch
+    try:
+        nodes, edges, node_ids, deleted_nodes, deleted_edges = apply_batch(diagram, body)
+    except BatchDiagramError as e:
+        transaction.set_rollback(True)
+        return 422, str(e)
+
+    return {
+        "nodes": nodes,
+        "edges": edges,
+        "node_ids": node_ids,
+        "deleted_nodes": deleted_nodes,
+        "deleted_edges": deleted_edges,
+    }
+
+
 diagrams.add_router("/{uuid:diagram}/node", node, tags=["diagrams"])
 diagrams.add_router("/{uuid:diagram}/edge", edge, tags=["diagrams"])
 diagrams.add_router("/system/", system, tags=["diagrams"])
@@ -6,7 +6,7 @@ from ninja import Router
 import diagram.api.utils as utils
 
 from diagram.api.schemas import CreateEdge, EdgeSchema
-from diagram.models import Node
+from diagram.models import Node, prefetch_edge_nodes
 from diagram.api.utils.edge import fetch_and_update_edges, delete_edge
 
 
@@ -20,7 +20,7 @@ def list_edges(request):
     if not diagram:
         return 404, "Diagram not found"
 
-    return fetch_and_update_edges(diagram)
+    return prefetch_edge_nodes(diagram, fetch_and_update_edges(diagram).select_related("rel"))
 
 
 @edge.post("/", response=EdgeSchema)
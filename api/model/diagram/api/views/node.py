@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from django.http import HttpRequest
 from django.core import serializers
 
@@ -11,7 +11,7 @@ from diagram.api.schemas import CreateNode, PatchNode, NodeSchema, FullDiagram
 
 from metadata.specification import Classifier
 
-from diagram.models import Node, Edge, Diagram
+from diagram.models import Diagram
 
 from llm.handler import llm_handler, remove_reply_markdown
 
@@ -50,21 +50,19 @@ def read_node(request: HttpRequest, node_id: str):
     return diagram.nodes.get(id=node_id)
 
 
-@node.get("/{uuid:node_id}/enums/", response=List[NodeSchema])
-def get_connected_enums(request: HttpRequest, node_id: str):
-    out = []
-    node = Node.objects.get(pk=node_id)
-    if not node:
-        return 404, "Node not found"
+@node.get("/enums/", response=Dict[str, List[NodeSchema]])
+def get_connected_enums_of_diagram(request: HttpRequest):
+    diagram = utils.get_diagram(request)
+
+    if not diagram:
+        return 404, "Diagram not found"
+
+    return utils.connected_enums_of_diagram(diagram)
 
-    edges_target = Edge.objects.filter(rel__source=node.cls)
-    for edge in edges_target:
-        if edge.rel.data['type'] != 'dependency':
-            continue
-        if edge.target.cls.data['type'] == 'enum':
-            out.append(edge.target)
 
-    return out
+@node.get("/{uuid:node_id}/enums/", response=List[NodeSchema])
+def get_connected_enums(request: HttpRequest, node_id: str):
+    return utils.connected_enums(node_id)
 
 
 @node.delete("/{uuid:node_id}/", response=bool)
@@ -115,7 +113,7 @@ def generate_attribute(request: HttpRequest, node_id: str, name: str, type: str,
     if not node:
         return 404, "Node not found"
 
-    if node.cls.data["type"] != "class":
+    if node.cls.type != "class":
         return 422, "Node is not a class"
 
     diagrams = Diagram.objects.filter(system=diagram.system)
@@ -145,7 +143,7 @@ def generate_method(request: HttpRequest, node_id: str, name: str, description:
     if not node:
         return 404, "Node not found"
 
-    if node.cls.data["type"] != "class":
+    if node.cls.type != "class":
         return 422, "Node is not a class"
 
     diagrams = Diagram.objects.filter(system=diagram.system)
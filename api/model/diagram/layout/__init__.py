@@ -0,0 +1,73 @@
+import numpy as np
+
+from .force import force_layout
+from .incremental import incremental_layout, seed_positions
+from .layered import layered_layout
+
+LAYOUT_FORCE = "force"
+LAYOUT_LAYERED = "layered"
+LAYOUT_INCREMENTAL = "incremental"
+
+# Half the width of a fresh force-directed layout. It grows with the square root of the
+# number of nodes, so the spacing between nodes stays about the same on big diagrams.
+MIN_SCALE = 500
+SCALE_PER_SQRT_NODE = 100
+
+
+def layout_scale(node_count):
+    return max(MIN_SCALE, SCALE_PER_SQRT_NODE * np.sqrt(node_count))
+
+
+def rescale_layout(positions, scale):
+    """Centre the positions on the origin and stretch them to fit [-scale, scale], like networkx"""
+    positions = positions - positions.mean(axis=0)
+    extent = np.abs(positions).max()
+    return positions * (scale / extent) if extent > 0 else positions
+
+
+def compute_layout(algorithm, positions, edges, fixed=None, hierarchy=None, seed=None):
+    """
+    Positions for the nodes of a diagram, in diagram units.
+
+    LAYOUT_FORCE: force-directed from random start positions
+    LAYOUT_LAYERED: layers along the edges, (u, v) puts v below u, see layered_layout for `hierarchy`
+    LAYOUT_INCREMENTAL: nodes in the `fixed` mask stay put, the others are seeded near their
+        neighbours and laid out force-directed around them. Without fixed nodes it is LAYOUT_FORCE.
+
+    positions: (n, 2) current positions, edges: (e, 2) node indices
+    """
+    positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+    node_count = len(positions)
+    scale = layout_scale(node_count)
+
+    if node_count == 0 and algorithm in (LAYOUT_FORCE, LAYOUT_LAYERED, LAYOUT_INCREMENTAL):
+        # An empty diagram, there is nothing to centre or scale
+        return positions
+
+    if algorithm == LAYOUT_LAYERED:
+        return layered_layout(node_count, edges, hierarchy=hierarchy)
+
+    if algorithm == LAYOUT_INCREMENTAL and fixed is not None and np.any(fixed):
+        # Layout units are a fresh layout's extent, where the optimal node distance is defined
+        units = 2 * scale
+        return incremental_layout(positions / units, edges, fixed, seed=seed) * units
+
+    if algorithm in (LAYOUT_FORCE, LAYOUT_INCREMENTAL):
+        start = np.random.default_rng(seed).random((node_count, 2))
+        return rescale_layout(force_layout(start, edges), scale)
+
+    raise ValueError(f"Unknown layout algorithm: {algorithm}")
+
+
+__all__ = [
+    "LAYOUT_FORCE",
+    "LAYOUT_LAYERED",
+    "LAYOUT_INCREMENTAL",
+    "compute_layout",
+    "force_layout",
+    "incremental_layout",
+    "layered_layout",
+    "layout_scale",
+    "rescale_layout",
+    "seed_positions",
+]
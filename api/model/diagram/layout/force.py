@@ -0,0 +1,236 @@
+import numpy as np
+
+# Up to this many nodes the repulsion between every pair of nodes is computed, above it the
+# nodes are binned into a grid and only neighbouring cells repel node by node
+EXACT_REPULSION_MAX_NODES = 1000
+
+# Closest distance two nodes are treated as having, avoids dividing by zero for stacked nodes
+MIN_DISTANCE = 0.01
+
+# After the force-directed steps nodes closer than this, in optimal node distances, are pushed
+# apart. The steps cool down to nothing, so nodes that end up next to each other stay there.
+SEPARATION = 0.3
+
+# Rounds of pushing close nodes apart, each can bring new pairs close
+SEPARATION_ROUNDS = 10
+
+# Direction stacked nodes are pushed apart in, a different one per node
+GOLDEN_ANGLE = np.pi * (3 - np.sqrt(5))
+
+
+def grid_cells(positions, cell_size=None):
+    """
+    Bin the nodes into a square grid over their bounding box. The grid is sized so that the
+    node pairs within neighbouring cells and the pairs of far cells stay about equal, which
+    is (4.5 n^2)^(1/3) cells. With a `cell_size` the cells are at least that big instead, up
+    to about 4 n cells. Returns (cell x, cell y, cells per axis).
+    """
+    low = positions.min(axis=0)
+    extent = np.maximum(positions.max(axis=0) - low, MIN_DISTANCE).max()
+    if cell_size is None:
+        size = max(2, int(np.ceil(np.sqrt(np.cbrt(4.5 * len(positions) ** 2)))))
+    else:
+        size = int(np.clip(extent // cell_size, 1, 2 * np.sqrt(len(positions)) + 1))
+    cells = np.minimum((positions - low) / extent * size, size - 1).astype(np.intp)
+    return cells[:, 0], cells[:, 1], size
+
+
+# Half of the 3 x 3 neighbourhood of a cell, every pair of adjacent cells is visited once
+NEIGHBOUR_OFFSETS = ((0, 0), (0, 1), (1, -1), (1, 0), (1, 1))
+
+
+def neighbour_pairs(cell_x, cell_y, size, movable=None):
+    """
+    Every pair of nodes in the same or adjacent grid cells once, as two index arrays. With a
+    `movable` mask only pairs with a movable node are returned, that node first, in both
+    orders when both nodes are movable.
+    """
+    cell = cell_x * size + cell_y
+    order = np.argsort(cell, kind="stable")
+    counts = np.bincount(cell, minlength=size * size)
+    starts = np.cumsum(counts) - counts
+
+    offsets = NEIGHBOUR_OFFSETS if movable is None else [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+    candidates = np.ones(len(cell), dtype=bool) if movable is None else movable
+
+    sources, targets = [], []
+    for dx, dy in offsets:
+        nx, ny = cell_x + dx, cell_y + dy
+        nodes = np.flatnonzero(candidates & (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size))
+        neighbour = nx[nodes] * size + ny[nodes]
+        repeats = counts[neighbour]
+        # Node i repeated once per member of the neighbouring cell, paired with each member
+        member_offsets = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        pair_sources = np.repeat(nodes, repeats)
+        pair_targets = order[np.repeat(starts[neighbour], repeats) + member_offsets]
+        if (dx, dy) == (0, 0):
+            # Within a cell both orders come up, keep one, or only drop the node paired with itself
+            keep = pair_sources < pair_targets if movable is None else pair_sources != pair_targets
+            pair_sources, pair_targets = pair_sources[keep], pair_targets[keep]
+        sources.append(pair_sources)
+        targets.append(pair_targets)
+
+    return np.concatenate(sources), np.concatenate(targets)
+
+
+def pairwise_push(dx, dy, k, weight=1):
+    """Repulsion k^2 / d along (dx, dy) for arrays of coordinate differences, times `weight`"""
+    factor = weight * k * k / np.maximum(dx * dx + dy * dy, MIN_DISTANCE**2)
+    return dx * factor, dy * factor
+
+
+def exact_repulsion(positions, k, movable):
+    """Repulsion between every pair of nodes, computed for the movable nodes only"""
+    x, y = positions[:, 0], positions[:, 1]
+    force = np.zeros_like(positions)
+    push_x, push_y = pairwise_push(x[movable, None] - x[None, :], y[movable, None] - y[None, :], k)
+    force[movable] = np.stack([push_x.sum(axis=1), push_y.sum(axis=1)], axis=1)
+    return force
+
+
+def grid_repulsion(positions, k, movable):
+    """
+    Repulsion with a grid approximation, a simpler take on Barnes-Hut: exact between nodes of
+    neighbouring cells, and between the centres of mass of cells further apart, weighted by
+    the number of nodes in them
+    """
+    node_count = len(positions)
+    x, y = positions[:, 0], positions[:, 1]
+    cell_x, cell_y, size = grid_cells(positions)
+
+    if movable.all():
+        sources, targets = neighbour_pairs(cell_x, cell_y, size)
+        push_x, push_y = pairwise_push(x[sources] - x[targets], y[sources] - y[targets], k)
+        # Equal and opposite on both nodes of a pair
+        force = np.stack([
+            np.bincount(sources, weights=push, minlength=node_count)
+            - np.bincount(targets, weights=push, minlength=node_count)
+            for push in (push_x, push_y)
+        ], axis=1)
+    else:
+        # Only the pairs with a node that can move, the push on the other node is not needed
+        sources, targets = neighbour_pairs(cell_x, cell_y, size, movable)
+        push_x, push_y = pairwise_push(x[sources] - x[targets], y[sources] - y[targets], k)
+        force = np.stack([np.bincount(sources, weights=push, minlength=node_count) for push in (push_x, push_y)], axis=1)
+
+    # Far cells push on the centre of mass of a cell, all nodes in it get the same push
+    cell = cell_x * size + cell_y
+    mass = np.bincount(cell, minlength=size * size)
+    occupied = np.flatnonzero(mass)
+    centre_x = np.bincount(cell, weights=x, minlength=size * size)[occupied] / mass[occupied]
+    centre_y = np.bincount(cell, weights=y, minlength=size * size)[occupied] / mass[occupied]
+    occupied_x, occupied_y = occupied // size, occupied % size
+    # Neighbouring cells are covered node by node above
+    far = (np.abs(occupied_x[:, None] - occupied_x[None, :]) > 1) | (np.abs(occupied_y[:, None] - occupied_y[None, :]) > 1)
+
+    push_x, push_y = pairwise_push(centre_x[:, None] - centre_x[None, :], centre_y[:, None] - centre_y[None, :], k,
+                                   np.where(far, mass[occupied][None, :], 0))
+    cell_push = np.zeros((size * size, 2))
+    cell_push[occupied, 0] = push_x.sum(axis=1)
+    cell_push[occupied, 1] = push_y.sum(axis=1)
+    return force + cell_push[cell]
+
+
+def local_repulsion(positions, k, movable, radius):
+    """Repulsion from the nodes within `radius` only, computed for the movable nodes"""
+    x, y = positions[:, 0], positions[:, 1]
+    cell_x, cell_y, size = grid_cells(positions, cell_size=radius)
+    sources, targets = neighbour_pairs(cell_x, cell_y, size, movable)
+    dx, dy = x[sources] - x[targets], y[sources] - y[targets]
+    push_x, push_y = pairwise_push(dx, dy, k, dx * dx + dy * dy < radius * radius)
+    return np.stack([np.bincount(sources, weights=push, minlength=len(positions)) for push in (push_x, push_y)], axis=1)
+
+
+def separate(positions, movable, distance, rounds=SEPARATION_ROUNDS):
+    """
+    Push the nodes of every pair closer than `distance` apart until they are that far, the
+    movable nodes only: half the gap each when both can move, all of it for a node next to a
+    fixed one. Changes `positions` in place.
+    """
+    for _ in range(rounds):
+        x, y = positions[:, 0], positions[:, 1]
+        cell_x, cell_y, size = grid_cells(positions, cell_size=distance)
+        sources, targets = neighbour_pairs(cell_x, cell_y, size, movable)
+        dx, dy = x[sources] - x[targets], y[sources] - y[targets]
+        length = np.sqrt(dx * dx + dy * dy)
+        close = length < distance
+        if not close.any():
+            break
+        sources, targets, dx, dy, length = sources[close], targets[close], dx[close], dy[close], length[close]
+
+        stacked = length < MIN_DISTANCE * distance
+        # The lower index of a pair picks the direction, so both nodes go opposite ways
+        angle = GOLDEN_ANGLE * np.minimum(sources, targets)[stacked]
+        side = np.where(sources < targets, 1, -1)[stacked]
+        dx[stacked], dy[stacked], length[stacked] = side * np.cos(angle), side * np.sin(angle), 1
+
+        share = np.where(movable[targets], 0.5, 1) * (distance - length) / length
+        for axis, delta in ((0, dx), (1, dy)):
+            positions[:, axis] += np.bincount(sources, weights=delta * share, minlength=len(positions))
+    return positions
+
+
+def force_layout(positions, edges, fixed=None, iterations=50, threshold=1e-4, temperature=None, k=None,
+                 radius=None):
+    """
+    Fruchterman-Reingold force-directed layout, the algorithm behind networkx' spring_layout,
+    with every step vectorised over all nodes and edges.
+
+    positions: (n, 2) start positions, in layout units where the diagram spans about 1 x 1
+    edges: (e, 2) node indices of connected nodes
+    fixed: optional (n,) bool mask of nodes that keep their start position, forces are only
+        computed for the others
+    temperature: the largest step of a node in the first iteration, a tenth of the extent of
+        the start positions by default
+    k: the optimal distance between nodes, sqrt(1 / n) by default to fill about 1 x 1
+    radius: only nodes this close repel each other, by default all nodes do
+    Returns the new (n, 2) positions, no two closer than SEPARATION * k where it could be
+    reached in SEPARATION_ROUNDS.
+    """
+    positions = np.array(positions, dtype=float)
+    node_count = len(positions)
+    if node_count < 2:
+        return positions
+
+    edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+    movable = np.ones(node_count, dtype=bool) if fixed is None else ~np.asarray(fixed, dtype=bool)
+    if not movable.any():
+        return positions
+    if fixed is not None:
+        # Edges between two fixed nodes pull on nothing
+        edges = edges[movable[edges[:, 0]] | movable[edges[:, 1]]]
+    if radius is not None:
+        def repulsion(positions, k, movable):
+            return local_repulsion(positions, k, movable, radius)
+    elif node_count <= EXACT_REPULSION_MAX_NODES:
+        repulsion = exact_repulsion
+    else:
+        repulsion = grid_repulsion
+
+    # Optimal distance between nodes, and the largest step a node takes, cooling down linearly
+    if k is None:
+        k = np.sqrt(1.0 / node_count)
+    if temperature is None:
+        temperature = max(np.ptp(positions, axis=0).max(), 1.0) * 0.1
+    cooling = temperature / (iterations + 1)
+
+    for _ in range(iterations):
+        displacement = repulsion(positions, k, movable)
+
+        # Attraction along the edges, pulls both ends together proportional to distance squared
+        delta = positions[edges[:, 0]] - positions[edges[:, 1]]
+        pull = delta * (np.sqrt(np.einsum("ij,ij->i", delta, delta)) / k)[:, None]
+        for axis in (0, 1):
+            displacement[:, axis] -= np.bincount(edges[:, 0], weights=pull[:, axis], minlength=node_count)
+            displacement[:, axis] += np.bincount(edges[:, 1], weights=pull[:, axis], minlength=node_count)
+
+        length = np.maximum(np.sqrt(np.einsum("ij,ij->i", displacement, displacement)), MIN_DISTANCE)
+        step = displacement * (temperature / length)[:, None]
+        step[~movable] = 0
+        positions += step
+
+        temperature -= cooling
+        if np.linalg.norm(step) / node_count < threshold:
+            break
+
+    return separate(positions, movable, SEPARATION * k)
@@ -0,0 +1,77 @@
+import numpy as np
+
+from .force import force_layout
+
+# How far a seeded node starts from the mean of its neighbours, in optimal node distances
+SEED_SPREAD = 0.5
+
+# New nodes are only pushed away by nodes this close, in optimal node distances. The pinned
+# nodes are not in balance with the new ones, the sum of their repulsion over the whole
+# diagram would push new nodes out of it.
+REPULSION_RADIUS = 2
+
+# Steps of the first iteration of an incremental layout, in optimal node distances. Much
+# smaller than for a fresh layout, the seeds are close to where the nodes end up.
+INCREMENTAL_TEMPERATURE = 2
+
+
+def seed_positions(positions, edges, placed, distance, seed=None):
+    """
+    Start positions for the nodes that are not placed yet: near the mean of their placed
+    neighbours, spreading out from the placed nodes one hop per round, all nodes of a round at
+    once. Nodes without a path to a placed node start in a block right of the placed ones.
+
+    distance: the typical distance between neighbouring nodes, in the units of `positions`
+    """
+    positions = np.array(positions, dtype=float)
+    edges = np.asarray(edges, dtype=np.intp).reshape(-1, 2)
+    node_count = len(positions)
+    rng = np.random.default_rng(seed)
+
+    seeded = np.array(placed, dtype=bool)
+    both = np.concatenate([edges, edges[:, ::-1]])
+    sources, targets = both[:, 0], both[:, 1]
+    while not seeded.all():
+        # Neighbours that have a position already, summed up per node that has none
+        known = seeded[targets] & ~seeded[sources]
+        count = np.bincount(sources[known], minlength=node_count)
+        reached = count > 0
+        if not reached.any():
+            break
+        for axis in (0, 1):
+            total = np.bincount(sources[known], weights=positions[targets[known], axis], minlength=node_count)
+            positions[reached, axis] = total[reached] / count[reached]
+        positions[reached] += rng.normal(scale=SEED_SPREAD * distance, size=(reached.sum(), 2))
+        seeded |= reached
+
+    remaining = np.flatnonzero(~seeded)
+    if len(remaining):
+        width = np.sqrt(len(remaining)) * distance
+        if seeded.any():
+            origin = np.array([positions[seeded, 0].max() + distance, positions[seeded, 1].min()])
+        else:
+            origin = np.zeros(2)
+        positions[remaining] = origin + rng.random((len(remaining), 2)) * width
+    return positions
+
+
+def spacing_of(positions):
+    """
+    The optimal node distance at which a force-directed layout fills the bounding box of the
+    positions, as sqrt(1 / n) fills 1 x 1. None for fewer than two distinct positions.
+    """
+    area = np.prod(np.ptp(positions, axis=0)) if len(positions) else 0
+    return np.sqrt(area / len(positions)) if area > 0 else None
+
+
+def incremental_layout(positions, edges, fixed, seed=None):
+    """
+    Force-directed layout of the nodes that are not `fixed`, seeded near their neighbours,
+    while the fixed nodes stay where they are. Positions are in layout units, see force_layout.
+    The optimal node distance follows the density of the fixed nodes.
+    """
+    fixed = np.asarray(fixed, dtype=bool)
+    k = spacing_of(np.asarray(positions, dtype=float)[fixed]) or np.sqrt(1.0 / len(positions))
+    start = seed_positions(positions, edges, fixed, k, seed=seed)
+    return force_layout(start, edges, fixed=fixed, temperature=INCREMENTAL_TEMPERATURE * k, k=k,
+                        radius=REPULSION_RADIUS * k)
@@ -0,0 +1,99 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from diagram.api.schemas import ImportDiagram
+from diagram.api.utils import bulk_import_elements, create_edge, create_node
+from diagram.models import Diagram
+from metadata.models import Project, System
+
+
+def synthetic_payload(system_id, node_count):
+    """An ImportDiagram of class nodes with two attributes, each node connected to the next and to its half"""
+    nodes = [
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "cls": {
+                "type": "class",
+                "name": f"Model{i}",
+                "leaf": False,
+                "abstract": False,
+                "namespace": "",
+                "methods": [],
+                "attributes": [
+                    {"name": "name", "type": "str", "enum": None, "derived": False},
+                    {"name": "count", "type": "int", "enum": None, "derived": False},
+                ],
+            },
+        }
+        for i in range(node_count)
+    ]
+    edges = []
+    for i in range(1, node_count):
+        for target in (i - 1, i // 2):
+            edges.append({
+                "source": nodes[i]["id"],
+                "target": nodes[target]["id"],
+                "rel": {
+                    "type": "association",
+                    "label": "connect",
+                    "derived": False,
+                    "multiplicity": {"source": "1", "target": "*"},
+                },
+            })
+    return ImportDiagram.model_validate({"system": str(system_id), "nodes": nodes, "edges": edges})
+
+
+def import_one_by_one(diagram, nodes_in, edges_in):
+    """The import as it was done before, one create_node / create_edge call per element"""
+    nodes = dict()
+    for node_in in nodes_in:
+        nodes[node_in.id] = create_node(diagram, node_in.cls)
+    for edge_in in edges_in:
+        create_edge(diagram, edge_in.rel, nodes[edge_in.source], nodes[edge_in.target])
+
+
+class Command(BaseCommand):
+    help = "Records query count and wall time of importing diagrams of growing size, per element and in bulk"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1000, 10000])
+        parser.add_argument("--legacy_max", type=int, default=10000,
+                            help="skip the one-by-one import for diagrams with more nodes than this")
+
+    def measure(self, system, body, importer):
+        """Run an import in a transaction that is rolled back afterwards, returns (seconds, queries)"""
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with transaction.atomic(), connection.execute_wrapper(count_query):
+            start = time.perf_counter()
+            diagram = Diagram.objects.create(name="Benchmark", system=system, type="classes")
+            importer(diagram, body.nodes, body.edges)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed, len(queries)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            project = Project.objects.create(name="Benchmark", description="")
+            system = System.objects.create(project=project, name="Benchmark", description="")
+
+        try:
+            self.stdout.write(f"{'nodes':>7}{'edges':>8}  {'import':<12}{'queries':>9}{'time':>12}")
+            for node_count in options["nodes"]:
+                body = synthetic_payload(system.id, node_count)
+                runs = {"bulk": bulk_import_elements}
+                if node_count <= options["legacy_max"]:
+                    runs = {"one by one": import_one_by_one, **runs}
+                for name, importer in runs.items():
+                    elapsed, queries = self.measure(system, body, importer)
+                    self.stdout.write(
+                        f"{node_count:>7}{len(body.edges):>8}  {name:<12}{queries:>9}{elapsed * 1000:10.1f}ms"
+                    )
+        finally:
+            project.delete()
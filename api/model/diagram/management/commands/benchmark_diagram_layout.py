@@ -0,0 +1,130 @@
+import time
+
+import networkx as nx
+import numpy as np
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from diagram.api.utils import bulk_import_elements
+from diagram.layout import LAYOUT_FORCE, LAYOUT_INCREMENTAL, LAYOUT_LAYERED, compute_layout
+from diagram.management.commands.benchmark_diagram_import import synthetic_payload
+from diagram.models import LAYOUT_BATCH_SIZE, Diagram, Node
+from metadata.models import Project, System
+
+
+def synthetic_class_graph(node_count):
+    """
+    Edges of a class diagram like graph, oriented as Diagram.auto_layout passes them: every other
+    class inherits from a class four times lower (parent first), the others are composed by their
+    half, and every class has an association to another one
+    """
+    edges, hierarchy = [], []
+    for i in range(1, node_count):
+        edges.append(((i - 1) // 4, i) if i % 2 == 0 else (i // 2, i))
+        hierarchy.append(True)
+        edges.append((i, (i * 7 + 3) % node_count))
+        hierarchy.append(False)
+    return np.array(edges), np.array(hierarchy)
+
+
+def layout_quality(positions, edges):
+    """Median edge length and the distance of the closest pair of nodes (of a sample on big layouts)"""
+    sample = positions[:: max(1, len(positions) // 1000)]
+    distance = np.sqrt(((sample[:, None, :] - positions[None, :, :]) ** 2).sum(axis=2))
+    distance[distance == 0] = np.inf
+    lengths = np.linalg.norm(positions[edges[:, 0]] - positions[edges[:, 1]], axis=1)
+    return np.median(lengths), distance.min()
+
+
+def networkx_layout(node_count, edges):
+    """What auto_layout did before, spring_layout at scale 500"""
+    graph = nx.Graph()
+    graph.add_nodes_from(range(node_count))
+    graph.add_edges_from(edges.tolist())
+    positions = nx.spring_layout(G=graph, scale=500)
+    return np.array([positions[i] for i in range(node_count)])
+
+
+class Command(BaseCommand):
+    help = "Times the layout algorithms and saving the node positions for diagrams of growing size"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--nodes", type=int, nargs="+", default=[50, 500, 5000])
+        # spring_layout switches to scipy at 500 nodes, which is not a dependency of the api
+        parser.add_argument("--networkx_max", type=int, default=499)
+        parser.add_argument("--added", type=float, default=0.1,
+                            help="share of new nodes placed by the incremental layout")
+
+    def time_layouts(self, node_count, options):
+        edges, hierarchy = synthetic_class_graph(node_count)
+        start = np.zeros((node_count, 2))
+        layouts = {
+            "force": lambda: compute_layout(LAYOUT_FORCE, start, edges, seed=0),
+            "layered": lambda: compute_layout(LAYOUT_LAYERED, start, edges, hierarchy=hierarchy),
+        }
+        if node_count <= options["networkx_max"]:
+            layouts["networkx"] = lambda: networkx_layout(node_count, edges)
+
+        results = {}
+        for name, layout in layouts.items():
+            begin = time.perf_counter()
+            results[name] = layout()
+            self.report(node_count, len(edges), name, time.perf_counter() - begin, results[name], edges)
+
+        # The last nodes are new, at the origin, the others keep their force layout positions
+        added = max(1, int(node_count * options["added"]))
+        fixed = np.arange(node_count) < node_count - added
+        current = results["force"].copy()
+        current[~fixed] = 0
+        begin = time.perf_counter()
+        positions = compute_layout(LAYOUT_INCREMENTAL, current, edges, fixed=fixed)
+        self.report(node_count, len(edges), f"incremental +{added}", time.perf_counter() - begin, positions, edges)
+
+    def report(self, node_count, edge_count, name, elapsed, positions, edges):
+        edge_length, closest = layout_quality(positions, edges)
+        self.stdout.write(
+            f"{node_count:>7}{edge_count:>8}  {name:<18}{elapsed * 1000:10.1f}ms{edge_length:14.1f}{closest:12.1f}"
+        )
+
+    def time_saving(self, system, node_count):
+        """Save the positions of every node with node.save() as before, and with one bulk_update"""
+        with transaction.atomic():
+            diagram = Diagram.objects.create(name="Benchmark", system=system, type="classes")
+            body = synthetic_payload(system.id, node_count)
+            bulk_import_elements(diagram, body.nodes, body.edges)
+            nodes = list(diagram.nodes.all())
+
+            def save_one_by_one():
+                for node in nodes:
+                    node.save()
+
+            def bulk_update():
+                Node.objects.bulk_update(nodes, ["data"], batch_size=LAYOUT_BATCH_SIZE)
+
+            for name, save in (("node.save()", save_one_by_one), ("bulk_update", bulk_update)):
+                queries = []
+
+                def count_query(execute, sql, params, many, context):
+                    queries.append(sql)
+                    return execute(sql, params, many, context)
+
+                with connection.execute_wrapper(count_query):
+                    begin = time.perf_counter()
+                    save()
+                    elapsed = time.perf_counter() - begin
+                self.stdout.write(f"{node_count:>7}  {name:<14}{len(queries):>8}{elapsed * 1000:12.1f}ms")
+            transaction.set_rollback(True)
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'nodes':>7}{'edges':>8}  {'layout':<18}{'time':>12}{'edge length':>14}{'closest':>12}")
+        for node_count in options["nodes"]:
+            self.time_layouts(node_count, options)
+
+        self.stdout.write(f"\n{'nodes':>7}  {'save':<14}{'queries':>8}{'time':>14}")
+        project = Project.objects.create(name="Layout benchmark", description="")
+        try:
+            system = System.objects.create(project=project, name="Layout benchmark", description="")
+            for node_count in options["nodes"]:
+                self.time_saving(system, node_count)
+        finally:
+            project.delete()
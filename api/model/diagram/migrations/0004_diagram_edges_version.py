@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagram', '0003_alter_edge_rel_alter_node_cls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diagram',
+            name='edges_version',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
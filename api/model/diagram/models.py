@@ -1,8 +1,85 @@
 import uuid
-
-from django.db import models
-from metadata.models import Classifier, Relation, System
-import networkx as nx
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Q
+from metadata.models import Classifier, Interface, Relation, System
+
+from diagram.layout import LAYOUT_FORCE, LAYOUT_INCREMENTAL, compute_layout
+
+# Nodes per UPDATE statement when the positions of a layout are saved
+LAYOUT_BATCH_SIZE = 1000
+
+# Relations that place their target below their source in the layered layout, the other
+# relations only help to order the nodes within the layers
+HIERARCHY_RELATIONS = ("generalization", "composition")
+
+# Where nodes are put until someone places them: new and imported nodes at the origin, the
+# importer's own output at (-960, -30)
+UNPLACED_POSITIONS = ((0, 0), (-960, -30))
+
+
+def is_unplaced(node):
+    position = node.data.get("position", {})
+    return (position.get("x"), position.get("y")) in UNPLACED_POSITIONS
+
+
+def delete_querysets(*querysets):
+    """
+    QuerySet.delete() of each queryset in turn, returns {model label: count} summed over them
+    with what their cascades deleted. Only primary keys are read of the rows Django collects for
+    the cascades. Pass what points at the rows before the rows themselves, so the cascades find
+    little left to delete.
+    """
+    deleted = Counter()
+    for queryset in querysets:
+        deleted.update(queryset.only("pk").delete()[1])
+    return deleted
+
+
+class DiagramQuerySet(models.QuerySet):
+    def delete(self):
+        """
+        Delete the diagrams with their nodes and edges, and the classifiers and relations no other
+        diagram uses. What a delete of those classifiers cascades to (their relations, the edges
+        on them elsewhere and the interfaces they are the actor of) is deleted with them.
+        Returns (total, {model label: count}) like QuerySet.delete().
+        """
+        with transaction.atomic(using=self.db):
+            rows = list(self.values_list("pk", "system_id"))
+            diagram_ids = [diagram_id for diagram_id, _ in rows]
+            nodes = Node.objects.filter(diagram_id__in=diagram_ids)
+            edges = Edge.objects.filter(diagram_id__in=diagram_ids)
+
+            # Which classifiers and relations only these diagrams use is read before their
+            # nodes and edges are deleted
+            classifier_ids = list(
+                Classifier.objects.filter(pk__in=nodes.values("cls_id")).exclude(
+                    Exists(Node.objects.filter(cls=OuterRef("pk")).exclude(diagram_id__in=diagram_ids))
+                ).values_list("pk", flat=True)
+            )
+            relation_ids = list(
+                Relation.objects.filter(
+                    Q(pk__in=edges.values("rel_id"))
+                    & ~Exists(Edge.objects.filter(rel=OuterRef("pk")).exclude(diagram_id__in=diagram_ids))
+                    | Q(source__in=classifier_ids)
+                    | Q(target__in=classifier_ids)
+                ).values_list("pk", flat=True)
+            )
+
+            deleted = delete_querysets(
+                edges,
+                nodes,
+                Relation.objects.filter(pk__in=relation_ids),
+                Interface.objects.filter(actor__in=classifier_ids),
+                Classifier.objects.filter(pk__in=classifier_ids),
+                # The base manager's queryset, whose delete() is QuerySet.delete() and not this one
+                Diagram._base_manager.filter(pk__in=diagram_ids),
+            )
+            for system_id in {system_id for _, system_id in rows}:
+                System.bump_relations_version(system_id)
+
+        return sum(deleted.values()), dict(deleted)
 
 
 class Diagram(models.Model):
@@ -13,42 +90,51 @@ class Diagram(models.Model):
     system = models.ForeignKey(
         System, on_delete=models.CASCADE, related_name="diagrams"
     )
-
-    def auto_layout(self):
-        graph = nx.Graph()
-
-        for node in self.nodes.all():
-            graph.add_node(node.id)
-        for edge in self.edges.all():
-            graph.add_edge(edge.source.id, edge.target.id)
-
-        # We use the networkx spring_layout algorithm for autolayouting a diagram
-        # scale=500 seems to do the job, but can be adjusted as needed
-        positions = nx.spring_layout(G=graph, scale=500)
-
-        for node in self.nodes.all():
-            x, y = positions[node.id]
-            node.data["position"]["x"], node.data["position"]["y"] = int(round(x)), int(round(y))
-            node.save()
-
-    def delete(self, *args, **kwargs):
-        nodes = self.nodes.all()
-        edges = self.edges.all()
-
-        cls = set(nodes.values_list('cls', flat=True))
-        rel = set(edges.values_list('rel', flat=True))
-        nodes.delete()
-        edges.delete()
-
-        for cls_id in cls:
-            if not Node.objects.filter(cls_id=cls_id).exists():
-                Classifier.objects.filter(id=cls_id).delete()
-
-        for rel_id in rel:
-            if not Edge.objects.filter(rel_id=rel_id).exists():
-                Relation.objects.filter(id=rel_id).delete()
-
-        super().delete(*args, **kwargs)
+    # The system's relations_version the edges were last reconciled with
+    edges_version = models.PositiveIntegerField(null=True, blank=True)
+
+    objects = DiagramQuerySet.as_manager()
+
+    def auto_layout(self, algorithm=LAYOUT_FORCE, pinned=None):
+        """
+        Position the nodes with one of the layout algorithms in diagram.layout and save them with
+        a single bulk_update. `pinned` is a set of node ids the incremental layout keeps in place,
+        by default every node that is not at one of the UNPLACED_POSITIONS. Only the nodes
+        that moved are saved.
+        """
+        nodes = list(self.nodes.order_by("pk"))
+        index = {node.id: i for i, node in enumerate(nodes)}
+        if algorithm == LAYOUT_INCREMENTAL and pinned is None:
+            pinned = {node.id for node in nodes if not is_unplaced(node)}
+
+        edges, hierarchy = [], []
+        # Only the type of the relations is read, not their data
+        edges_with_type = self.edges.select_related("rel").defer("rel__data")
+        for edge in prefetch_edge_nodes(self, edges_with_type, nodes=nodes):
+            source, target = edge.source, edge.target
+            if source is None or target is None:
+                continue
+            # Layers point from parent to child, a generalization edge points from child to parent
+            relation_type = edge.rel.type
+            if relation_type == "generalization":
+                source, target = target, source
+            edges.append((index[source.id], index[target.id]))
+            hierarchy.append(relation_type in HIERARCHY_RELATIONS)
+
+        current = [(node.data["position"]["x"], node.data["position"]["y"]) for node in nodes]
+        fixed = [node.id in pinned for node in nodes] if pinned else None
+        positions = compute_layout(algorithm, current, edges, fixed=fixed, hierarchy=hierarchy)
+
+        moved = []
+        for node, (x, y) in zip(nodes, positions):
+            x, y = int(round(x)), int(round(y))
+            if (node.data["position"]["x"], node.data["position"]["y"]) != (x, y):
+                node.data["position"]["x"], node.data["position"]["y"] = x, y
+                moved.append(node)
+        Node.objects.bulk_update(moved, ["data"], batch_size=LAYOUT_BATCH_SIZE)
+
+    def delete(self, using=None, keep_parents=False):
+        return Diagram.objects.using(using).filter(pk=self.pk).delete()
 
 
 class Node(models.Model):
@@ -65,18 +151,48 @@ class Edge(models.Model):
 
     @property
     def source(self):
-        return self.diagram.nodes.filter(cls=self.rel.source).first()
+        return self.node_of(self.rel.source_id)
 
     @source.setter
     def source(self, value):
         self.rel.source = value
         self.rel.save()
+        System.bump_relations_version(self.rel.system_id)
 
     @property
     def target(self):
-        return self.diagram.nodes.filter(cls=self.rel.target).first()
+        return self.node_of(self.rel.target_id)
 
     @target.setter
     def target(self, value):
         self.rel.target = value
         self.rel.save()
+        System.bump_relations_version(self.rel.system_id)
+
+    def node_of(self, cls_id):
+        """The diagram's node of a classifier, from the map prefetch_edge_nodes attached if there is one"""
+        nodes_by_cls = getattr(self, "_nodes_by_cls", None)
+        if nodes_by_cls is not None:
+            return nodes_by_cls.get(cls_id)
+        return self.diagram.nodes.filter(cls_id=cls_id).first()
+
+
+def prefetch_edge_nodes(diagram, edges, nodes=None):
+    """
+    Load the diagram's nodes once into a classifier id -> node map and attach it to the edges, so
+    their source and target are resolved without a query each. `nodes` defaults to all nodes of
+    the diagram, it can be passed when they are loaded already (in primary key order).
+    Returns the edges as a list.
+    """
+    if nodes is None:
+        nodes = diagram.nodes.order_by("pk")
+
+    # Like the per edge lookup, the first node by primary key wins if a classifier is shown twice
+    nodes_by_cls = {}
+    for node in nodes:
+        nodes_by_cls.setdefault(node.cls_id, node)
+
+    edges = list(edges)
+    for edge in edges:
+        edge._nodes_by_cls = nodes_by_cls
+    return edges
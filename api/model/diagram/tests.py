@@ -1 +1,443 @@
-# Create your tests here.
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, TestCase
+
+from diagram.api.utils import BatchDiagramError, connected_enums, connected_enums_of_diagram
+from diagram.api.utils import edge as edge_utils
+from diagram.layout import LAYOUT_FORCE, LAYOUT_INCREMENTAL, LAYOUT_LAYERED, compute_layout, layout_scale
+from diagram.management.commands.benchmark_diagram_layout import layout_quality, synthetic_class_graph
+from diagram.models import UNPLACED_POSITIONS, Diagram, Edge, Node, prefetch_edge_nodes
+from metadata.models import Classifier, Interface, Project, Relation, System
+from model.auth import create_token
+
+LAYOUTS = (LAYOUT_FORCE, LAYOUT_LAYERED, LAYOUT_INCREMENTAL)
+
+
+class LayoutTests(SimpleTestCase):
+    """compute_layout on the smallest diagrams: no nodes, one node and nodes without edges"""
+
+    def test_empty_diagram(self):
+        for algorithm in LAYOUTS:
+            with self.subTest(algorithm):
+                self.assertEqual(compute_layout(algorithm, [], []).shape, (0, 2))
+        self.assertEqual(compute_layout(LAYOUT_INCREMENTAL, [], [], fixed=[]).shape, (0, 2))
+
+    def test_single_node(self):
+        for algorithm in (LAYOUT_FORCE, LAYOUT_LAYERED):
+            with self.subTest(algorithm):
+                np.testing.assert_array_equal(compute_layout(algorithm, [(30, 40)], [], seed=0), [(0, 0)])
+        pinned = compute_layout(LAYOUT_INCREMENTAL, [(30, 40)], [], fixed=[True], seed=0)
+        np.testing.assert_array_equal(pinned, [(30, 40)])
+
+    def test_disconnected_nodes(self):
+        current = [(0, 0), (10, 0), (0, 10), (5, 5)]
+        edges = [(0, 1)]
+
+        force = compute_layout(LAYOUT_FORCE, current, edges, seed=0)
+        self.assertEqual(len(np.unique(force, axis=0)), 4)
+        self.assertAlmostEqual(np.abs(force).max(), layout_scale(4))
+
+        layered = compute_layout(LAYOUT_LAYERED, current, edges)
+        self.assertEqual(len(np.unique(layered, axis=0)), 4)
+        self.assertLess(layered[0, 1], layered[1, 1])
+        # Nodes without edges go below the layers
+        self.assertGreater(layered[2:, 1].min(), layered[:2, 1].max())
+
+        incremental = compute_layout(LAYOUT_INCREMENTAL, current, edges, fixed=[True, False, False, False], seed=0)
+        np.testing.assert_array_equal(incremental[0], (0, 0))
+        self.assertEqual(len(np.unique(incremental, axis=0)), 4)
+        self.assertTrue(np.isfinite(incremental).all())
+
+    def test_nodes_are_kept_apart(self):
+        # Exact repulsion, and the grid approximation above EXACT_REPULSION_MAX_NODES
+        for node_count in (300, 1500):
+            edges, _ = synthetic_class_graph(node_count)
+            # The optimal node distance of a fresh layout, in diagram units
+            distance = 2 * layout_scale(node_count) / np.sqrt(node_count)
+
+            force = compute_layout(LAYOUT_FORCE, np.zeros((node_count, 2)), edges, seed=0)
+            fixed = np.arange(node_count) < node_count * 0.9
+            current = np.where(fixed[:, None], force, 0)
+            incremental = compute_layout(LAYOUT_INCREMENTAL, current, edges, fixed=fixed, seed=0)
+
+            for algorithm, positions in ((LAYOUT_FORCE, force), (LAYOUT_INCREMENTAL, incremental)):
+                with self.subTest(algorithm, nodes=node_count):
+                    _, closest = layout_quality(positions, edges)
+                    self.assertGreater(closest, 0.15 * distance)
+
+
+class AutoLayoutTests(TestCase):
+    def test_empty_diagram(self):
+        project = Project.objects.create(name="Project", description="")
+        system = System.objects.create(project=project, name="System", description="")
+        diagram = Diagram.objects.create(system=system, type="classes", name="Empty")
+
+        for algorithm in LAYOUTS:
+            with self.subTest(algorithm):
+                diagram.auto_layout(algorithm)
+
+    def test_incremental_moves_only_unplaced_nodes(self):
+        project = Project.objects.create(name="Project", description="")
+        system = System.objects.create(project=project, name="System", description="")
+        diagram = Diagram.objects.create(system=system, type="classes", name="Shop")
+        names = ("Order", "Item", "Customer", "Invoice", "Payment")
+        classifiers = Classifier.objects.bulk_create([
+            Classifier(system=system, data={"type": "class", "name": name}) for name in names
+        ])
+        positions = ((600, 600), (1200, 600), (600, 1200), (0, 0), (-960, -30))
+        nodes = Node.objects.bulk_create([
+            Node(diagram=diagram, cls=classifier, data={"position": {"x": x, "y": y}})
+            for classifier, (x, y) in zip(classifiers, positions)
+        ])
+        order, item, customer, invoice, payment = classifiers
+        # Invoice is new next to Order, Payment is new next to Item
+        for source, target in ((order, item), (order, customer), (invoice, order), (payment, item)):
+            relation = Relation.objects.create(
+                system=system, source=source, target=target, data={"type": "association", "label": ""}
+            )
+            Edge.objects.create(diagram=diagram, rel=relation, data={})
+
+        # The nodes, the edges with their relations, and one UPDATE of the moved nodes
+        with self.assertNumQueries(3) as queries:
+            diagram.auto_layout(LAYOUT_INCREMENTAL)
+
+        update = queries.captured_queries[-1]["sql"]
+        self.assertTrue(update.startswith("UPDATE"))
+        placed, unplaced = nodes[:3], nodes[3:]
+        for node in placed:
+            self.assertNotIn(node.id.hex, update)
+        for node in unplaced:
+            self.assertIn(node.id.hex, update)
+
+        saved = {node.id: node.data["position"] for node in Node.objects.filter(diagram=diagram)}
+        for node, (x, y) in zip(placed, positions):
+            self.assertEqual(saved[node.id], {"x": x, "y": y})
+        for node, neighbour in ((nodes[3], nodes[0]), (nodes[4], nodes[1])):
+            position, neighbour_position = saved[node.id], saved[neighbour.id]
+            self.assertNotIn((position["x"], position["y"]), UNPLACED_POSITIONS)
+            distance = np.hypot(position["x"] - neighbour_position["x"], position["y"] - neighbour_position["y"])
+            self.assertLess(distance, 600)
+
+
+class DiagramTestCase(TestCase):
+    """A class diagram of Order, Item and Customer with an Order -> Item composition, and an API client"""
+
+    @classmethod
+    def setUpTestData(cls):
+        project = Project.objects.create(name="Project", description="")
+        cls.system = System.objects.create(project=project, name="System", description="")
+        cls.diagram = Diagram.objects.create(system=cls.system, type="classes", name="Orders")
+        cls.order, cls.item, cls.customer = Classifier.objects.bulk_create([
+            Classifier(system=cls.system, data={"type": "class", "name": name}) for name in ("Order", "Item", "Customer")
+        ])
+        cls.order_node, cls.item_node, cls.customer_node = Node.objects.bulk_create([
+            Node(diagram=cls.diagram, cls=classifier, data={"position": {"x": 0, "y": 0}})
+            for classifier in (cls.order, cls.item, cls.customer)
+        ])
+        cls.relation = Relation.objects.create(
+            system=cls.system, source=cls.order, target=cls.item, data={"type": "composition", "label": ""}
+        )
+        cls.edge = Edge.objects.create(diagram=cls.diagram, rel=cls.relation, data={})
+
+    def setUp(self):
+        get_user_model().objects.create_user("diagrams", "diagrams@example.com", "diagrams")
+        _, token = create_token("diagrams", "diagrams")
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def post(self, path, body):
+        return self.client.post(f"/api/v1/diagram/{path}", body, content_type="application/json")
+
+    def relations_version(self):
+        return System.objects.get(pk=self.system.pk).relations_version
+
+
+class ImportDiagramTests(DiagramTestCase):
+    """POST /import creates the diagram with its classifiers, nodes, relations and edges or nothing at all"""
+
+    def import_diagram(self, edges):
+        nodes = [
+            {"id": f"00000000-0000-0000-0000-00000000000{i}", "cls": {"type": "class", "name": name}}
+            for i, name in enumerate(("Shop", "Product"), start=1)
+        ]
+        return self.post("import", {"system": str(self.system.id), "name": "Imported", "nodes": nodes, "edges": edges})
+
+    def test_import(self):
+        version = self.relations_version()
+        response = self.import_diagram([{
+            "source": "00000000-0000-0000-0000-000000000002", "target": "00000000-0000-0000-0000-000000000001",
+            "rel": {"type": "composition", "label": ""},
+        }])
+
+        self.assertEqual(response.status_code, 200)
+        diagram = Diagram.objects.get(pk=response.json()["id"])
+        self.assertEqual(sorted(diagram.nodes.values_list("cls__data__name", flat=True)), ["Product", "Shop"])
+        edge = diagram.edges.select_related("rel__source", "rel__target").get()
+        self.assertEqual((edge.rel.source.data["name"], edge.rel.target.data["name"]), ("Product", "Shop"))
+        self.assertEqual(len(response.json()["edges"]), 1)
+        self.assertGreater(self.relations_version(), version)
+
+    def test_edge_to_unknown_node(self):
+        counts = [model.objects.count() for model in (Diagram, Classifier, Node, Relation, Edge)]
+
+        response = self.import_diagram([{
+            "source": "00000000-0000-0000-0000-000000000001", "target": "00000000-0000-0000-0000-000000000009",
+            "rel": {"type": "association", "label": ""},
+        }])
+
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("00000000-0000-0000-0000-000000000009", response.json())
+        self.assertEqual([model.objects.count() for model in (Diagram, Classifier, Node, Relation, Edge)], counts)
+
+
+class DeleteDiagramTests(DiagramTestCase):
+    """Deleting a diagram deletes the classifiers and relations only it shows, with what points at them"""
+
+    def test_orphans_are_deleted_and_shared_elements_kept(self):
+        # Order, Item and their composition are also shown in another diagram
+        other = Diagram.objects.create(system=self.system, type="classes", name="Stock")
+        stock = Classifier.objects.create(system=self.system, data={"type": "class", "name": "Stock"})
+        Node.objects.bulk_create([
+            Node(diagram=other, cls=classifier, data={"position": {"x": 0, "y": 0}})
+            for classifier in (self.order, self.item, stock)
+        ])
+        shared_edge = Edge.objects.create(diagram=other, rel=self.relation, data={})
+        # Only shown in the deleted diagram
+        dependency = Relation.objects.create(system=self.system, source=self.item, target=self.order,
+                                             data={"type": "dependency", "label": ""})
+        Edge.objects.create(diagram=self.diagram, rel=dependency, data={})
+        # Points at Customer, which only the deleted diagram shows
+        supplier = Relation.objects.create(system=self.system, source=stock, target=self.customer,
+                                           data={"type": "association", "label": ""})
+        supplier_edge = Edge.objects.create(diagram=other, rel=supplier, data={})
+        kept, _ = Interface.objects.bulk_create([
+            Interface(system=self.system, name="Orders", description="", actor=self.order, data={}),
+            Interface(system=self.system, name="Customers", description="", actor=self.customer, data={}),
+        ])
+        version = self.relations_version()
+
+        total, counts = Diagram.objects.filter(pk=self.diagram.pk).delete()
+
+        self.assertFalse(Diagram.objects.filter(pk=self.diagram.pk).exists())
+        self.assertFalse(Node.objects.filter(diagram=self.diagram).exists())
+        self.assertFalse(Edge.objects.filter(diagram=self.diagram).exists())
+        self.assertEqual(set(Classifier.objects.values_list("data__name", flat=True)), {"Order", "Item", "Stock"})
+        self.assertEqual(list(Relation.objects.values_list("pk", flat=True)), [self.relation.pk])
+        self.assertEqual(list(other.edges.values_list("pk", flat=True)), [shared_edge.pk])
+        self.assertFalse(Edge.objects.filter(pk=supplier_edge.pk).exists())
+        self.assertEqual(list(Interface.objects.values_list("pk", flat=True)), [kept.pk])
+        self.assertEqual(other.nodes.count(), 3)
+        self.assertEqual(counts, {
+            "diagram.Edge": 3, "metadata.Relation": 2, "metadata.Interface": 1,
+            "metadata.Classifier": 1, "diagram.Node": 3, "diagram.Diagram": 1,
+        })
+        self.assertEqual(total, 11)
+        self.assertGreater(self.relations_version(), version)
+
+
+class EdgeNodesTests(DiagramTestCase):
+    """prefetch_edge_nodes resolves the nodes of edges like Edge.node_of does with a query per edge"""
+
+    def test_prefetched_nodes_match_the_queries(self):
+        # Order is shown twice, the first node by primary key is the edge's end. Stock has no node here.
+        Node.objects.create(diagram=self.diagram, cls=self.order, data={"position": {"x": 0, "y": 0}})
+        stock = Classifier.objects.create(system=self.system, data={"type": "class", "name": "Stock"})
+        for source, target in ((self.customer, self.order), (self.item, stock)):
+            relation = Relation.objects.create(system=self.system, source=source, target=target,
+                                               data={"type": "association", "label": ""})
+            Edge.objects.create(diagram=self.diagram, rel=relation, data={})
+
+        edges = list(self.diagram.edges.select_related("rel").order_by("pk"))
+        expected = [(edge.source, edge.target) for edge in edges]
+        self.assertIn(None, {target for _, target in expected})
+
+        with self.assertNumQueries(2):
+            prefetched = prefetch_edge_nodes(self.diagram, self.diagram.edges.select_related("rel").order_by("pk"))
+            resolved = [(edge.source, edge.target) for edge in prefetched]
+        self.assertEqual(resolved, expected)
+        order_nodes = Node.objects.filter(diagram=self.diagram, cls=self.order).order_by("pk")
+        self.assertIn((self.customer_node, order_nodes[0]), resolved)
+
+
+class ReconcileEdgesTests(DiagramTestCase):
+    """The edges of a diagram follow the relations between the classifiers it shows"""
+
+    def add_relation(self, source, target):
+        return Relation.objects.create(system=self.system, source=source, target=target,
+                                       data={"type": "association", "label": ""})
+
+    def edge_relations(self):
+        return set(self.diagram.edges.values_list("rel_id", flat=True))
+
+    def test_reconcile_edges(self):
+        # A relation without an edge, and an edge to a classifier the diagram does not show
+        added = self.add_relation(self.customer, self.order)
+        stock = Classifier.objects.create(system=self.system, data={"type": "class", "name": "Stock"})
+        Edge.objects.create(diagram=self.diagram, rel=self.add_relation(stock, self.item), data={})
+
+        self.assertEqual(edge_utils.reconcile_edges(self.diagram), (1, 1))
+        self.assertEqual(self.edge_relations(), {self.relation.id, added.id})
+        self.assertEqual(edge_utils.reconcile_edges(self.diagram), (0, 0))
+
+    def fetch(self):
+        return edge_utils.fetch_and_update_edges(Diagram.objects.get(pk=self.diagram.pk))
+
+    def test_reconcile_on_change(self):
+        with mock.patch.object(edge_utils, "RECONCILE_ON_CHANGE", True):
+            self.fetch()
+            self.assertEqual(Diagram.objects.get(pk=self.diagram.pk).edges_version, self.relations_version())
+
+            # Unnoticed while the relations_version stays the same
+            added = self.add_relation(self.customer, self.order)
+            self.fetch()
+            self.assertEqual(self.edge_relations(), {self.relation.id})
+
+            System.bump_relations_version(self.system.id)
+            edges = self.fetch()
+            self.assertEqual({edge.rel_id for edge in edges}, {self.relation.id, added.id})
+            self.assertEqual(Diagram.objects.get(pk=self.diagram.pk).edges_version, self.relations_version())
+
+    def test_edges_from_another_diagram(self):
+        self.client.get(f"/api/v1/diagram/{self.diagram.id}/edge/")
+
+        # An edge drawn between the same classifiers in another diagram shows up here too
+        other = Diagram.objects.create(system=self.system, type="classes", name="Customers")
+        customer, order = Node.objects.bulk_create([
+            Node(diagram=other, cls=classifier, data={"position": {"x": 0, "y": 0}})
+            for classifier in (self.customer, self.order)
+        ])
+        response = self.post(f"{other.id}/edge/", {
+            "source": str(customer.id), "target": str(order.id), "rel": {"type": "composition", "label": ""},
+        })
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(f"/api/v1/diagram/{self.diagram.id}/edge/")
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual(len(self.edge_relations()), 2)
+
+    def test_reconcile_on_every_fetch(self):
+        with mock.patch.object(edge_utils, "RECONCILE_ON_CHANGE", False):
+            added = self.add_relation(self.customer, self.order)
+            edges = self.fetch()
+        self.assertEqual({edge.rel_id for edge in edges}, {self.relation.id, added.id})
+
+
+class BatchDiagramTests(DiagramTestCase):
+    """POST /{id}/batch applies all its operations in one transaction or none of them"""
+
+    def batch(self, **body):
+        return self.post(f"{self.diagram.id}/batch", body)
+
+    def state(self):
+        return (
+            sorted(Node.objects.values_list("id", "data")),
+            sorted(Edge.objects.values_list("id", flat=True)),
+            sorted(Classifier.objects.values_list("id", "data")),
+            sorted(Relation.objects.values_list("id", flat=True)),
+            self.relations_version(),
+        )
+
+    def test_moves_deletes_and_creates_are_applied(self):
+        version = self.relations_version()
+        payment = "00000000-0000-0000-0000-000000000001"
+
+        response = self.batch(
+            positions=[{"id": str(self.order_node.id), "position": {"x": 10, "y": 20}}],
+            delete_nodes=[str(self.customer_node.id)],
+            delete_edges=[str(self.edge.id)],
+            create_nodes=[{"id": payment, "cls": {"type": "class", "name": "Payment"}}],
+            create_edges=[{"source": payment, "target": str(self.order_node.id),
+                           "rel": {"type": "association", "label": "pays"}}],
+        )
+
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(Node.objects.get(pk=self.order_node.pk).data["position"], {"x": 10, "y": 20})
+        self.assertEqual(result["deleted_nodes"], [str(self.customer_node.id)])
+        self.assertEqual(result["deleted_edges"], [str(self.edge.id)])
+        # Classifiers and relations no node or edge shows anymore are deleted with them
+        self.assertFalse(Classifier.objects.filter(pk=self.customer.pk).exists())
+        self.assertFalse(Relation.objects.filter(pk=self.relation.pk).exists())
+
+        created = Node.objects.get(pk=result["node_ids"][payment])
+        self.assertEqual(created.cls.data["name"], "Payment")
+        edge = Edge.objects.get(diagram=self.diagram)
+        self.assertEqual((edge.rel.source_id, edge.rel.target_id), (created.cls_id, self.order.id))
+        self.assertEqual([e["id"] for e in result["edges"]], [str(edge.id)])
+        self.assertEqual({n["id"] for n in result["nodes"]}, {str(created.id), str(self.order_node.id)})
+        self.assertGreater(self.relations_version(), version)
+
+    def test_invalid_operation_changes_nothing(self):
+        before = self.state()
+
+        response = self.batch(
+            positions=[{"id": str(self.order_node.id), "position": {"x": 10, "y": 20}}],
+            delete_edges=[str(self.edge.id)],
+            create_nodes=[{"cls": {"type": "class", "name": "Payment"}}],
+            classifiers=[{"id": str(self.item_node.id), "cls": {"type": "enum"}}],
+        )
+
+        self.assertEqual(response.status_code, 422)
+        self.assertIn(f"Invalid classifier of node {self.item_node.id}", response.json())
+        self.assertEqual(self.state(), before)
+
+    def test_unknown_node(self):
+        before = self.state()
+        response = self.batch(delete_edges=[str(self.edge.id)], delete_nodes=["00000000-0000-0000-0000-000000000002"])
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.state(), before)
+
+    def test_failure_after_the_deletes_is_rolled_back(self):
+        before = self.state()
+
+        with mock.patch("diagram.api.utils.batch.create_elements", side_effect=BatchDiagramError("Failed")):
+            response = self.batch(
+                delete_nodes=[str(self.customer_node.id)],
+                delete_edges=[str(self.edge.id)],
+                create_nodes=[{"cls": {"type": "class", "name": "Payment"}}],
+            )
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(self.state(), before)
+
+
+class ConnectedEnumsTests(DiagramTestCase):
+    """The enums a class depends on, for one node over all diagrams and for every class of a diagram"""
+
+    def test_connected_enums(self):
+        status, priority = Classifier.objects.bulk_create([
+            Classifier(system=self.system, data={"type": "enum", "name": name, "literals": ["a", "b"]})
+            for name in ("Status", "Priority")
+        ])
+        status_node = Node.objects.create(diagram=self.diagram, cls=status, data={"position": {"x": 0, "y": 0}})
+        # Priority is only shown in another diagram, where Customer depends on it too
+        other = Diagram.objects.create(system=self.system, type="classes", name="Customers")
+        priority_node, _ = Node.objects.bulk_create([
+            Node(diagram=other, cls=classifier, data={"position": {"x": 0, "y": 0}})
+            for classifier in (priority, self.customer)
+        ])
+        for source, target, relation_type in (
+            (self.order, status, "dependency"),
+            (self.item, status, "association"),
+            (self.customer, priority, "dependency"),
+        ):
+            relation = Relation.objects.create(system=self.system, source=source, target=target,
+                                               data={"type": relation_type, "label": ""})
+            Edge.objects.bulk_create([
+                Edge(diagram=diagram, rel=relation, data={}) for diagram in (self.diagram, other)
+            ])
+
+        self.assertEqual(list(connected_enums(self.order_node.id)), [status_node])
+        self.assertEqual(list(connected_enums(self.item_node.id)), [])
+        self.assertEqual(list(connected_enums(self.customer_node.id)), [priority_node])
+
+        with self.assertNumQueries(3):
+            enums = connected_enums_of_diagram(self.diagram)
+        # The same nodes as connected_enums. The edge to Priority in this diagram has no target node,
+        # the one in the other diagram does.
+        self.assertEqual(enums, {
+            str(self.order_node.id): [status_node],
+            str(self.item_node.id): [],
+            str(self.customer_node.id): [priority_node],
+        })
@@ -1,3 +1,3 @@
-from .importer import ExtractJinjaRequest, ExtractJinjaResponse, ZipUploadResponse
+from .importer import ExtractMode, AnalysisMode, OutputFormat, ExtractJinjaRequest, ExtractJinjaResponse, ZipUploadResponse, ImportJobRequest, ReadImportJob
 
-__all__ = ["ExtractJinjaRequest", "ExtractJinjaResponse", "ZipUploadResponse"]
+__all__ = ["ExtractMode", "AnalysisMode", "OutputFormat", "ExtractJinjaRequest", "ExtractJinjaResponse", "ZipUploadResponse", "ImportJobRequest", "ReadImportJob"]
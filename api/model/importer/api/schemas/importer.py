@@ -1,10 +1,33 @@
-from ninja import Schema
+from enum import Enum
+from ninja import ModelSchema, Schema
+from importer.models import ImportJob
+
+
+class ExtractMode(str, Enum):
+    # Every file of the archive, the default
+    full = "full"
+    # Only the python sources of the project and its apps, enough for the model extractor
+    selective = "selective"
+
+
+class AnalysisMode(str, Enum):
+    django = "django"
+    static = "static"
+
+
+class OutputFormat(str, Enum):
+    json = "json"
+    ndjson = "ndjson"
+
 
 class ExtractJinjaRequest(Schema):
     extract_path: str
     project_id: str
     system_id: str
     include_method_dependencies: bool
+    analysis_mode: AnalysisMode = AnalysisMode.django
+    all_apps: bool = False
+    output_format: OutputFormat = OutputFormat.json
 
 class ExtractJinjaResponse(Schema):
     success: bool
@@ -15,7 +38,23 @@ class ExtractJinjaResponse(Schema):
 class ZipUploadResponse(Schema):
     success: bool
     message: str
-    extract_path: str
+    extract_path: str = ""
+    skipped_bytes: int = 0
+
+class ImportJobRequest(Schema):
+    project_id: str
+    system_id: str
+    include_method_dependencies: bool = False
+    is_zip: str = ""
+    extract_mode: ExtractMode = ExtractMode.full
+    analysis_mode: AnalysisMode = AnalysisMode.django
+    all_apps: bool = False
+
+class ReadImportJob(ModelSchema):
+    class Meta:
+        model = ImportJob
+        fields = ["id", "status", "progress", "stage", "message", "extract_path", "project_id", "system_id",
+                  "include_method_dependencies", "extract_mode", "analysis_mode", "all_apps", "created_at", "updated_at"]
 
 
-__all__ = ["ExtractJinjaRequest", "ExtractJinjaResponse", "ZipUploadResponse"]
+__all__ = ["ExtractMode", "AnalysisMode", "OutputFormat", "ExtractJinjaRequest", "ExtractJinjaResponse", "ZipUploadResponse", "ImportJobRequest", "ReadImportJob"]
@@ -0,0 +1,18 @@
+from .uploads import (
+    get_extract_dir,
+    get_folder_files,
+    save_folder_files,
+    save_zip_file,
+    extract_zip_file,
+)
+from .extraction import diagram_cache, extract_diagram
+
+__all__ = [
+    "get_extract_dir",
+    "get_folder_files",
+    "save_folder_files",
+    "save_zip_file",
+    "extract_zip_file",
+    "diagram_cache",
+    "extract_diagram",
+]
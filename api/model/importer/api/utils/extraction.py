@@ -0,0 +1,44 @@
+from importer.api.utils.uploads import CACHE_DIR
+from importer.src.extraction_pool import extraction_pool
+from importer.src.utils.cache import DiagramCache, read_upload_info, restamp_diagram
+from importer.src.utils.static_extractor import ANALYSIS_DJANGO, run_static_extraction
+
+diagram_cache = DiagramCache(CACHE_DIR)
+
+
+def get_cache_key(digest, analysis_mode, all_apps):
+    """
+    Static and django analysis, and shared_models or all apps, are cached separately.
+    The default, django analysis of shared_models, keeps the plain archive hash.
+    """
+    key = digest if analysis_mode == ANALYSIS_DJANGO else f"{digest}_{analysis_mode}"
+    return f"{key}_all" if all_apps else key
+
+
+def extract_diagram(extract_path, project_id, system_id, method_dependencies, analysis_mode=ANALYSIS_DJANGO,
+                    all_apps=False):
+    """
+    Serve the diagram from the cache when this archive was analysed before, otherwise analyse
+    the sources (static mode) or run the extraction on the warm worker of the project. Returns (success, output).
+    """
+    info = read_upload_info(extract_path)
+    digest = info.get('hash') if info else None
+    cache_key = get_cache_key(digest, analysis_mode, all_apps) if digest else None
+
+    if cache_key:
+        cached = diagram_cache.get(cache_key, method_dependencies)
+        if cached is not None:
+            return True, restamp_diagram(cached, project_id, system_id)
+
+    if analysis_mode == ANALYSIS_DJANGO:
+        success, output = extraction_pool.extract(
+            extract_path, project_id, system_id, method_dependencies, all_apps=all_apps
+        )
+    else:
+        success, output = run_static_extraction(extract_path, project_id, system_id, method_dependencies, all_apps)
+    if success and cache_key:
+        diagram_cache.put(cache_key, method_dependencies, output)
+    return success, output
+
+
+__all__ = ["diagram_cache", "extract_diagram"]
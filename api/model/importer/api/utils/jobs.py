@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.db import close_old_connections, transaction
+from importer.models import ImportJob
+from importer.api.utils.uploads import extract_zip_file
+from importer.api.utils.extraction import extract_diagram
+
+IMPORTER_JOB_WORKERS = int(os.environ.get('IMPORTER_JOB_WORKERS', 4))
+
+# The heavy lifting happens in the extraction pool's worker processes,
+# so a thread pool is enough to run many imports at once.
+job_executor = ThreadPoolExecutor(max_workers=IMPORTER_JOB_WORKERS, thread_name_prefix="import-job")
+
+
+def update_job(job: ImportJob, **fields):
+    for name, value in fields.items():
+        setattr(job, name, value)
+    job.save(update_fields=[*fields.keys(), "updated_at"])
+
+
+def run_import_job(job_id):
+    """Unzip the uploaded project (if needed) and extract its diagram"""
+    close_old_connections()
+    try:
+        job = ImportJob.objects.get(id=job_id)
+        update_job(job, status=ImportJob.Status.RUNNING, progress=5, stage="Starting import")
+
+        if job.archive_path:
+            update_job(job, progress=10, stage="Extracting archive")
+            extract_zip_file(Path(job.archive_path), job.archive_hash, job.extract_mode)
+
+        update_job(job, progress=40, stage="Extracting models")
+        success, output = extract_diagram(
+            job.extract_path, job.project_id, job.system_id, job.include_method_dependencies, job.analysis_mode,
+            job.all_apps
+        )
+        if not success:
+            update_job(job, status=ImportJob.Status.FAILED, stage="Error extracting Jinja template", message=output)
+            return
+
+        update_job(
+            job,
+            status=ImportJob.Status.DONE,
+            progress=100,
+            stage="Success",
+            message="Jinja template extracted successfully",
+            diagram_json=output,
+        )
+    except Exception as e:
+        print(f"Error running import job {job_id}: {str(e)}")
+        ImportJob.objects.filter(id=job_id).update(
+            status=ImportJob.Status.FAILED,
+            stage="Error running import job",
+            message=str(e),
+        )
+    finally:
+        close_old_connections()
+
+
+def submit_import_job(job: ImportJob):
+    """Run the job once the transaction that created it is committed, so the worker can read it"""
+    transaction.on_commit(lambda: job_executor.submit(run_import_job, job.id))
+
+
+def fail_interrupted_jobs():
+    """
+    Jobs only run in the thread pool of the process that accepted them, so the jobs that were queued
+    or running when the server stopped never finish. Fail them so clients stop polling, returns how many.
+    """
+    return ImportJob.objects.filter(status__in=[ImportJob.Status.QUEUED, ImportJob.Status.RUNNING]).update(
+        status=ImportJob.Status.FAILED,
+        stage="Import job interrupted",
+        message="The server restarted before the import job finished, submit the import again",
+    )
+
+
+__all__ = ["job_executor", "run_import_job", "submit_import_job", "fail_interrupted_jobs"]
@@ -0,0 +1,203 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+from pathlib import Path
+
+from importer.src.utils.archive import (
+    CHUNK_SIZE,
+    EXTRACT_FULL,
+    MAX_MEMBERS,
+    MAX_TOTAL_SIZE,
+    check_limits,
+    extract_zip_streaming,
+    safe_member_path,
+)
+from importer.src.utils.cache import UPLOAD_INFO_FILE, read_upload_info, write_upload_info
+
+UPLOAD_DIR = Path("/usr/src/uploads")
+CACHE_DIR = UPLOAD_DIR / "cache"
+
+# The extraction directories are evicted least recently used first once they take more than this
+# together. The modification time of their upload info is the last access, see read_upload_info.
+EXTRACT_MAX_BYTES = int(os.environ.get('IMPORTER_EXTRACT_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+
+# Folder uploads are stored as they are, so they get their own content address namespace
+FOLDER_UPLOAD = "folder"
+
+
+def create_staging_dir():
+    """Create a uniquely named folder an upload is written to before its content hash is known"""
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    staging_dir = UPLOAD_DIR / f"upload_{uuid.uuid4().hex}"
+    staging_dir.mkdir()
+    return staging_dir
+
+
+def get_extract_dir(digest, mode):
+    """Extraction directories are content-addressed, so re-uploads of the same project share one"""
+    return UPLOAD_DIR / f"extract_{digest}_{mode}"
+
+
+def dir_size(directory):
+    return sum(path.stat().st_size for path in Path(directory).rglob("*") if path.is_file())
+
+
+def publish_dir(staging_dir, extract_dir, digest, skipped_bytes=0):
+    """Atomically move a complete upload to its content address, and evict old ones to make room"""
+    write_upload_info(staging_dir, digest, skipped_bytes, dir_size(staging_dir))
+    try:
+        os.rename(staging_dir, extract_dir)
+    except OSError:
+        # A concurrent upload of the same content got there first
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    evict_extract_dirs(keep=extract_dir)
+    return extract_dir
+
+
+def evict_extract_dirs(max_bytes=None, keep=None):
+    """
+    Remove the least recently used extraction directories until the others fit in `max_bytes`,
+    EXTRACT_MAX_BYTES by default. A directory is renamed before it is removed, so it disappears
+    at once for a request that reads it at the same time.
+    """
+    max_bytes = EXTRACT_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for extract_dir in UPLOAD_DIR.glob("extract_*"):
+        info_path = extract_dir / UPLOAD_INFO_FILE
+        try:
+            last_used = info_path.stat().st_mtime
+            with open(info_path) as f:
+                size = json.load(f).get("bytes")
+        except (OSError, ValueError):
+            # Not published yet or being removed
+            continue
+        entries.append((last_used, dir_size(extract_dir) if size is None else size, extract_dir))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, extract_dir in sorted(entries, key=lambda entry: entry[0]):
+        if total <= max_bytes:
+            break
+        if extract_dir == keep:
+            continue
+        evicted = UPLOAD_DIR / f"evicted_{uuid.uuid4().hex}"
+        try:
+            os.rename(extract_dir, evicted)
+        except OSError:
+            continue
+        shutil.rmtree(evicted, ignore_errors=True)
+        total -= size
+
+
+def get_folder_files(request, is_zip):
+    """Return the uploaded files of a folder upload, or None for a ZIP upload"""
+    folder_upload = False
+    folder_files = []
+
+    for key in request.FILES.keys():
+        if key.startswith('files'):
+            folder_files.extend(request.FILES.getlist(key))
+            folder_upload = True
+
+    # Files keys or is_zip explicitly set to false means a folder upload
+    if folder_upload or (is_zip and is_zip.lower() == 'false'):
+        return folder_files
+    return None
+
+
+def write_chunks(uploaded_file, dest_path):
+    """
+    Stream an uploaded file to disk in fixed-size chunks instead of buffering it in memory,
+    returns the sha256 of its content
+    """
+    digest = hashlib.sha256()
+    with open(dest_path, 'wb') as dest:
+        for chunk in uploaded_file.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+            dest.write(chunk)
+    return digest.hexdigest()
+
+
+def save_folder_files(folder_files):
+    """
+    Write every file of a folder upload, maintaining the relative path structure.
+    Returns the content-addressed extraction directory and the number of files written.
+    """
+    check_limits(len(folder_files), sum(f.size or 0 for f in folder_files), MAX_MEMBERS, MAX_TOTAL_SIZE)
+
+    staging_dir = create_staging_dir()
+    file_digests = []
+    for uploaded_file in folder_files:
+        try:
+            # Get the relative path from the filename
+            rel_path = safe_member_path(uploaded_file.name)
+            print(f"Processing file: {rel_path}")
+            if rel_path is None:
+                continue
+
+            dest_path = staging_dir / rel_path
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            file_digests.append(f"{rel_path.as_posix()}:{write_chunks(uploaded_file, dest_path)}")
+        except Exception as e:
+            print(f"Error processing file {uploaded_file.name}: {str(e)}")
+
+    digest = hashlib.sha256("\n".join(sorted(file_digests)).encode()).hexdigest()
+    extract_dir = get_extract_dir(digest, FOLDER_UPLOAD)
+    if read_upload_info(extract_dir) is not None:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return extract_dir, len(file_digests)
+    return publish_dir(staging_dir, extract_dir, digest), len(file_digests)
+
+
+def save_zip_file(file):
+    """
+    Store an uploaded ZIP file next to the extraction directories, returns its path and sha256.
+    A partly written file is removed when the upload cannot be read to the end.
+    """
+    check_limits(1, file.size or 0, MAX_MEMBERS, MAX_TOTAL_SIZE)
+    UPLOAD_DIR.mkdir(exist_ok=True)
+    zip_path = UPLOAD_DIR / f"{uuid.uuid4().hex}_{Path(file.name).name}"
+    try:
+        return zip_path, write_chunks(file, zip_path)
+    except BaseException:
+        zip_path.unlink(missing_ok=True)
+        raise
+
+
+def extract_zip_file(zip_path, digest, mode=EXTRACT_FULL):
+    """
+    Extract an uploaded ZIP file unless the same archive was extracted before in this mode.
+    The archive is removed afterwards, also when it cannot be extracted, returns the extraction
+    directory and the bytes skipped.
+    """
+    extract_dir = get_extract_dir(digest, mode)
+    try:
+        info = read_upload_info(extract_dir)
+        if info is None:
+            staging_dir = create_staging_dir()
+            try:
+                _, skipped_bytes = extract_zip_streaming(zip_path, staging_dir, mode=mode)
+            except Exception:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                raise
+            publish_dir(staging_dir, extract_dir, digest, skipped_bytes)
+            info = {"hash": digest, "skipped_bytes": skipped_bytes}
+        else:
+            print(f"Reusing extraction of archive {digest}")
+    finally:
+        Path(zip_path).unlink(missing_ok=True)
+    return extract_dir, info.get("skipped_bytes", 0)
+
+
+__all__ = [
+    "UPLOAD_DIR",
+    "CACHE_DIR",
+    "EXTRACT_MAX_BYTES",
+    "get_extract_dir",
+    "evict_extract_dirs",
+    "get_folder_files",
+    "save_folder_files",
+    "save_zip_file",
+    "extract_zip_file",
+]
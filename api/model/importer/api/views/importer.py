@@ -1,70 +1,52 @@
-import subprocess
-import sys
-import zipfile
-from datetime import datetime
-from pathlib import Path
-from ninja import Router
+from typing import Optional
+from ninja import Router, File, Form
 from ninja.files import UploadedFile
-from importer.api.schemas import ZipUploadResponse, ExtractJinjaRequest, ExtractJinjaResponse
+from importer.api.schemas import (
+    ExtractMode,
+    ZipUploadResponse,
+    ExtractJinjaRequest,
+    ExtractJinjaResponse,
+    ImportJobRequest,
+    ReadImportJob,
+)
+from importer.api.utils.jobs import submit_import_job
+from importer.models import ImportJob
+from importer.api.utils.uploads import (
+    get_extract_dir,
+    get_folder_files,
+    save_folder_files,
+    save_zip_file,
+    extract_zip_file,
+)
+from importer.api.utils.extraction import extract_diagram
+from importer.src.utils.diagram_serializer import convert_diagram
 
 importer = Router()
 
 @importer.post("/upload_zip", response=ZipUploadResponse, tags=["importer"])
-def upload_zip(request, file: UploadedFile, is_zip: str = ""):
+def upload_zip(request, file: UploadedFile, is_zip: str = "", extract_mode: ExtractMode = ExtractMode.full):
     try:
         # 打印调试信息
         print(f"Upload request received: is_zip={is_zip}")
         print(f"FILES in request: {list(request.FILES.keys())}")
-        
-        # make sure uploadpath existed
-        UPLOAD_DIR = Path("/usr/src/uploads")
-        UPLOAD_DIR.mkdir(exist_ok=True)
-        
-        # Create a timestamped subfolder to differentiate between multiple uploads
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        extract_dir = UPLOAD_DIR / f"extract_{timestamp}"
-        extract_dir.mkdir(exist_ok=True)
-        
+
         # 严格判断是否是文件夹上传 - 检查is_zip参数和FILES中是否包含files[]
-        folder_upload = False
-        folder_files = []
-        
-        for key in request.FILES.keys():
-            if key.startswith('files'):
-                folder_files.extend(request.FILES.getlist(key))
-                folder_upload = True
-                
-        # 如果有files开头的键或is_zip明确设置为false，则认为是文件夹上传
-        if folder_upload or (is_zip and is_zip.lower() == 'false'):
+        folder_files = get_folder_files(request, is_zip)
+
+        if folder_files is not None:
             print("Handling folder upload...")
             print(f"Found {len(folder_files)} files in folder upload")
-            
+
             if not folder_files:
                 print("No files found in folder upload")
                 return {
                     "success": False,
                     "message": "No files received for folder upload"
                 }
-            
+
             # Process each file maintaining the relative path structure
-            file_count = 0
-            for uploaded_file in folder_files:
-                try:
-                    # Get the relative path from the filename
-                    rel_path = uploaded_file.name
-                    print(f"Processing file: {rel_path}")
-                    
-                    # Create the destination path
-                    dest_path = extract_dir / rel_path
-                    # Ensure the directory exists
-                    dest_path.parent.mkdir(parents=True, exist_ok=True)
-                    # Write the file
-                    with open(dest_path, 'wb') as dest:
-                        dest.write(uploaded_file.read())
-                    file_count += 1
-                except Exception as e:
-                    print(f"Error processing file {uploaded_file.name}: {str(e)}")
-            
+            extract_dir, file_count = save_folder_files(folder_files)
+
             print(f"Successfully processed {file_count} files")
             return {
                 "success": True,
@@ -81,26 +63,25 @@ def upload_zip(request, file: UploadedFile, is_zip: str = ""):
                     "success": False,
                     "message": "No ZIP file received"
                 }
-            
+
             # 输出文件信息
             print(f"ZIP File received: {file.name}, size: {file.size} bytes")
-            
+
             # save file
-            zip_path = UPLOAD_DIR / f"{timestamp}_{file.name}"
-            with open(zip_path, "wb") as f:
-                f.write(file.read())
-            
-            # unzip file
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(extract_dir)
-            
-            print(f"ZIP file extracted to: {extract_dir}")
+            zip_path, digest = save_zip_file(file)
+
+            # unzip file, all of it unless selective mode asks for only the files needed to extract the models.
+            # An archive that was uploaded before reuses its earlier extraction.
+            extract_dir, skipped_bytes = extract_zip_file(zip_path, digest, extract_mode.value)
+
+            print(f"ZIP file extracted to: {extract_dir}, skipped {skipped_bytes} bytes")
             return {
                 "success": True,
                 "message": f"Zip file {file.name} uploaded and extracted successfully",
-                "extract_path": str(extract_dir)
+                "extract_path": str(extract_dir),
+                "skipped_bytes": skipped_bytes
             }
-        
+
     except Exception as e:
         import traceback
         print(f"Error processing upload: {str(e)}")
@@ -118,35 +99,96 @@ def extract_jinja(request, data: ExtractJinjaRequest):
         system_id = data.system_id
         is_method_dependencies = data.include_method_dependencies
         
-        # Open subprocess with extraction
-        res = subprocess.Popen([
-            "python3", 
-            "/usr/src/model/importer/src/extract_prototype_main.py", 
-            "-p", extract_path, 
-            "-pid", project_id, 
-            "-sid", system_id,
-            "-md", str(is_method_dependencies)
-        ], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-
-        output = res.communicate()
-        if res.returncode == 0:
+        # Served from the diagram cache, or run on a warm worker that already set up this project.
+        # In static mode the sources are analysed without importing the project.
+        success, output = extract_diagram(
+            extract_path, project_id, system_id, is_method_dependencies, data.analysis_mode.value, data.all_apps
+        )
+        if success:
             return {
                 "success": True,
                 "header": "Success",
                 "message": "Jinja template extracted successfully",
-                "diagram_json": output[0].decode(sys.stdout.encoding),
+                "diagram_json": convert_diagram(output, data.output_format.value),
             }
         else:
-            decoded_error = output[0].decode(sys.stdout.encoding)
-            print(f"Error: {decoded_error}")
+            print(f"Error: {output}")
             return {
                 "success": False,
                 "header": "Error extracting Jinja template",
-                "message": f"{str(decoded_error)}"
+                "message": f"{str(output)}"
             }
     except OSError as e:
         return {
             "success": False,
             "header": "Error extracting Jinja template",
             "message": f"{str(e)}"
-        }
\ No newline at end of file
+        }
+
+
+@importer.post("/jobs", response={200: ReadImportJob, 422: str}, tags=["importer"])
+def submit_job(request, data: ImportJobRequest = Form(...), file: Optional[UploadedFile] = File(None)):
+    """Store the upload and run unzip + extraction in the background"""
+    folder_files = get_folder_files(request, data.is_zip)
+    archive_path, archive_hash = "", ""
+
+    if folder_files is not None:
+        if not folder_files:
+            return 422, "No files received for folder upload"
+        extract_dir, _ = save_folder_files(folder_files)
+    else:
+        if not file:
+            return 422, "No ZIP file received"
+        zip_path, archive_hash = save_zip_file(file)
+        archive_path = str(zip_path)
+        extract_dir = get_extract_dir(archive_hash, data.extract_mode.value)
+
+    job = ImportJob.objects.create(
+        archive_path=archive_path,
+        archive_hash=archive_hash,
+        extract_path=str(extract_dir),
+        project_id=data.project_id,
+        system_id=data.system_id,
+        include_method_dependencies=data.include_method_dependencies,
+        all_apps=data.all_apps,
+        extract_mode=data.extract_mode.value,
+        analysis_mode=data.analysis_mode.value,
+        stage="Queued",
+    )
+    submit_import_job(job)
+    return job
+
+
+@importer.get("/jobs/{uuid:job_id}", response={200: ReadImportJob, 404: str}, tags=["importer"])
+def read_job(request, job_id):
+    try:
+        return ImportJob.objects.get(id=job_id)
+    except ImportJob.DoesNotExist:
+        return 404, "Import job not found"
+
+
+@importer.get("/jobs/{uuid:job_id}/result", response={200: ExtractJinjaResponse, 404: str}, tags=["importer"])
+def read_job_result(request, job_id):
+    try:
+        job = ImportJob.objects.get(id=job_id)
+    except ImportJob.DoesNotExist:
+        return 404, "Import job not found"
+
+    if job.status == ImportJob.Status.DONE:
+        return {
+            "success": True,
+            "header": job.stage,
+            "message": job.message,
+            "diagram_json": job.diagram_json,
+        }
+    if job.status == ImportJob.Status.FAILED:
+        return {
+            "success": False,
+            "header": job.stage,
+            "message": job.message,
+        }
+    return {
+        "success": False,
+        "header": "Import job not finished",
+        "message": f"Import job is {job.status} ({job.progress}%)",
+    }
@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from importer.management.synthetic_project import write_synthetic_apps
+from importer.src.extraction_pool import ExtractionPool
+
+
+class Command(BaseCommand):
+    help = "Times the extraction of every app of synthetic projects with a growing number of apps"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--apps", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+        parser.add_argument("--models_per_app", type=int, default=200)
+        parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+        parser.add_argument("--runs", type=int, default=3)
+        parser.add_argument("--method_dependencies", action="store_true")
+        parser.add_argument("--timeout", type=float, default=600)
+
+    def time_extraction(self, extract_dir, workers, options):
+        # Read by the extraction worker when it imports extract_prototype_main
+        os.environ["IMPORTER_APP_WORKERS"] = str(workers)
+        pool = ExtractionPool(max_workers=1, idle_timeout=0)
+        try:
+            success, output = pool.extract(
+                extract_dir, "project", "system", options["method_dependencies"], options["timeout"], all_apps=True
+            )
+            if not success:
+                raise RuntimeError(output)
+
+            timings = []
+            for _ in range(options["runs"]):
+                start = time.perf_counter()
+                pool.extract(
+                    extract_dir, "project", "system", options["method_dependencies"], options["timeout"], all_apps=True
+                )
+                timings.append(time.perf_counter() - start)
+        finally:
+            pool.shutdown()
+        return sum(timings) / len(timings), json.loads(output)
+
+    def handle(self, *args, **options):
+        previous_workers = os.environ.get("IMPORTER_APP_WORKERS")
+        header = "".join(f"{f'workers={workers}':>14}" for workers in options["workers"])
+        self.stdout.write(f"{'apps':>6}{'models':>8}{'nodes':>8}{'edges':>8}{header}")
+
+        try:
+            for app_count in options["apps"]:
+                with tempfile.TemporaryDirectory() as extract_dir:
+                    write_synthetic_apps(extract_dir, app_count, options["models_per_app"])
+                    row = ""
+                    for workers in options["workers"]:
+                        mean, diagram = self.time_extraction(extract_dir, workers, options)
+                        row += f"{mean * 1000:12.1f}ms"
+
+                self.stdout.write(
+                    f"{app_count:>6}{app_count * options['models_per_app']:>8}"
+                    f"{len(diagram['nodes']):>8}{len(diagram['edges']):>8}{row}"
+                )
+        finally:
+            if previous_workers is None:
+                os.environ.pop("IMPORTER_APP_WORKERS", None)
+            else:
+                os.environ["IMPORTER_APP_WORKERS"] = previous_workers
@@ -0,0 +1,51 @@
+import json
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+from importer.management.synthetic_project import write_synthetic_project
+from importer.src.extraction_pool import ExtractionPool
+
+
+class Command(BaseCommand):
+    help = "Times the diagram extraction of a synthetic shared_models app with many models"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--models", type=int, default=2000)
+        parser.add_argument("--runs", type=int, default=3)
+        parser.add_argument("--method_dependencies", action="store_true")
+        parser.add_argument("--timeout", type=float, default=600)
+
+    def handle(self, *args, **options):
+        method_dependencies = options["method_dependencies"]
+        timeout = options["timeout"]
+
+        with tempfile.TemporaryDirectory() as extract_dir:
+            write_synthetic_project(extract_dir, options["models"])
+
+            # The first job pays for django.setup(), the following ones only for the extraction itself
+            pool = ExtractionPool(max_workers=1, idle_timeout=0)
+            try:
+                start = time.perf_counter()
+                success, output = pool.extract(extract_dir, "project", "system", method_dependencies, timeout)
+                setup = time.perf_counter() - start
+                if not success:
+                    self.stdout.write(self.style.ERROR(output))
+                    return
+
+                timings = []
+                for _ in range(options["runs"]):
+                    start = time.perf_counter()
+                    pool.extract(extract_dir, "project", "system", method_dependencies, timeout)
+                    timings.append(time.perf_counter() - start)
+            finally:
+                pool.shutdown()
+
+        diagram = json.loads(output)
+        self.stdout.write(
+            f"models={options['models']} nodes={len(diagram['nodes'])} edges={len(diagram['edges'])} "
+            f"method_dependencies={method_dependencies}"
+        )
+        self.stdout.write(f"first run (incl. setup) {setup * 1000:10.1f}ms")
+        self.stdout.write(f"extraction (mean)       {sum(timings) / len(timings) * 1000:10.1f}ms")
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from importer.src.utils.diagram_serializer import OUTPUT_NDJSON, build_diagram, serialize_diagram
+from importer.src.utils.diagram_template import diagram_template_obj
+from importer.src.utils.node_handler import create_class_node
+from importer.src.utils.relationship_handler import create_edge
+
+
+def synthetic_diagram_parts(node_count):
+    """Class nodes with six attributes and two methods each, and two edges per node"""
+    nodes = []
+    for i in range(node_count):
+        attributes = [
+            {"body": None, "enum": None, "name": f"field_{i}_{j}", "type": "str", "derived": False,
+             "description": None}
+            for j in range(6)
+        ]
+        nodes.append(create_class_node(f"Model{i}", f"node-{i}", attributes, [f"method_{i}_a", f"method_{i}_b"]))
+
+    edges = []
+    for i in range(1, node_count):
+        edges.append(create_edge("composition", "compose", {"source": "1", "target": "1..*"},
+                                 f"node-{i - 1}", f"node-{i}"))
+        edges.append(create_edge("association", "connect", {"source": "*", "target": "1..*"},
+                                 f"node-{i}", f"node-{i // 2}"))
+    return nodes, edges
+
+
+class Command(BaseCommand):
+    help = "Compares render time and payload size of the Jinja diagram template and direct JSON serialisation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1000, 10000])
+        parser.add_argument("--runs", type=int, default=3)
+
+    def measure(self, render, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            output = render()
+            timings.append(time.perf_counter() - start)
+        return sum(timings) / len(timings), len(output.encode())
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'nodes':>7}{'edges':>8}  {'serialiser':<10}{'time':>12}{'size':>14}")
+        for node_count in options["nodes"]:
+            nodes, edges = synthetic_diagram_parts(node_count)
+            renderers = {
+                "template": lambda: diagram_template_obj.render(
+                    diagram_id="diagram", project_id="project", system_id="system", nodes=nodes, edges=edges
+                ),
+                "json": lambda: serialize_diagram(build_diagram("diagram", "project", "system", nodes, edges)),
+                "ndjson": lambda: serialize_diagram(
+                    build_diagram("diagram", "project", "system", nodes, edges), OUTPUT_NDJSON
+                ),
+            }
+            for name, render in renderers.items():
+                mean, size = self.measure(render, options["runs"])
+                self.stdout.write(
+                    f"{node_count:>7}{len(edges):>8}  {name:<10}{mean * 1000:10.1f}ms{size / 1024:12.1f}KB"
+                )
@@ -0,0 +1,66 @@
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from importer.src.extraction_pool import ExtractionPool, run_cold_extraction
+
+DEFAULT_FIXTURE = Path(__file__).resolve().parents[2] / "tests" / "zips" / "test_prototype.zip"
+
+
+class Command(BaseCommand):
+    help = "Compares cold-subprocess and warm-pool latency of the importer extraction"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--zip", default=str(DEFAULT_FIXTURE))
+        parser.add_argument("--runs", type=int, default=10)
+        parser.add_argument("--method_dependencies", action="store_true")
+
+    def report(self, label, timings):
+        timings = sorted(timings)
+        mean = sum(timings) / len(timings)
+        self.stdout.write(
+            f"{label:<14} runs={len(timings):<4} mean={mean * 1000:8.1f}ms "
+            f"min={timings[0] * 1000:8.1f}ms max={timings[-1] * 1000:8.1f}ms"
+        )
+
+    def handle(self, *args, **options):
+        runs = options["runs"]
+        method_dependencies = options["method_dependencies"]
+
+        with tempfile.TemporaryDirectory() as extract_dir:
+            with zipfile.ZipFile(options["zip"], 'r') as zip_ref:
+                zip_ref.extractall(extract_dir)
+
+            cold = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                success, output = run_cold_extraction(extract_dir, "project", "system", method_dependencies)
+                cold.append(time.perf_counter() - start)
+                if not success:
+                    self.stdout.write(self.style.ERROR(output))
+                    return
+
+            pool = ExtractionPool(max_workers=1)
+            try:
+                start = time.perf_counter()
+                success, output = pool.extract(extract_dir, "project", "system", method_dependencies)
+                first = time.perf_counter() - start
+                if not success:
+                    self.stdout.write(self.style.ERROR(output))
+                    return
+
+                warm = []
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    pool.extract(extract_dir, "project", "system", method_dependencies)
+                    warm.append(time.perf_counter() - start)
+            finally:
+                pool.shutdown()
+
+        self.report("cold", cold)
+        self.report("pool (start)", [first])
+        self.report("pool (warm)", warm)
+        self.stdout.write(f"speedup: {sum(cold) / sum(warm):.1f}x")
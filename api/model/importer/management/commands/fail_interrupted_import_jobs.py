@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from importer.api.utils.jobs import fail_interrupted_jobs
+
+
+class Command(BaseCommand):
+    help = "Marks the import jobs that were queued or running when the server stopped as failed"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Failed {fail_interrupted_jobs()} interrupted import jobs")
@@ -0,0 +1,79 @@
+from pathlib import Path
+
+SETTINGS_TEMPLATE = """SECRET_KEY = 'benchmark'
+INSTALLED_APPS = [
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+    {apps}
+]
+DATABASES = {{'default': {{'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}}}
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+"""
+
+
+def synthetic_model(i):
+    """
+    Source of the i-th model: plain fields, a choices field on every 10th model, a composition
+    to the previous model, an M2M on every 3rd, a nullable one-to-one on every 7th,
+    multi-table inheritance on every 25th and a method that mentions another model.
+    """
+    base = f"Model{i - 1}" if i % 25 == 24 else "models.Model"
+    lines = [
+        f"class Model{i}({base}):",
+        f"    title_{i} = models.CharField(max_length=255, default='')",
+        f"    count_{i} = models.IntegerField(default=0)",
+        f"    active_{i} = models.BooleanField(default=False)",
+    ]
+    if i % 10 == 0:
+        lines += [
+            f"    status_{i % 20} = models.CharField(max_length=16, choices=[('NEW', 'NEW'), ('DONE', 'DONE')])",
+        ]
+    if i > 0:
+        lines += [f"    previous_{i} = models.ForeignKey('Model{i - 1}', on_delete=models.CASCADE)"]
+    if i % 3 == 0 and i > 0:
+        lines += [f"    linked_{i} = models.ManyToManyField('Model{i // 2}', related_name='linked_from_{i}')"]
+    if i % 7 == 0 and i > 1:
+        lines += [
+            f"    twin_{i} = models.OneToOneField('Model{i - 2}', on_delete=models.SET_NULL, null=True, "
+            f"related_name='twin_of_{i}')",
+        ]
+    lines += [
+        "",
+        f"    def related_{i}(self):",
+        f"        return Model{(i * 7 + 3) % (i + 1)}.objects.count()",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+def write_synthetic_app(root, app_name, model_count):
+    app_dir = Path(root) / app_name
+    app_dir.mkdir(exist_ok=True)
+    (app_dir / "__init__.py").write_text("")
+    source = ["from django.db import models", ""]
+    source += [synthetic_model(i) for i in range(model_count)]
+    (app_dir / "models.py").write_text("\n\n".join(source))
+
+
+def write_synthetic_settings(root, app_names):
+    root = Path(root)
+    (root / "project").mkdir(parents=True, exist_ok=True)
+    (root / "project" / "__init__.py").write_text("")
+    apps = "\n    ".join(f"'{app_name}'," for app_name in app_names)
+    (root / "project" / "settings.py").write_text(SETTINGS_TEMPLATE.format(apps=apps))
+
+
+def write_synthetic_project(root, model_count, app_name='shared_models'):
+    """Write a minimal Django project whose app `app_name` defines `model_count` related models"""
+    write_synthetic_settings(root, [app_name])
+    write_synthetic_app(root, app_name, model_count)
+    return Path(root)
+
+
+def write_synthetic_apps(root, app_count, models_per_app):
+    """Write a minimal Django project with `app_count` apps, app_0 to app_<n>, of `models_per_app` models each"""
+    app_names = [f"app_{i}" for i in range(app_count)]
+    write_synthetic_settings(root, app_names)
+    for app_name in app_names:
+        write_synthetic_app(root, app_name, models_per_app)
+    return Path(root)
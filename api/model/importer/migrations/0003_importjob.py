@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 10:04
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importer', '0002_rename_prototype_importer'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=16)),
+                ('progress', models.SmallIntegerField(default=0)),
+                ('stage', models.CharField(default='', max_length=255)),
+                ('message', models.TextField(default='')),
+                ('archive_path', models.CharField(default='', max_length=1024)),
+                ('extract_path', models.CharField(max_length=1024)),
+                ('project_id', models.CharField(max_length=255)),
+                ('system_id', models.CharField(max_length=255)),
+                ('include_method_dependencies', models.BooleanField(default=False)),
+                ('diagram_json', models.TextField(default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importer', '0003_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='extract_mode',
+            field=models.CharField(default='selective', max_length=16),
+        ),
+    ]
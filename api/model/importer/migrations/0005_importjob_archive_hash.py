@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importer', '0004_importjob_extract_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='archive_hash',
+            field=models.CharField(default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 10:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importer', '0005_importjob_archive_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='analysis_mode',
+            field=models.CharField(default='django', max_length=16),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importer', '0006_importjob_analysis_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importjob',
+            name='all_apps',
+            field=models.BooleanField(default=False),
+        ),
+    ]
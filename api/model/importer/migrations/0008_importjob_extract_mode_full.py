@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importer', '0007_importjob_all_apps'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='extract_mode',
+            field=models.CharField(default='full', max_length=16),
+        ),
+    ]
@@ -7,3 +7,29 @@ class Importer(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4) # type: ignore
     name = models.CharField(max_length=255) # type: ignore
     description = models.TextField() # type: ignore
+
+
+class ImportJob(models.Model):
+    class Status(models.TextChoices):
+        QUEUED = "queued"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4) # type: ignore
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.QUEUED) # type: ignore
+    progress = models.SmallIntegerField(default=0) # type: ignore # Percentage, 0 when queued and 100 when done
+    stage = models.CharField(max_length=255, default="") # type: ignore
+    message = models.TextField(default="") # type: ignore
+    archive_path = models.CharField(max_length=1024, default="") # type: ignore # Empty for folder uploads
+    archive_hash = models.CharField(max_length=64, default="") # type: ignore # sha256 of the uploaded archive
+    extract_mode = models.CharField(max_length=16, default="full") # type: ignore # 'full' or 'selective'
+    analysis_mode = models.CharField(max_length=16, default="django") # type: ignore # 'django' or 'static'
+    extract_path = models.CharField(max_length=1024) # type: ignore
+    project_id = models.CharField(max_length=255) # type: ignore
+    system_id = models.CharField(max_length=255) # type: ignore
+    include_method_dependencies = models.BooleanField(default=False) # type: ignore
+    all_apps = models.BooleanField(default=False) # type: ignore # Every project app instead of shared_models
+    diagram_json = models.TextField(default="") # type: ignore
+    created_at = models.DateTimeField(auto_now_add=True) # type: ignore
+    updated_at = models.DateTimeField(auto_now=True) # type: ignore
@@ -1,29 +1,28 @@
+import os
 import sys
-import uuid
 import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from pathlib import Path
 from django.apps import apps
-from utils.diagram_template import diagram_template_obj
+from django.conf import settings
 from utils.node_handler import process_enum_field_node, create_attribute, create_model_node
 from utils.relationship_handler import extract_method_dependencies, process_model_relationships
 from utils.helper import is_enum_field, collect_all_valid_models, initialize_model_ptr_map, verify_data_integrity
+from utils.diagram_builder import initialize_app_data, initialize_diagram_data, has_node, merge_app_data
+from utils.diagram_serializer import OUTPUT_JSON, OUTPUT_NDJSON, build_diagram, serialize_diagram, write_diagram
 from utils.django_environment_setup import configure_django_settings
 
+# Processes the apps of a project are extracted on when all apps are extracted.
+# The processes are forked from the set up Django environment, so they share its app registry.
+APP_WORKERS = int(os.environ.get('IMPORTER_APP_WORKERS', min(4, os.cpu_count() or 1)))
 
-# Functions related to diagram initialization
-def initialize_diagram_data(project_id, system_id):
-    """Initialize the basic data needed for the diagram"""
-    return {
-        'diagram_id': str(uuid.uuid4()),
-        'project_id': project_id,
-        'system_id': system_id,
-        'nodes': [],
-        'edges': [],
-        'model_ptr_map': {},
-        'enum_ptr_map': {}
-    }
+# Read by the forked app workers, set before the processes are started
+app_job_state: dict = {}
 
 
-def process_model(model, data, app_config, is_show_method_dependency):
+def process_model(model, data, app_models, is_show_method_dependency):
     """Process a single model"""
     try:
         cls_ptr = data['model_ptr_map'][model]  # Use existing UUID
@@ -31,7 +30,7 @@ def process_model(model, data, app_config, is_show_method_dependency):
         # print(f"Model ID: {cls_ptr}")
 
         # Only create a node if it hasn't been processed yet
-        if not any(node['id'] == cls_ptr for node in data['nodes']):
+        if not has_node(data['nodes'], cls_ptr):
             try:
                 attributes = []
                 for field in model._meta.get_fields():
@@ -59,7 +58,7 @@ def process_model(model, data, app_config, is_show_method_dependency):
 
         if is_show_method_dependency:
             try:
-                extract_method_dependencies(model, app_config.get_models(), data)
+                extract_method_dependencies(model, app_models, data)
             except Exception as e:
                 sys.exit(f"Error extracting method dependencies: {model.__name__}, error: {str(e)}")
 
@@ -72,10 +71,7 @@ def process_model(model, data, app_config, is_show_method_dependency):
         sys.exit(f"Error processing model: {model.__name__ if model else 'Unknown'}, error: {str(e)}")
 
 
-def generate_diagram_json(project_id, system_id, show_method_dependencies):
-    """Main function to generate diagram JSON"""
-    data = initialize_diagram_data(project_id, system_id)
-
+def extract_shared_models(data, show_method_dependencies):
     for app_config in apps.get_app_configs():
         if app_config.name == 'shared_models':
             # print(f"Extracting models from: {app_config.verbose_name}")
@@ -87,19 +83,83 @@ def generate_diagram_json(project_id, system_id, show_method_dependencies):
             data['model_ptr_map'] = initialize_model_ptr_map(all_models)
 
             # Process all models
-            for model in app_config.get_models():
-                process_model(model, data, app_config, show_method_dependencies)
+            app_models = list(app_config.get_models())
+            for model in app_models:
+                process_model(model, data, app_models, show_method_dependencies)
+
+
+def get_project_app_configs():
+    """
+    The apps of the project itself, in INSTALLED_APPS order: Django's own apps and apps installed
+    as packages, which live outside the project directory, are left out
+    """
+    project_dir = Path(import_module(settings.SETTINGS_MODULE).__file__).resolve().parent.parent
+    return [
+        app_config for app_config in apps.get_app_configs()
+        if not app_config.name.startswith('django.') and Path(app_config.path).resolve().is_relative_to(project_dir)
+    ]
+
+
+def extract_app(app_label, model_ptr_map, show_method_dependencies):
+    """Extract the models of one app into its own nodes, edges and enum_ptr_map"""
+    app_data = initialize_app_data(model_ptr_map)
+    app_models = list(apps.get_app_config(app_label).get_models())
+    for model in app_models:
+        process_model(model, app_data, app_models, show_method_dependencies)
+    return app_data
+
+
+def run_app_job(app_label):
+    """Entry point of a forked app worker, failures are returned so the merge can report them in app order"""
+    try:
+        app_data = extract_app(app_label, app_job_state['model_ptr_map'], app_job_state['show_method_dependencies'])
+    except SystemExit as e:
+        return {'error': str(e.code)}
+    except Exception as e:
+        return {'error': f"Error extracting app {app_label}: {str(e)}"}
+    return {'nodes': list(app_data['nodes']), 'edges': list(app_data['edges']), 'enum_ptr_map': app_data['enum_ptr_map']}
 
-    verify_data_integrity(data)
-    rendered = diagram_template_obj.render(
-        diagram_id=data['diagram_id'],
-        project_id=data['project_id'],
-        system_id=data['system_id'],
-        nodes=data['nodes'],
-        edges=data['edges']
+
+def extract_all_apps(data, show_method_dependencies, workers=APP_WORKERS):
+    """Extract every project app, in parallel when there are several apps and workers, then merge them in app order"""
+    app_configs = get_project_app_configs()
+    data['model_ptr_map'] = initialize_model_ptr_map(
+        set().union(*(collect_all_valid_models(app_config) for app_config in app_configs))
     )
+    labels = [app_config.label for app_config in app_configs]
+
+    if workers > 1 and len(labels) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        app_job_state.update(model_ptr_map=data['model_ptr_map'], show_method_dependencies=show_method_dependencies)
+        try:
+            with ProcessPoolExecutor(min(workers, len(labels)), mp_context=multiprocessing.get_context('fork')) as pool:
+                results = list(pool.map(run_app_job, labels))
+        finally:
+            app_job_state.clear()
+    else:
+        results = [extract_app(label, data['model_ptr_map'], show_method_dependencies) for label in labels]
 
-    return rendered
+    for result in results:
+        if 'error' in result:
+            sys.exit(result['error'])
+        merge_app_data(data, result)
+
+
+def generate_diagram(project_id, system_id, show_method_dependencies, all_apps=False):
+    """Main function to generate the diagram document, of the shared_models app or of every project app"""
+    data = initialize_diagram_data(project_id, system_id)
+
+    if all_apps:
+        extract_all_apps(data, show_method_dependencies)
+    else:
+        extract_shared_models(data, show_method_dependencies)
+
+    verify_data_integrity(data)
+    return build_diagram(data['diagram_id'], data['project_id'], data['system_id'], data['nodes'], data['edges'])
+
+
+def generate_diagram_json(project_id, system_id, show_method_dependencies, all_apps=False):
+    """Main function to generate diagram JSON"""
+    return serialize_diagram(generate_diagram(project_id, system_id, show_method_dependencies, all_apps))
 
 
 def main():
@@ -108,12 +168,15 @@ def main():
     parser.add_argument("--project_id", "-pid", help="id of the project the diagram needs to be added to")
     parser.add_argument("--system_id", "-sid", help="id of the system the diagram needs to be added to")
     parser.add_argument("--method_dependencies", "-md", help="if method dependencies should be included or not")
+    parser.add_argument("--all_apps", action="store_true", help="extract every project app instead of shared_models")
+    parser.add_argument("--output_format", choices=[OUTPUT_JSON, OUTPUT_NDJSON], default=OUTPUT_JSON,
+                        help="a single JSON document or one JSON document per node and edge")
     args = parser.parse_args()
 
     configure_django_settings(args.path)
-    diagram = generate_diagram_json(args.project_id, args.system_id, bool(args.method_dependencies))
+    diagram = generate_diagram(args.project_id, args.system_id, bool(args.method_dependencies), args.all_apps)
 
-    print(diagram)
+    write_diagram(diagram, sys.stdout, args.output_format)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+import sys
+import json
+import argparse
+from contextlib import redirect_stdout
+from utils.django_environment_setup import configure_django_settings
+from utils.diagram_serializer import write_diagram
+from extract_prototype_main import generate_diagram
+
+
+# The worker talks to the extraction pool with one JSON message per line.
+# A successful result is followed by the diagram itself on the next line, streamed
+# straight from the diagram dict instead of being escaped into the message.
+# Anything the user's project prints while being imported is redirected to
+# stderr, so it can never corrupt the protocol stream on stdout.
+def send_message(channel, message):
+    """Write a single protocol message to the pool"""
+    channel.write(json.dumps(message) + "\n")
+    channel.flush()
+
+
+def setup_worker(path):
+    """Configure the Django environment of the project once for this worker"""
+    try:
+        with redirect_stdout(sys.stderr):
+            configure_django_settings(path)
+    except SystemExit as e:
+        return False, str(e.code)
+    except Exception as e:
+        return False, f"Error setting up Django environment: {str(e)}"
+    return True, ""
+
+
+def send_diagram(channel, diagram):
+    """Write the diagram of a successful job as a single JSON line after its result message"""
+    send_message(channel, {"success": True, "diagram_follows": True})
+    write_diagram(diagram, channel)
+    channel.flush()
+
+
+def handle_job(job):
+    """Run a single extraction job against the already configured project, returns (message, diagram)"""
+    try:
+        with redirect_stdout(sys.stderr):
+            diagram = generate_diagram(
+                job.get('project_id'),
+                job.get('system_id'),
+                bool(job.get('method_dependencies')),
+                bool(job.get('all_apps'))
+            )
+    except SystemExit as e:
+        return {"success": False, "message": str(e.code)}, None
+    except Exception as e:
+        return {"success": False, "message": f"Error extracting diagram: {str(e)}"}, None
+    return {"success": True}, diagram
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--path", "-p", default=".", help="starting path")
+    args = parser.parse_args()
+
+    channel = sys.stdout
+    ready, error = setup_worker(args.path)
+    send_message(channel, {"ready": ready, "message": error})
+    if not ready:
+        sys.exit(1)
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+        except ValueError as e:
+            send_message(channel, {"success": False, "message": f"Invalid job: {str(e)}"})
+            continue
+        message, diagram = handle_job(job)
+        if diagram is None:
+            send_message(channel, message)
+        else:
+            send_diagram(channel, diagram)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+import os
+import sys
+import json
+import time
+import atexit
+import select
+import tempfile
+import subprocess
+import threading
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent
+EXTRACT_SCRIPT = SRC_DIR / "extract_prototype_main.py"
+WORKER_SCRIPT = SRC_DIR / "extract_worker.py"
+
+# Every worker owns the Django environment of exactly one uploaded project, because
+# configure_django_settings mutates process-global state (sys.path, settings, app registry).
+# An idle timeout of 0 keeps workers around until they hit POOL_MAX_JOBS or get evicted.
+POOL_MAX_WORKERS = int(os.environ.get('IMPORTER_POOL_MAX_WORKERS', 4))
+POOL_IDLE_TIMEOUT = float(os.environ.get('IMPORTER_POOL_IDLE_TIMEOUT', 300))
+POOL_JOB_TIMEOUT = float(os.environ.get('IMPORTER_POOL_JOB_TIMEOUT', 120))
+POOL_MAX_JOBS = int(os.environ.get('IMPORTER_POOL_MAX_JOBS', 50))
+# Bytes of a worker's stderr quoted in the error when it fails to start or exits
+STDERR_TAIL_BYTES = 2000
+# Bytes read from a worker's stdout at a time
+READ_SIZE = 64 * 1024
+
+
+class ExtractionWorkerError(Exception):
+    pass
+
+
+def run_cold_extraction(extract_path, project_id, system_id, method_dependencies, all_apps=False):
+    """Run the extraction in a fresh interpreter, as a one-off subprocess"""
+    res = subprocess.Popen([
+        sys.executable,
+        str(EXTRACT_SCRIPT),
+        "-p", extract_path,
+        "-pid", project_id,
+        "-sid", system_id,
+        "-md", str(method_dependencies),
+        *(["--all_apps"] if all_apps else []),
+    ], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+    output = res.communicate()
+    decoded = output[0].decode(sys.stdout.encoding or "utf-8")
+    if res.returncode == 0:
+        return True, decoded
+    return False, decoded
+
+
+class ExtractionWorker:
+    """A warm python process that has already set up the Django project at `extract_path`"""
+
+    def __init__(self, extract_path):
+        self.extract_path = extract_path
+        self.lock = threading.Lock()
+        self.jobs_handled = 0
+        # Callers that got the worker from the pool and did not hand it back yet, kept by the pool
+        self.checked_out = 0
+        self.last_used = time.monotonic()
+        # What was read from the worker's stdout past the last complete line
+        self.buffer = bytearray()
+        # What the worker and the project write to stderr, quoted when the worker fails
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            [sys.executable, str(WORKER_SCRIPT), "-p", extract_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self.stderr,
+            cwd=str(SRC_DIR),
+        )
+
+        ready = self._receive(POOL_JOB_TIMEOUT)
+        if not ready.get('ready'):
+            self.close()
+            raise ExtractionWorkerError(ready.get('message') or "Extraction worker failed to start")
+
+    def is_alive(self):
+        return self.process.poll() is None
+
+    def is_idle(self):
+        return self.checked_out == 0 and not self.lock.locked()
+
+    def is_idle_for(self, seconds):
+        return self.is_idle() and time.monotonic() - self.last_used > seconds
+
+    def stderr_tail(self):
+        """The last lines the worker wrote to stderr"""
+        self.stderr.seek(0, os.SEEK_END)
+        self.stderr.seek(max(self.stderr.tell() - STDERR_TAIL_BYTES, 0))
+        return self.stderr.read().decode("utf-8", errors="replace").strip()
+
+    def _error(self, message):
+        """Close the worker and return the error to raise, with what it wrote to stderr"""
+        self.close()
+        tail = self.stderr_tail()
+        return ExtractionWorkerError(f"{message}: {tail}" if tail else message)
+
+    def _receive(self, timeout, deadline=None):
+        """The next message of the worker, it is killed unless the message is complete by `deadline`"""
+        if deadline is None:
+            deadline = time.monotonic() + timeout
+        return json.loads(self._read_line(timeout, deadline))
+
+    def _read_line(self, timeout, deadline):
+        """
+        Read the worker's stdout into the buffer until it holds a complete line. Every read waits
+        on select for what is left until `deadline`, so a worker that stops halfway through a line
+        does not block the caller.
+        """
+        fd = self.process.stdout.fileno()
+        searched = 0
+        while True:
+            end = self.buffer.find(b"\n", searched)
+            if end >= 0:
+                line = bytes(self.buffer[:end + 1])
+                del self.buffer[:end + 1]
+                return line
+            searched = len(self.buffer)
+
+            remaining = deadline - time.monotonic()
+            readable = remaining > 0 and select.select([fd], [], [], remaining)[0]
+            if not readable:
+                # A worker that hangs does not exit when its stdin is closed
+                self.process.kill()
+                raise self._error(f"Extraction worker timed out after {timeout} seconds")
+            chunk = os.read(fd, READ_SIZE)
+            if not chunk:
+                raise self._error("Extraction worker exited unexpectedly")
+            self.buffer += chunk
+
+    def _receive_diagram(self, timeout, deadline):
+        """The diagram line the worker writes right after a successful result message"""
+        return self._read_line(timeout, deadline).decode("utf-8").rstrip("\n")
+
+    def run(self, project_id, system_id, method_dependencies, timeout=POOL_JOB_TIMEOUT, all_apps=False):
+        job = {
+            'project_id': project_id,
+            'system_id': system_id,
+            'method_dependencies': method_dependencies,
+            'all_apps': all_apps,
+        }
+        with self.lock:
+            try:
+                self.process.stdin.write((json.dumps(job) + "\n").encode())
+                self.process.stdin.flush()
+            except (BrokenPipeError, OSError):
+                raise self._error("Extraction worker exited unexpectedly")
+
+            # The result and the diagram after it have to arrive within the same timeout
+            deadline = time.monotonic() + timeout
+            result = self._receive(timeout, deadline)
+            if result.get('diagram_follows'):
+                result['diagram_json'] = self._receive_diagram(timeout, deadline)
+            self.jobs_handled += 1
+            self.last_used = time.monotonic()
+        return result
+
+    def close(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+
+class ExtractionPool:
+    """Keeps one warm extraction worker per uploaded project root and recycles idle ones"""
+
+    def __init__(self, max_workers=POOL_MAX_WORKERS, idle_timeout=POOL_IDLE_TIMEOUT, max_jobs=POOL_MAX_JOBS):
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self.max_jobs = max_jobs
+        self.workers = {}
+        # Project root -> event set once the worker that is being started for it is ready or failed
+        self.starting = {}
+        self.lock = threading.Lock()
+        self.reaper = None
+
+    def _start_reaper(self):
+        if self.reaper is not None or self.idle_timeout <= 0:
+            return
+        self.reaper = threading.Thread(target=self._reap_forever, name="extraction-pool-reaper", daemon=True)
+        self.reaper.start()
+
+    def _reap_forever(self):
+        while True:
+            time.sleep(max(self.idle_timeout / 2, 1))
+            self.reap()
+
+    def reap(self):
+        """Close workers that died, ran too many jobs or have been idle for too long"""
+        with self.lock:
+            stale = [
+                path for path, worker in self.workers.items()
+                if not worker.is_alive()
+                or (self.idle_timeout > 0 and worker.is_idle_for(self.idle_timeout))
+                or (worker.is_idle() and worker.jobs_handled >= self.max_jobs)
+            ]
+            closing = [self.workers.pop(path) for path in stale]
+        for worker in closing:
+            worker.close()
+
+    def _evict_least_recently_used(self):
+        idle = [worker for worker in self.workers.values() if worker.is_idle()]
+        if not idle:
+            return None
+        worker = min(idle, key=lambda w: w.last_used)
+        del self.workers[worker.extract_path]
+        return worker
+
+    def get_worker(self, extract_path):
+        """
+        Check out the worker of a project, starting it if there is none. The worker is started
+        outside the pool lock, so a cold start only makes the callers for the same project wait.
+        Hand the worker back with check_in, it is not reaped or evicted until then.
+        """
+        self.reap()
+        while True:
+            with self.lock:
+                worker = self.workers.get(extract_path)
+                if worker is not None:
+                    worker.checked_out += 1
+                    return worker
+                started = self.starting.get(extract_path)
+                if started is None:
+                    started = self.starting[extract_path] = threading.Event()
+                    break
+            # Another caller is starting this project's worker, take it once it is ready
+            started.wait()
+
+        try:
+            worker = ExtractionWorker(extract_path)
+        except BaseException:
+            with self.lock:
+                del self.starting[extract_path]
+            started.set()
+            raise
+
+        evicted = None
+        with self.lock:
+            if len(self.workers) >= self.max_workers:
+                evicted = self._evict_least_recently_used()
+            worker.checked_out += 1
+            self.workers[extract_path] = worker
+            del self.starting[extract_path]
+            self._start_reaper()
+        started.set()
+        if evicted is not None:
+            evicted.close()
+        return worker
+
+    def check_in(self, worker):
+        with self.lock:
+            worker.checked_out -= 1
+
+    def extract(self, extract_path, project_id, system_id, method_dependencies, timeout=POOL_JOB_TIMEOUT,
+                all_apps=False):
+        """Run an extraction job on the warm worker for this project, returns (success, output)"""
+        try:
+            worker = self.get_worker(extract_path)
+        except ExtractionWorkerError as e:
+            return False, str(e)
+        try:
+            result = worker.run(project_id, system_id, method_dependencies, timeout, all_apps)
+        except ExtractionWorkerError as e:
+            with self.lock:
+                if self.workers.get(extract_path) is worker and not worker.is_alive():
+                    del self.workers[extract_path]
+            return False, str(e)
+        finally:
+            self.check_in(worker)
+
+        if result.get('success'):
+            return True, result.get('diagram_json', "")
+        return False, result.get('message', "")
+
+    def release(self, extract_path):
+        """Drop the worker of a project, e.g. once its extraction directory is removed"""
+        with self.lock:
+            worker = self.workers.pop(extract_path, None)
+        if worker is not None:
+            worker.close()
+
+    def shutdown(self):
+        with self.lock:
+            workers = list(self.workers.values())
+            self.workers.clear()
+        for worker in workers:
+            worker.close()
+
+
+extraction_pool = ExtractionPool()
+atexit.register(extraction_pool.shutdown)
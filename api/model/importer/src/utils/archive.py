@@ -0,0 +1,116 @@
+import os
+import zipfile
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024
+MAX_TOTAL_SIZE = int(os.environ.get('IMPORTER_MAX_TOTAL_SIZE', 512 * 1024 * 1024))
+MAX_MEMBERS = int(os.environ.get('IMPORTER_MAX_MEMBERS', 20000))
+
+EXTRACT_SELECTIVE = "selective"
+EXTRACT_FULL = "full"
+
+# Directories that never hold code django.setup() or the model extractor import
+EXCLUDED_DIRS = {
+    '.git', '__pycache__', 'node_modules', 'venv', '.venv', 'env', 'site-packages',
+    'media', 'static', 'staticfiles', 'templates',
+}
+
+
+class ArchiveLimitError(ValueError):
+    pass
+
+
+def safe_member_path(name):
+    """
+    Turn an archive member name into a relative path inside the extraction directory.
+    Mirrors ZipFile.extractall: drive letters, absolute roots, '.' and '..' components are dropped.
+    """
+    parts = []
+    for part in name.replace('\\', '/').split('/'):
+        part = os.path.splitdrive(part)[1]
+        if part in ('', '.', '..'):
+            continue
+        parts.append(part)
+    return Path(*parts) if parts else None
+
+
+def check_limits(member_count, total_size, max_members, max_total_size):
+    if member_count > max_members:
+        raise ArchiveLimitError(f"Upload contains more than {max_members} files")
+    if total_size > max_total_size:
+        raise ArchiveLimitError(f"Upload is larger than {max_total_size} bytes")
+
+
+def copy_stream(source, dest, budget, chunk_size=CHUNK_SIZE):
+    """Copy source to dest in fixed-size chunks, failing once more than `budget` bytes are written"""
+    written = 0
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            return written
+        written += len(chunk)
+        if written > budget:
+            raise ArchiveLimitError("Upload is larger than the allowed size")
+        dest.write(chunk)
+
+
+def is_excluded(path):
+    return any(part in EXCLUDED_DIRS for part in path.parent.parts)
+
+
+def select_project_members(members):
+    """
+    Pick the members the model extractor needs from the zip central directory: the python sources
+    of the directory holding the Django project package (the one with settings.py), i.e. the project
+    package and its apps. Returns None when no settings.py is found.
+    """
+    entries = [(safe_member_path(member.filename), member) for member in members if not member.is_dir()]
+    entries = [(path, member) for path, member in entries if path is not None]
+
+    settings_files = [path for path, _ in entries if path.name == 'settings.py' and not is_excluded(path)]
+    if not settings_files:
+        return None
+
+    # The shallowest settings.py is the project, deeper ones are vendored or nested copies
+    base_parts = min(settings_files, key=lambda path: len(path.parts)).parent.parent.parts
+    return [
+        member for path, member in entries
+        if path.suffix == '.py'
+        and path.parts[:len(base_parts)] == base_parts
+        and not is_excluded(Path(*path.parts[len(base_parts):]))
+    ]
+
+
+def extract_zip_streaming(zip_path, extract_dir, max_total_size=MAX_TOTAL_SIZE, max_members=MAX_MEMBERS,
+                          chunk_size=CHUNK_SIZE, mode=EXTRACT_FULL):
+    """
+    Extract a zip member by member with a bounded buffer, so memory stays flat for large archives.
+    In selective mode only the members picked by select_project_members are written, falling back to
+    a full extraction when no Django project is found. The declared sizes are checked up-front and the
+    real sizes while writing. Returns the bytes written and the (uncompressed) bytes skipped.
+    """
+    extract_dir = Path(extract_dir)
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        members = zip_ref.infolist()
+        total_size = sum(member.file_size for member in members)
+        if mode == EXTRACT_SELECTIVE:
+            members = select_project_members(members) or members
+        skipped = total_size - sum(member.file_size for member in members)
+
+        check_limits(len(members), sum(member.file_size for member in members), max_members, max_total_size)
+
+        written = 0
+        for member in members:
+            rel_path = safe_member_path(member.filename)
+            if rel_path is None:
+                continue
+
+            dest_path = extract_dir / rel_path
+            if member.is_dir():
+                dest_path.mkdir(parents=True, exist_ok=True)
+                continue
+
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            with zip_ref.open(member) as source, open(dest_path, 'wb') as dest:
+                written += copy_stream(source, dest, max_total_size - written, chunk_size)
+    return written, skipped
@@ -0,0 +1,95 @@
+import os
+import json
+import uuid
+from pathlib import Path
+
+from .diagram_serializer import serialize_diagram
+
+CACHE_MAX_BYTES = int(os.environ.get('IMPORTER_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+# Part of every cache file name, raise it when the extractors draw diagrams differently so
+# diagrams cached before are no longer served (they are evicted as least recently used)
+CACHE_FORMAT = 2
+
+# Written into every content-addressed extraction directory once it is complete
+UPLOAD_INFO_FILE = ".upload.json"
+
+
+def write_upload_info(extract_dir, digest, skipped_bytes=0, size=None):
+    """`size` is the bytes the extraction directory takes, counted against its eviction budget"""
+    info = {"hash": digest, "skipped_bytes": skipped_bytes}
+    if size is not None:
+        info["bytes"] = size
+    with open(Path(extract_dir) / UPLOAD_INFO_FILE, 'w') as f:
+        json.dump(info, f)
+
+
+def read_upload_info(extract_dir):
+    """
+    Return the upload info of a complete extraction directory, or None. Like a cache hit, this
+    marks the directory as recently used.
+    """
+    path = Path(extract_dir) / UPLOAD_INFO_FILE
+    try:
+        with open(path) as f:
+            info = json.load(f)
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    return info
+
+
+def restamp_diagram(diagram_json, project_id, system_id):
+    """Point a cached diagram at the project and system of the current request"""
+    diagram = json.loads(diagram_json)
+    diagram['project'] = project_id
+    diagram['system'] = system_id
+    return serialize_diagram(diagram)
+
+
+class DiagramCache:
+    """
+    Rendered diagram JSON on disk, keyed by (archive hash, include_method_dependencies).
+    The modification time doubles as last-access time, least recently used entries are
+    evicted once the cache grows over `max_bytes`.
+    """
+
+    def __init__(self, directory, max_bytes=CACHE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def path(self, digest, method_dependencies):
+        suffix = "md" if method_dependencies else "plain"
+        return self.directory / f"{digest}_{suffix}_v{CACHE_FORMAT}.json"
+
+    def get(self, digest, method_dependencies):
+        path = self.path(digest, method_dependencies)
+        try:
+            diagram_json = path.read_text()
+            os.utime(path)
+        except OSError:
+            return None
+        return diagram_json
+
+    def put(self, digest, method_dependencies, diagram_json):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(digest, method_dependencies)
+        tmp_path = path.with_name(f".{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(diagram_json)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for path in self.directory.glob('*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
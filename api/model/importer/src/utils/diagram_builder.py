@@ -0,0 +1,107 @@
+import uuid
+
+
+class NodeList(list):
+    """List of node dicts that keeps the set of node ids next to it"""
+
+    def __init__(self, nodes=()):
+        super().__init__()
+        self.ids = set()
+        self.extend(nodes)
+
+    def append(self, node):
+        super().append(node)
+        self.ids.add(node.get('id'))
+
+    def extend(self, nodes):
+        for node in nodes:
+            self.append(node)
+
+
+class EdgeList(list):
+    """List of edge dicts that keeps a (source_ptr, target_ptr, label) index next to it"""
+
+    def __init__(self, edges=()):
+        super().__init__()
+        self.keys = set()
+        self.extend(edges)
+
+    def append(self, edge):
+        super().append(edge)
+        self.keys.add(edge_key(edge))
+
+    def extend(self, edges):
+        for edge in edges:
+            self.append(edge)
+
+
+def edge_key(edge):
+    return edge.get('source_ptr'), edge.get('target_ptr'), edge.get('rel', {}).get('label', '')
+
+
+def get_node_ids(nodes):
+    """The ids of all nodes, taken from the index when the nodes are a NodeList"""
+    if isinstance(nodes, NodeList):
+        return nodes.ids
+    return {node.get('id') for node in nodes}
+
+
+def has_node(nodes, node_id):
+    if isinstance(nodes, NodeList):
+        return node_id in nodes.ids
+    return any(node.get('id') == node_id for node in nodes)
+
+
+def has_edge(edges, source_ptr, target_ptr, label):
+    """Check for an edge between two nodes with the given label, in constant time for an EdgeList"""
+    if isinstance(edges, EdgeList):
+        return (source_ptr, target_ptr, label) in edges.keys
+    return any(edge_key(edge) == (source_ptr, target_ptr, label) for edge in edges)
+
+
+# Functions related to diagram initialization
+def initialize_diagram_data(project_id, system_id):
+    """Initialize the basic data needed for the diagram, nodes and edges are indexed for constant time lookups"""
+    return {
+        'diagram_id': str(uuid.uuid4()),
+        'project_id': project_id,
+        'system_id': system_id,
+        'nodes': NodeList(),
+        'edges': EdgeList(),
+        'model_ptr_map': {},
+        'enum_ptr_map': {}
+    }
+
+
+def initialize_app_data(model_ptr_map):
+    """The part of the diagram data one app is extracted into, before it is merged with the others"""
+    return {
+        'nodes': NodeList(),
+        'edges': EdgeList(),
+        'model_ptr_map': model_ptr_map,
+        'enum_ptr_map': {}
+    }
+
+
+def merge_app_data(data, app_data):
+    """
+    Append the nodes and edges of one app to the diagram. Enums are keyed by field name across the
+    whole diagram, so an enum the diagram already has replaces the app's own node and references.
+    Merging the apps in a fixed order gives the same diagram however the apps were extracted.
+    """
+    replaced = {}
+    for enum_name, enum_ptr in app_data['enum_ptr_map'].items():
+        existing = data['enum_ptr_map'].setdefault(enum_name, enum_ptr)
+        if existing != enum_ptr:
+            replaced[enum_ptr] = existing
+
+    for node in app_data['nodes']:
+        if node['id'] in replaced:
+            continue
+        for attribute in node['cls'].get('attributes', []):
+            attribute['enum'] = replaced.get(attribute['enum'], attribute['enum'])
+        data['nodes'].append(node)
+
+    for edge in app_data['edges']:
+        edge['target_ptr'] = replaced.get(edge['target_ptr'], edge['target_ptr'])
+        data['edges'].append(edge)
@@ -0,0 +1,142 @@
+import json
+
+# The diagram is built as a dict and handed to json directly, instead of being rendered through the
+# string template in diagram_template.py. The values keep the shapes the template produced (e.g.
+# "None" for attributes without enum, as `"{{ value }}"` is str(value)), which is what
+# /diagram/import has always received.
+
+OUTPUT_JSON = "json"
+OUTPUT_NDJSON = "ndjson"
+
+COMPACT_SEPARATORS = (',', ':')
+
+
+def template_lower(value):
+    """A value as `{{ value | lower }}` rendered it in the template"""
+    return str(value).lower()
+
+
+def build_edge(edge):
+    rel = edge['rel']
+    return {
+        "id": str(edge['id']),
+        "rel": {
+            "type": str(rel['type']),
+            "label": str(rel['label']),
+            "multiplicity": {
+                "source": str(rel['multiplicity']['source']),
+                "target": str(rel['multiplicity']['target'])
+            }
+        },
+        "data": {},
+        "rel_ptr": str(edge['rel_ptr']),
+        "source_ptr": str(edge['source_ptr']),
+        "target_ptr": str(edge['target_ptr'])
+    }
+
+
+def build_class(cls):
+    return {
+        "leaf": cls['leaf'],
+        "name": str(cls['name']),
+        "type": "class",
+        "methods": [
+            {
+                "body": str(method['body']),
+                "name": str(method['name']),
+                "type": str(method['type']),
+                "description": str(method['description'])
+            }
+            for method in cls['methods']
+        ],
+        "abstract": cls['abstract'],
+        "namespace": str(cls['namespace']),
+        "attributes": [
+            {
+                "body": str(attribute['body']),
+                "enum": str(attribute['enum']),
+                "name": str(attribute['name']),
+                "type": str(attribute['type']),
+                "derived": template_lower(attribute['derived']),
+                "description": str(attribute['description'])
+            }
+            for attribute in cls['attributes']
+        ]
+    }
+
+
+def build_enum(cls):
+    return {
+        "name": str(cls['name']),
+        "type": "enum",
+        "literals": cls['literals'],
+        "namespace": str(cls['namespace'])
+    }
+
+
+def build_node(node):
+    cls = node['cls']
+    return {
+        "id": str(node['id']),
+        "cls": build_enum(cls) if cls['type'] == 'enum' else build_class(cls),
+        "data": {
+            "position": {
+                "x": node['data']['position']['x'],
+                "y": node['data']['position']['y']
+            }
+        },
+        "cls_ptr": str(node['cls_ptr'])
+    }
+
+
+def build_diagram(diagram_id, project_id, system_id, nodes, edges):
+    """The diagram document /diagram/import expects, from the extracted nodes and edges"""
+    return {
+        "id": str(diagram_id),
+        "name": "Diagram",
+        "type": "classes",
+        "edges": [build_edge(edge) for edge in edges],
+        "nodes": [build_node(node) for node in nodes],
+        "system": str(system_id),
+        "project": str(project_id),
+        "description": ""
+    }
+
+
+def iter_ndjson(diagram):
+    """
+    One JSON document per line: the diagram without nodes and edges first, then {"node": ...}
+    for every node and {"edge": ...} for every edge, so a consumer can import incrementally
+    """
+    header = {key: value for key, value in diagram.items() if key not in ('nodes', 'edges')}
+    yield json.dumps(header, separators=COMPACT_SEPARATORS)
+    for node in diagram['nodes']:
+        yield json.dumps({"node": node}, separators=COMPACT_SEPARATORS)
+    for edge in diagram['edges']:
+        yield json.dumps({"edge": edge}, separators=COMPACT_SEPARATORS)
+
+
+def serialize_diagram(diagram, output_format=OUTPUT_JSON):
+    """The diagram as compact JSON, or as NDJSON lines"""
+    if output_format == OUTPUT_NDJSON:
+        return "\n".join(iter_ndjson(diagram)) + "\n"
+    return json.dumps(diagram, separators=COMPACT_SEPARATORS)
+
+
+def write_diagram(diagram, stream, output_format=OUTPUT_JSON):
+    """
+    Write the diagram to a file object, NDJSON line by line. A single document is encoded in one
+    go, json.dump would fall back to the pure python encoder to produce it in chunks.
+    """
+    if output_format == OUTPUT_NDJSON:
+        for line in iter_ndjson(diagram):
+            stream.write(line + "\n")
+    else:
+        stream.write(serialize_diagram(diagram) + "\n")
+
+
+def convert_diagram(diagram_json, output_format):
+    """Re-serialise a JSON diagram, e.g. one served from the cache, in the requested output format"""
+    if output_format == OUTPUT_JSON:
+        return diagram_json
+    return serialize_diagram(json.loads(diagram_json), output_format)
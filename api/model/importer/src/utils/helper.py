@@ -1,8 +1,11 @@
 import inspect
 import sys
 import uuid
+from functools import lru_cache
 from django.db import models
 
+from .diagram_builder import get_node_ids
+
 DJANGO_GENERATED_METHODS = {
     'check', 'clean', 'clean_fields', 'delete', 'full_clean', 'save',
     'save_base', 'validate_unique'
@@ -45,10 +48,16 @@ def collect_all_valid_models(app_config):
     return models_set
 
 
+@lru_cache(maxsize=4096)
+def get_function_source(func):
+    """Source of a function, cached because every model inherits the same django Model methods"""
+    return inspect.getsource(func)
+
+
 def get_model_all_methods(model):
     try:
         return {
-            name: inspect.getsource(func)
+            name: get_function_source(func)
             for name, func in inspect.getmembers(model, predicate=inspect.isfunction)
         }
     except Exception:
@@ -62,12 +71,13 @@ def initialize_model_ptr_map(models):
 
 def verify_data_integrity(data):
     """Check that edges reference existing nodes"""
+    node_ids = get_node_ids(data.get('nodes', []))
     for edge in data.get('edges', []):
         source = edge.get('source_ptr')
         target = edge.get('target_ptr')
-        if not any(node.get('id') == source for node in data.get('nodes', [])):
-            sys.exit(f"Warning: Source node not found {source}")  # line 68
-        if not any(node.get('id') == target for node in data.get('nodes', [])):
+        if source not in node_ids:
+            sys.exit(f"Warning: Source node not found {source}")
+        if target not in node_ids:
             sys.exit(f"Warning: Target node not found {target}")
 
 
@@ -67,11 +67,16 @@ def create_attribute(field, enum_ref):
 
 def create_model_node(model, cls_ptr, attributes):
     """Create model node"""
+    return create_class_node(model.__name__, cls_ptr, attributes, get_custom_methods(model))
+
+
+def create_class_node(name, cls_ptr, attributes, method_names):
+    """Create a class node from its name, attributes and the names of its custom methods"""
     return {
         "id": cls_ptr,
         "cls": {
             "leaf": False,
-            "name": model.__name__,
+            "name": name,
             "type": "class",
             "methods": [
                 {
@@ -80,7 +85,7 @@ def create_model_node(model, cls_ptr, attributes):
                     "type": "str",
                     "description": ""
                 }
-                for method in get_custom_methods(model)
+                for method in method_names
             ],
             "abstract": False,
             "namespace": "",
@@ -1,10 +1,15 @@
 import sys
 import uuid
 import re  # Import the regular expression module
+from functools import lru_cache
 from django.db import models
 from django.db.models import ForeignKey, OneToOneField
 
 from .helper import is_enum_field, get_model_all_methods
+from .diagram_builder import has_edge
+
+# Model names are identifiers, so a name occurs as a whole word exactly when it is one of these tokens
+IDENTIFIER_PATTERN = re.compile(r'\w+')
 
 
 def create_edge(rel_type, label, multiplicity, source_ptr, target_ptr):
@@ -35,15 +40,22 @@ def process_model_relationships(model, model_ptr_map, enum_ptr_map, edges):
     process_field_relationships(model, model_ptr_map, enum_ptr_map, edges, source_ptr)
 
 
-def process_inheritance_relationships(model, model_ptr_map, edges, source_ptr):
-    """Process model inheritance relationships."""
-    parent_classes = [base for base in model.__bases__ if hasattr(base, '__name__') and base is not object]
+def get_parent_classes(model):
+    return [base for base in model.__bases__ if hasattr(base, '__name__') and base is not object]
+
+
+def get_inherited_field_names(model):
+    """Names of the fields a model inherits from its model parents"""
     inherited_fields = set()
-    for parent_class in parent_classes:
+    for parent_class in get_parent_classes(model):
         if issubclass(parent_class, models.Model) and parent_class != models.Model:
             inherited_fields.update(f.name for f in parent_class._meta.get_fields() if hasattr(f, 'name'))
+    return inherited_fields
+
 
-    for parent_class in parent_classes:
+def process_inheritance_relationships(model, model_ptr_map, edges, source_ptr):
+    """Process model inheritance relationships, one generalization edge per extracted parent."""
+    for parent_class in get_parent_classes(model):
         if (parent_class.__name__.startswith('django.') or
                 parent_class.__name__ == 'Model' or
                 parent_class.__name__ == 'object'):
@@ -56,12 +68,12 @@ def process_inheritance_relationships(model, model_ptr_map, edges, source_ptr):
         edges.append(create_edge("generalization", "inherits", {"source": "1", "target": "1"},
                                  source_ptr, target_ptr))
 
-    return inherited_fields
+    return get_inherited_field_names(model)
 
 
 def process_field_relationships(model, model_ptr_map, enum_ptr_map, edges, source_ptr):
-    """Process model field relationships."""
-    inherited_fields = process_inheritance_relationships(model, model_ptr_map, edges, source_ptr)
+    """Process model field relationships, the generalization edges are added by process_inheritance_relationships."""
+    inherited_fields = get_inherited_field_names(model)
 
     for field in model._meta.get_fields():
         if not hasattr(field, 'get_internal_type'):
@@ -76,13 +88,8 @@ def process_field_relationships(model, model_ptr_map, enum_ptr_map, edges, sourc
             if not target_ptr:
                 continue
 
-            process = True
-            for edge in edges:
-                if edge.get('rel', {}).get('label', '').startswith('calls'):
-                    if edge.get('source_ptr') == source_ptr and edge.get('target_ptr') == target_ptr:
-                        process = False
-                        continue
-            if process:
+            # Models already connected by a method dependency get no additional relation edge
+            if not has_edge(edges, source_ptr, target_ptr, 'calls'):
                 process_relationship_field(field, model, edges, source_ptr, target_ptr)
 
         elif is_enum_field(field):
@@ -105,23 +112,40 @@ def get_relationship_type(field, model):
         return 'inheritance'
 
     if isinstance(field, (ForeignKey, OneToOneField)):
-        if field.remote_field.on_delete == models.CASCADE:
-            if not field.null:
-                return 'composition'
-            else:
-                return 'association'
-        else:
-            return 'association'
+        return classify_relationship(field.remote_field.on_delete == models.CASCADE, field.null)
     return 'unknown'
 
 
+def classify_relationship(cascade, null):
+    """A required ForeignKey or OneToOneField that cascades on delete is a composition"""
+    if cascade and not null:
+        return 'composition'
+    return 'association'
+
+
+def many_to_many_multiplicity(null):
+    return {"source": "*", "target": "1..*" if not null else "*"}
+
+
+def one_to_one_multiplicity(null):
+    return {"source": "1", "target": "1" if not null else "0..1"}
+
+
+def foreign_key_multiplicity(null):
+    return {"source": "1", "target": "1..*" if not null else "*"}
+
+
+def append_relationship_edge(edges, rel_type, multiplicity, source_ptr, target_ptr):
+    """Compositions point from the owning (target) model to the owned one, associations the other way"""
+    if rel_type == "composition":
+        edges.append(create_edge(rel_type, "compose", multiplicity, target_ptr, source_ptr))
+    elif rel_type == "association":
+        edges.append(create_edge(rel_type, "connect", multiplicity, source_ptr, target_ptr))
+
+
 def process_many_to_many_field(field, edges, source_ptr, target_ptr):
     """Process many-to-many fields."""
-    multiplicity = {
-        "source": "*",
-        "target": "1..*" if not field.null else "*"
-    }
-    edges.append(create_edge("association", "connect", multiplicity, source_ptr, target_ptr))
+    edges.append(create_edge("association", "connect", many_to_many_multiplicity(field.null), source_ptr, target_ptr))
 
 
 def process_one_to_one_field(field, model, edges, source_ptr, target_ptr):
@@ -129,17 +153,8 @@ def process_one_to_one_field(field, model, edges, source_ptr, target_ptr):
     if not getattr(field, 'concrete', False) or not hasattr(field, 'related_model'):
         return
 
-    multiplicity = {
-        "source": "1",
-        "target": "1" if not field.null else "0..1"
-    }
-
     rel_type = get_relationship_type(field, model)
-    if rel_type in ["composition", "association"]:
-        if rel_type == "composition":
-            edges.append(create_edge(rel_type, "compose", multiplicity, target_ptr, source_ptr))
-        else:
-            edges.append(create_edge(rel_type, "connect", multiplicity, source_ptr, target_ptr))
+    append_relationship_edge(edges, rel_type, one_to_one_multiplicity(field.null), source_ptr, target_ptr)
 
 
 def process_foreign_key_field(field, model, edges, source_ptr, target_ptr):
@@ -148,16 +163,7 @@ def process_foreign_key_field(field, model, edges, source_ptr, target_ptr):
         return
 
     rel_type = get_relationship_type(field, model)
-
-    multiplicity = {
-                "source": "1",
-                "target": "1..*" if not field.null else "*"
-            }
-    if rel_type in ["composition", "association"]:
-        if rel_type == "composition":
-            edges.append(create_edge(rel_type, "compose", multiplicity, target_ptr, source_ptr))
-        else:
-            edges.append(create_edge(rel_type, "connect", multiplicity, source_ptr, target_ptr))
+    append_relationship_edge(edges, rel_type, foreign_key_multiplicity(field.null), source_ptr, target_ptr)
 
 
 def process_enum_field(field, enum_ptr_map, edges, source_ptr):
@@ -178,32 +184,63 @@ def extract_method_dependencies(model, all_models, data):
         if methods is None:
             return
 
-        model_names = {m.__name__: m for m in all_models}
+        model_names = get_model_name_map(tuple(all_models))
         add_method_dependency_edges(model, methods, model_names, data, source_ptr)
 
     except Exception as outer_e:
         sys.exit(f"Unexpected error '{getattr(model, '__name__', str(model))}': {outer_e}")
 
 
+@lru_cache(maxsize=32)
+def get_model_name_map(models):
+    """Map the model names of an app to their models, built once per app instead of once per model"""
+    return {m.__name__: m for m in models}
+
+
+@lru_cache(maxsize=32)
+def build_model_name_index(model_names):
+    """
+    Validate the model names of an app once, returns them as a set to match source tokens against
+    and a map of each name to its position among the models
+    """
+    for name in model_names:
+        if not isinstance(name, str) or not name.isidentifier():
+            raise TypeError(f"Invalid model name {name!r}")
+    return frozenset(model_names), {name: position for position, name in enumerate(model_names)}
+
+
+@lru_cache(maxsize=8192)
+def find_referenced_names(code, names):
+    """
+    The names mentioned as whole words in `code`, in order of first mention, in a single scan.
+    Cached, as every model of an app shares the sources of the methods inherited from django.
+    """
+    return tuple(dict.fromkeys(token for token in IDENTIFIER_PATTERN.findall(code) if token in names))
+
+
 def add_method_dependency_edges(model, source_code_map, model_names, data, source_ptr):
-    added_targets = set()
-    for method_name, code in source_code_map.items():
-        for other_model_name, other_model in model_names.items():
-            if other_model == model or other_model_name in added_targets:
-                continue
-            try:
-                # ROBUSTNESS FIX: Use a regular expression to match whole words only.
-                # This prevents false positives where a model name is a substring of another word.
-                if re.search(r'\b' + re.escape(other_model_name) + r'\b', code):
-                    target_ptr = data['model_ptr_map'].get(other_model)
-                    if target_ptr:
-                        data['edges'].append(create_edge(
-                            "dependency",
-                            "calls",
-                            {"source": "1", "target": "1"},
-                            source_ptr,
-                            target_ptr
-                        ))
-                        added_targets.add(other_model_name)
-            except Exception as inner_e:
-                sys.exit(f"Error processing dependency from '{model.__name__}' to '{other_model_name}': {inner_e}")
\ No newline at end of file
+    try:
+        names, positions = build_model_name_index(tuple(model_names))
+    except Exception as e:
+        sys.exit(f"Error processing dependency from '{model.__name__}': {e}")
+
+    # One pass over every method body instead of one regex search per (method, model) pair.
+    # Within a method the targets keep the order of the models, as with the per-model search.
+    referenced = {}
+    for code in source_code_map.values():
+        found = [name for name in find_referenced_names(code, names) if name not in referenced]
+        referenced.update(dict.fromkeys(sorted(found, key=positions.__getitem__)))
+
+    for other_model_name in referenced:
+        other_model = model_names[other_model_name]
+        if other_model == model:
+            continue
+        target_ptr = data['model_ptr_map'].get(other_model)
+        if target_ptr:
+            data['edges'].append(create_edge(
+                "dependency",
+                "calls",
+                {"source": "1", "target": "1"},
+                source_ptr,
+                target_ptr
+            ))
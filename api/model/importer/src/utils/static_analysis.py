@@ -0,0 +1,948 @@
+import ast
+import importlib
+from functools import lru_cache
+from pathlib import Path
+
+from django.db import models
+
+from .helper import DJANGO_GENERATED_METHODS, get_model_all_methods, is_method_without_args
+
+# Static counterpart of what django.setup() gives the runtime extractor: the models of an app,
+# their fields in _meta.get_fields() order, their bases and methods, read from the sources with `ast`.
+# Only django itself is ever imported (to know its field and model classes), never the uploaded project.
+
+AUTH_USER_MODEL_SETTING = 'django.conf.settings.AUTH_USER_MODEL'
+GET_USER_MODEL = 'django.contrib.auth.get_user_model'
+DEFAULT_AUTH_USER_MODEL = 'auth.User'
+STANDARD_MODEL_ATTRIBUTES = frozenset(dir(models.Model))
+
+# Decorators that turn a method into something inspect.isfunction() rejects on the model class
+DESCRIPTOR_DECORATORS = {'property', 'cached_property', 'classmethod', 'setter', 'getter', 'deleter'}
+
+PLAIN_FIELD = 'field'
+FOREIGN_KEY = 'fk'
+ONE_TO_ONE = 'o2o'
+MANY_TO_MANY = 'm2m'
+OTHER_RELATION = 'relation'
+
+END_OF_MODULE = float('inf')
+MAX_RESOLVE_DEPTH = 25
+
+
+@lru_cache(maxsize=1024)
+def load_external(path):
+    """Import a django object by its dotted path, returns None for anything outside django"""
+    if not path.startswith('django.') or path.startswith('django.conf.settings'):
+        return None
+    parts = path.split('.')
+    for i in range(len(parts), 0, -1):
+        try:
+            obj = importlib.import_module('.'.join(parts[:i]))
+        except ImportError:
+            continue
+        except Exception:
+            return None
+        try:
+            for attr in parts[i:]:
+                obj = getattr(obj, attr)
+        except Exception:
+            return None
+        return obj
+    return None
+
+
+@lru_cache(maxsize=256)
+def get_framework_method_sources(cls):
+    return get_model_all_methods(cls) or {}
+
+
+@lru_cache(maxsize=256)
+def get_framework_custom_methods(cls):
+    """get_custom_methods for a django class, which may be abstract and refuse attribute access"""
+    methods = set()
+    for name in dir(cls):
+        if name.startswith('_') or name in STANDARD_MODEL_ATTRIBUTES or name in DJANGO_GENERATED_METHODS:
+            continue
+        try:
+            if is_method_without_args(getattr(cls, name)):
+                methods.add(name)
+        except Exception:
+            continue
+    return frozenset(methods), frozenset(dir(cls))
+
+
+def get_field_kind(field_class):
+    if issubclass(field_class, models.ManyToManyField):
+        return MANY_TO_MANY
+    if issubclass(field_class, models.OneToOneField):
+        return ONE_TO_ONE
+    if issubclass(field_class, models.ForeignKey):
+        return FOREIGN_KEY
+    if any(getattr(field_class, flag, None) for flag in ('many_to_many', 'many_to_one', 'one_to_many', 'one_to_one')):
+        return OTHER_RELATION
+    return PLAIN_FIELD
+
+
+def make_plain_field(field_class, name, choices=None):
+    """
+    An unbound instance of the field class, so is_enum_field and map_field_type see exactly what they
+    see at runtime. Field classes whose constructor needs more arguments are set up as a bare Field.
+    """
+    kwargs = {'choices': choices} if choices is not None else {}
+    try:
+        field = field_class(**kwargs)
+    except Exception:
+        field = field_class.__new__(field_class)
+        models.Field.__init__(field, **kwargs)
+    field.set_attributes_from_name(name)
+    return field
+
+
+def literal(node, default=None):
+    if node is None:
+        return default
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return default
+
+
+def decorator_name(decorator):
+    target = decorator.func if isinstance(decorator, ast.Call) else decorator
+    if isinstance(target, ast.Attribute):
+        return target.attr
+    if isinstance(target, ast.Name):
+        return target.id
+    return None
+
+
+def collect_bindings(body, bindings=None):
+    """Map every name bound by the statements of a module or class body to [(lineno, statement)]"""
+    bindings = {} if bindings is None else bindings
+    for stmt in body:
+        names = []
+        if isinstance(stmt, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+            names = [stmt.name]
+        elif isinstance(stmt, ast.Assign):
+            names = [target.id for target in stmt.targets if isinstance(target, ast.Name)]
+        elif isinstance(stmt, ast.AnnAssign) and stmt.value is not None and isinstance(stmt.target, ast.Name):
+            names = [stmt.target.id]
+        elif isinstance(stmt, ast.Import):
+            names = [alias.asname or alias.name.split('.')[0] for alias in stmt.names]
+        elif isinstance(stmt, ast.ImportFrom):
+            names = [alias.asname or alias.name for alias in stmt.names if alias.name != '*']
+        elif isinstance(stmt, ast.If):
+            collect_bindings(stmt.body + stmt.orelse, bindings)
+        elif isinstance(stmt, ast.Try):
+            handlers = [s for handler in stmt.handlers for s in handler.body]
+            collect_bindings(stmt.body + handlers + stmt.orelse + stmt.finalbody, bindings)
+        for name in names:
+            bindings.setdefault(name, []).append((stmt.lineno, stmt))
+    return bindings
+
+
+def find_binding(bindings, name, lineno):
+    """The last binding of `name` before `lineno`, or the last one at all when it is only bound later"""
+    candidates = bindings.get(name)
+    if not candidates:
+        return None
+    before = [candidate for candidate in candidates if candidate[0] < lineno]
+    return (before or candidates)[-1]
+
+
+def linearize(cls, bases):
+    """C3 method resolution order over project classes and django classes"""
+    sequences = [list(get_mro(base)) for base in bases] + [list(bases)]
+    result = [cls]
+    while True:
+        sequences = [sequence for sequence in sequences if sequence]
+        if not sequences:
+            return result
+        for sequence in sequences:
+            head = sequence[0]
+            if not any(head in other[1:] for other in sequences):
+                break
+        else:
+            # Inconsistent hierarchy, Python would refuse it; keep a depth-first order
+            for sequence in sequences:
+                result.extend(item for item in sequence if item not in result)
+            return result
+        result.append(head)
+        for sequence in sequences:
+            if sequence[0] is head:
+                del sequence[0]
+
+
+def get_mro(cls):
+    if isinstance(cls, ClassInfo):
+        return cls.mro()
+    return cls.__mro__
+
+
+def is_model_class(cls):
+    if isinstance(cls, ClassInfo):
+        return cls.is_model()
+    return isinstance(cls, type) and issubclass(cls, models.Model)
+
+
+def is_abstract_model(cls):
+    if isinstance(cls, ClassInfo):
+        return cls.is_abstract()
+    meta = getattr(cls, '_meta', None)
+    return meta is None or meta.abstract
+
+
+def class_name(cls):
+    return cls.name if isinstance(cls, ClassInfo) else cls.__name__
+
+
+class External:
+    """A name imported from outside the uploaded project, e.g. django.db.models.CharField"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def child(self, name):
+        return External(f"{self.path}.{name}")
+
+    def load(self):
+        return load_external(self.path)
+
+
+class Value:
+    """An expression that is not a reference, together with the scope it was written in"""
+
+    def __init__(self, node, scope):
+        self.node = node
+        self.scope = scope
+
+
+class Scope:
+    def __init__(self, module, cls=None, lineno=END_OF_MODULE):
+        self.module = module
+        self.cls = cls
+        self.lineno = lineno
+
+
+class StaticField:
+    """A model field as read from the source, or taken from a django base class"""
+
+    def __init__(self, name, kind, order, field=None, auto_created=False):
+        self.name = name
+        self.kind = kind
+        self.order = order
+        self.field = field  # django field instance for plain fields
+        self.auto_created = auto_created
+        self.null = False
+        self.cascade = False
+        self.primary_key = False
+        self.parent_link = False
+        self.related_name = None
+        self.related_query_name = None
+        self.target = None  # Value, ClassInfo, django model class or lazy reference string
+
+    @property
+    def is_relation(self):
+        return self.kind != PLAIN_FIELD
+
+    @property
+    def reverse_name(self):
+        """Name of the reverse relation django adds to the target model, None when hidden"""
+        if self.related_name and self.related_name.endswith('+'):
+            return None
+        return self.related_query_name or self.related_name
+
+
+class ModuleInfo:
+    def __init__(self, project, name, path, index):
+        self.project = project
+        self.name = name
+        self.path = path
+        self.index = index
+        self.source = path.read_text(encoding='utf-8', errors='replace')
+        self.lines = self.source.splitlines(keepends=True)
+        self.tree = ast.parse(self.source, filename=str(path))
+        self.package = name if path.name == '__init__.py' else name.rpartition('.')[0]
+        self.bindings = collect_bindings(self.tree.body)
+        self.star_imports = [
+            stmt for stmt in iter_statements(self.tree.body)
+            if isinstance(stmt, ast.ImportFrom) and any(alias.name == '*' for alias in stmt.names)
+        ]
+
+    def absolute_module(self, stmt):
+        """The absolute module name of an ImportFrom statement"""
+        if not stmt.level:
+            return stmt.module or ''
+        parts = self.package.split('.') if self.package else []
+        parts = parts[:len(parts) - (stmt.level - 1)]
+        if stmt.module:
+            parts.append(stmt.module)
+        return '.'.join(parts)
+
+    def segment(self, node):
+        """Source of a function including its decorators, as inspect.getsource returns it"""
+        start = min([decorator.lineno for decorator in node.decorator_list] + [node.lineno])
+        return ''.join(self.lines[start - 1:node.end_lineno])
+
+
+class ClassInfo:
+    """A class statement of the uploaded project"""
+
+    def __init__(self, project, module, node):
+        self.project = project
+        self.module = module
+        self.node = node
+        self.name = node.name
+        self.bindings = collect_bindings(node.body)
+        self.cache = {}
+
+    @property
+    def __name__(self):
+        return self.name
+
+    def __repr__(self):
+        return f"<ClassInfo {self.module.name}.{self.name}>"
+
+    def memo(self, key, compute):
+        if key not in self.cache:
+            self.cache[key] = compute()
+        return self.cache[key]
+
+    @property
+    def app_label(self):
+        return self.project.app_label(self.module.name)
+
+    def bases(self):
+        """The resolvable direct bases: project classes and django classes"""
+        def compute():
+            scope = Scope(self.module, None, self.node.lineno)
+            resolved = []
+            for base in self.node.bases:
+                target = self.project.resolve(base, scope)
+                if isinstance(target, External):
+                    target = target.load()
+                if isinstance(target, ClassInfo) or isinstance(target, type):
+                    resolved.append(target)
+            return resolved
+        return self.memo('bases', compute)
+
+    def mro(self):
+        return self.memo('mro', lambda: linearize(self, self.bases()))
+
+    def meta_option(self, option):
+        for stmt in self.node.body:
+            if isinstance(stmt, ast.ClassDef) and stmt.name == 'Meta':
+                for item in stmt.body:
+                    if isinstance(item, ast.Assign) and any(
+                        isinstance(target, ast.Name) and target.id == option for target in item.targets
+                    ):
+                        return literal(item.value)
+        return None
+
+    def is_model(self):
+        return self.memo('is_model', lambda: any(is_model_class(base) for base in self.bases()))
+
+    def is_abstract(self):
+        return self.meta_option('abstract') is True
+
+    def is_proxy(self):
+        return self.meta_option('proxy') is True
+
+    def is_choices(self):
+        def compute():
+            return any(
+                base.is_choices() if isinstance(base, ClassInfo) else issubclass(base, models.Choices)
+                for base in self.bases()
+            )
+        return self.memo('is_choices', compute)
+
+    def field_class(self):
+        """The django field class a custom field class derives from, or None"""
+        def compute():
+            for base in self.bases():
+                if isinstance(base, ClassInfo):
+                    field_class = base.field_class()
+                    if field_class is not None:
+                        return field_class
+                elif issubclass(base, models.Field):
+                    return base
+            return None
+        return self.memo('field_class', compute)
+
+    def attribute(self, name):
+        """A class attribute, as in `Shop.Status`"""
+        for cls in self.mro():
+            if not isinstance(cls, ClassInfo):
+                return None
+            binding = find_binding(cls.bindings, name, END_OF_MODULE)
+            if binding is not None:
+                return self.project.evaluate_binding(name, binding, Scope(cls.module, cls, binding[0]))
+        return None
+
+    # -------------------------
+    # Choices
+    # -------------------------
+
+    def choices(self):
+        """(value, label) pairs of a models.Choices class, None when a member cannot be evaluated"""
+        def compute():
+            choices = []
+            for stmt in self.node.body:
+                if not isinstance(stmt, ast.Assign) or len(stmt.targets) != 1:
+                    continue
+                target = stmt.targets[0]
+                if not isinstance(target, ast.Name) or target.id == 'do_not_call_in_templates':
+                    continue
+                if target.id == '__empty__':
+                    choices.insert(0, (None, literal(stmt.value, '')))
+                    continue
+                if target.id.startswith('_'):
+                    continue
+                value = stmt.value
+                label = target.id.replace('_', ' ').title()
+                if isinstance(value, ast.Tuple) and len(value.elts) > 1 and (
+                    isinstance(value.elts[-1], ast.Call)
+                    or (isinstance(value.elts[-1], ast.Constant) and isinstance(value.elts[-1].value, str))
+                ):
+                    parts = [literal(elt, ValueError) for elt in value.elts[:-1]]
+                    if ValueError in parts:
+                        return None
+                    choices.append((parts[0] if len(parts) == 1 else tuple(parts), label))
+                    continue
+                evaluated = literal(value, ValueError)
+                if evaluated is ValueError:
+                    return None
+                choices.append((evaluated, label))
+            return choices
+        return self.memo('choices', compute)
+
+    # -------------------------
+    # Fields
+    # -------------------------
+
+    def declared_fields(self):
+        """The fields assigned in the class body, in source order"""
+        return self.memo('declared_fields', self._declared_fields)
+
+    def _declared_fields(self):
+        fields = []
+        for stmt in self.node.body:
+            if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 and isinstance(stmt.targets[0], ast.Name):
+                name, value = stmt.targets[0].id, stmt.value
+            elif isinstance(stmt, ast.AnnAssign) and isinstance(stmt.target, ast.Name) and stmt.value is not None:
+                name, value = stmt.target.id, stmt.value
+            else:
+                continue
+            if not isinstance(value, ast.Call):
+                continue
+
+            scope = Scope(self.module, self, stmt.lineno)
+            field_class = self.project.resolve_field_class(value.func, scope)
+            if field_class is None:
+                continue
+            order = (self.module.index, stmt.lineno, stmt.col_offset)
+            fields.append(self.project.build_field(name, field_class, value, scope, order))
+        return fields
+
+    def local_fields(self):
+        """
+        The fields django stores on this model itself: declared ones plus those copied from abstract
+        bases, auto-created ones (id, parent links) first, many-to-many fields last
+        """
+        return self.memo('local_fields', self._local_fields)
+
+    def _local_fields(self):
+        fields = {field.name: field for field in self.declared_fields()}
+        for base in self.mro()[1:]:
+            if base not in self.bases() or not is_model_class(base) or not is_abstract_model(base):
+                continue
+            for field in get_local_fields(base):
+                fields.setdefault(field.name, field)
+
+        auto_fields = []
+        if not self.is_abstract():
+            for parent in self.concrete_parents():
+                if not any(f.parent_link and f.target is parent for f in fields.values()):
+                    link = StaticField(f"{class_name(parent).lower()}_ptr", ONE_TO_ONE, (-1,), auto_created=True)
+                    link.target, link.cascade, link.parent_link = parent, True, True
+                    auto_fields.append(link)
+            if not self.concrete_parents() and not any(f.primary_key for f in fields.values()):
+                auto_fields.append(
+                    StaticField('id', PLAIN_FIELD, (-1,), make_plain_field(models.AutoField, 'id'), auto_created=True)
+                )
+
+        ordered = sorted(fields.values(), key=lambda field: field.order)
+        return (
+            auto_fields
+            + [field for field in ordered if field.kind != MANY_TO_MANY]
+            + [field for field in ordered if field.kind == MANY_TO_MANY]
+        )
+
+    def concrete_parents(self):
+        """Direct bases that are concrete models, i.e. multi-table inheritance parents"""
+        return [base for base in self.bases() if is_model_class(base) and not is_abstract_model(base)]
+
+    def forward_fields(self):
+        """The forward fields of _meta.get_fields(): the parents' fields first, then the local ones"""
+        def compute():
+            if self.is_proxy():
+                parents = self.concrete_parents()
+                return get_forward_fields(parents[0]) if parents else []
+            fields = []
+            for parent in self.concrete_parents():
+                fields.extend(get_forward_fields(parent))
+            return fields + self.local_fields()
+        return self.memo('forward_fields', compute)
+
+    def field_names(self):
+        """Names of _meta.get_fields() of this model, forward and reverse relations"""
+        def compute():
+            names = {field.name for field in self.forward_fields()}
+            if not self.is_abstract():
+                for cls in [self] + [parent for parent in self.mro()[1:] if isinstance(parent, ClassInfo)]:
+                    names.update(self.project.reverse_names(cls))
+            return names
+        return self.memo('field_names', compute)
+
+    def inherited_field_names(self):
+        """Names of the fields of the model bases, see process_inheritance_relationships"""
+        names = set()
+        for base in self.bases():
+            if not is_model_class(base) or base is models.Model:
+                continue
+            if isinstance(base, ClassInfo):
+                names.update(base.field_names())
+            else:
+                names.update(get_framework_field_names(base))
+        return names
+
+    # -------------------------
+    # Methods
+    # -------------------------
+
+    def functions(self):
+        """The function definitions of the class body that stay plain functions on the class"""
+        return [
+            stmt for stmt in self.node.body
+            if isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef))
+            and not any(decorator_name(d) in DESCRIPTOR_DECORATORS for d in stmt.decorator_list)
+        ]
+
+    def custom_methods(self):
+        """Static counterpart of helper.get_custom_methods"""
+        methods, seen = set(), set()
+        for cls in self.mro():
+            if isinstance(cls, ClassInfo):
+                for name, candidates in cls.bindings.items():
+                    if name in seen:
+                        continue
+                    seen.add(name)
+                    stmt = candidates[-1][1]
+                    if (
+                        isinstance(stmt, (ast.FunctionDef, ast.AsyncFunctionDef))
+                        and stmt in cls.functions()
+                        and not name.startswith('_')
+                        and name not in STANDARD_MODEL_ATTRIBUTES
+                        and name not in DJANGO_GENERATED_METHODS
+                        and takes_only_self(stmt)
+                    ):
+                        methods.add(name)
+            elif cls is not object:
+                framework_methods, attributes = get_framework_custom_methods(cls)
+                methods.update(framework_methods - seen)
+                seen.update(attributes)
+        return sorted(methods)
+
+    def method_sources(self):
+        """Static counterpart of helper.get_model_all_methods"""
+        sources = {}
+        for cls in reversed(self.mro()):
+            if isinstance(cls, ClassInfo):
+                for name in cls.bindings:
+                    sources.pop(name, None)
+                sources.update({stmt.name: cls.module.segment(stmt) for stmt in cls.functions()})
+            elif cls is not object:
+                sources.update(get_framework_method_sources(cls))
+        return dict(sorted(sources.items()))
+
+
+def takes_only_self(node):
+    args = node.args
+    params = [arg.arg for arg in args.posonlyargs + args.args]
+    return params == ['self'] and not args.vararg and not args.kwarg and not args.kwonlyargs
+
+
+def get_local_fields(cls):
+    if isinstance(cls, ClassInfo):
+        return cls.local_fields()
+    return get_framework_fields(cls, local=True)
+
+
+def get_forward_fields(cls):
+    if isinstance(cls, ClassInfo):
+        return cls.forward_fields()
+    return get_framework_fields(cls, local=False)
+
+
+@lru_cache(maxsize=256)
+def get_framework_fields(cls, local):
+    """The fields of a django model class, as StaticFields ordered before every project field"""
+    meta = getattr(cls, '_meta', None)
+    if meta is None:
+        return ()
+    if local:
+        django_fields = list(meta.local_fields) + list(meta.local_many_to_many)
+    else:
+        django_fields = [f for f in meta.get_fields() if not f.auto_created or f.concrete]
+    fields = []
+    for django_field in django_fields:
+        kind = get_field_kind(type(django_field))
+        order = (-2, django_field.creation_counter, 0)
+        static_field = StaticField(django_field.name, kind, order, django_field if kind == PLAIN_FIELD else None)
+        if kind != PLAIN_FIELD:
+            static_field.null = bool(django_field.null)
+            remote_field = getattr(django_field, 'remote_field', None)
+            static_field.target = getattr(remote_field, 'model', None)
+            static_field.cascade = getattr(remote_field, 'on_delete', None) is models.CASCADE
+        static_field.primary_key = bool(getattr(django_field, 'primary_key', False))
+        fields.append(static_field)
+    return tuple(fields)
+
+
+@lru_cache(maxsize=256)
+def get_framework_field_names(cls):
+    try:
+        return frozenset(field.name for field in cls._meta.get_fields())
+    except Exception:
+        return frozenset(field.name for field in get_framework_fields(cls, local=True))
+
+
+class StaticProject:
+    """The python sources under `base_dir`, parsed on demand and never imported"""
+
+    def __init__(self, base_dir, auth_user_model=DEFAULT_AUTH_USER_MODEL):
+        self.base_dir = Path(base_dir)
+        self.auth_user_model = auth_user_model
+        self.modules = {}
+        self.classes = {}
+        self.app_models = {}
+        self.reverse_name_index = None
+
+    # -------------------------
+    # Modules and names
+    # -------------------------
+
+    def module_path(self, name):
+        if not name:
+            return None
+        path = self.base_dir.joinpath(*name.split('.'))
+        for candidate in (path.with_suffix('.py'), path / '__init__.py'):
+            if candidate.is_file():
+                return candidate
+        return None
+
+    def get_module(self, name):
+        if name not in self.modules:
+            path = self.module_path(name)
+            self.modules[name] = ModuleInfo(self, name, path, len(self.modules)) if path else None
+        return self.modules[name]
+
+    def module_or_external(self, name):
+        return self.get_module(name) or External(name)
+
+    def class_info(self, module, node):
+        key = (module.name, node.lineno, node.col_offset)
+        if key not in self.classes:
+            self.classes[key] = ClassInfo(self, module, node)
+        return self.classes[key]
+
+    def app_label(self, module_name):
+        """The label of the app a module belongs to, e.g. shop for shop.models.product"""
+        parts = module_name.split('.')
+        if 'models' in parts[1:]:
+            parts = parts[:parts.index('models', 1)]
+        else:
+            parts = parts[:1]
+        return parts[-1]
+
+    def resolve(self, node, scope, depth=0):
+        """Resolve an expression to a ClassInfo, ModuleInfo, External, Value or None"""
+        if depth > MAX_RESOLVE_DEPTH:
+            return None
+        if isinstance(node, ast.Name):
+            return self.resolve_name(node.id, scope, depth + 1)
+        if isinstance(node, ast.Attribute):
+            base = self.resolve(node.value, scope, depth + 1)
+            if isinstance(base, External):
+                return base.child(node.attr)
+            if isinstance(base, ModuleInfo):
+                return (
+                    self.resolve_name(node.attr, Scope(base), depth + 1)
+                    or self.get_module(f"{base.name}.{node.attr}")
+                )
+            if isinstance(base, ClassInfo):
+                return base.attribute(node.attr)
+            return None
+        if isinstance(node, ast.Call):
+            func = self.resolve(node.func, scope, depth + 1)
+            if isinstance(func, External) and func.path == GET_USER_MODEL:
+                return External(AUTH_USER_MODEL_SETTING)
+        return Value(node, scope)
+
+    def resolve_name(self, name, scope, depth=0):
+        if scope.cls is not None:
+            binding = find_binding(scope.cls.bindings, name, scope.lineno)
+            if binding is not None:
+                return self.evaluate_binding(name, binding, Scope(scope.module, scope.cls, binding[0]), depth)
+
+        binding = find_binding(scope.module.bindings, name, scope.lineno)
+        if binding is not None:
+            return self.evaluate_binding(name, binding, Scope(scope.module, None, binding[0]), depth)
+
+        for stmt in scope.module.star_imports:
+            module = self.get_module(scope.module.absolute_module(stmt))
+            if module is not None and module is not scope.module and not name.startswith('_'):
+                resolved = self.resolve_name(name, Scope(module), depth + 1)
+                if resolved is not None:
+                    return resolved
+        return None
+
+    def evaluate_binding(self, name, binding, scope, depth=0):
+        lineno, stmt = binding
+        if isinstance(stmt, ast.ClassDef):
+            return self.class_info(scope.module, stmt)
+        if isinstance(stmt, (ast.Assign, ast.AnnAssign)):
+            if isinstance(stmt.value, (ast.Name, ast.Attribute)):
+                return self.resolve(stmt.value, scope, depth + 1)
+            return Value(stmt.value, scope)
+        if isinstance(stmt, ast.Import):
+            for alias in stmt.names:
+                if alias.asname == name:
+                    return self.module_or_external(alias.name)
+                if alias.asname is None and alias.name.split('.')[0] == name:
+                    return self.module_or_external(name)
+        if isinstance(stmt, ast.ImportFrom):
+            module_name = scope.module.absolute_module(stmt)
+            for alias in stmt.names:
+                if (alias.asname or alias.name) != name:
+                    continue
+                module = self.get_module(module_name)
+                if module is None:
+                    return External(f"{module_name}.{alias.name}")
+                if module is scope.module:
+                    return None
+                return (
+                    self.resolve_name(alias.name, Scope(module), depth + 1)
+                    or self.get_module(f"{module_name}.{alias.name}")
+                )
+        return None
+
+    def resolve_field_class(self, node, scope):
+        """The django field class a call like models.CharField(...) instantiates, or None"""
+        target = self.resolve(node, scope)
+        if isinstance(target, External):
+            target = target.load()
+        if isinstance(target, ClassInfo):
+            return target.field_class()
+        if isinstance(target, type) and issubclass(target, models.Field):
+            return target
+        # GenericForeignKey and friends are no Field subclasses in every django version
+        if isinstance(target, type) and get_field_kind(target) == OTHER_RELATION:
+            return target
+        return None
+
+    def evaluate_choices(self, node, scope):
+        """The python value of a choices= argument, None when it cannot be known without running code"""
+        if isinstance(node, ast.Attribute) and node.attr == 'choices':
+            target = self.resolve(node.value, scope)
+            return target.choices() if isinstance(target, ClassInfo) and target.is_choices() else None
+
+        target = self.resolve(node, scope)
+        if isinstance(target, ClassInfo):
+            return target.choices() if target.is_choices() else None
+        if isinstance(target, Value):
+            return literal(target.node)
+        return None
+
+    def build_field(self, name, field_class, call, scope, order):
+        kwargs = {keyword.arg: keyword.value for keyword in call.keywords if keyword.arg}
+        kind = get_field_kind(field_class)
+
+        if kind == PLAIN_FIELD:
+            choices = self.evaluate_choices(kwargs['choices'], scope) if 'choices' in kwargs else None
+            field = StaticField(name, kind, order, make_plain_field(field_class, name, choices))
+        else:
+            field = StaticField(name, kind, order)
+            target = kwargs.get('to', call.args[0] if call.args else None)
+            field.target = Value(target, scope) if target is not None else None
+            on_delete = kwargs.get('on_delete', call.args[1] if len(call.args) > 1 else None)
+            if on_delete is not None:
+                resolved = self.resolve(on_delete, scope)
+                field.cascade = isinstance(resolved, External) and resolved.load() is models.CASCADE
+            field.related_name = literal(kwargs.get('related_name'))
+            field.related_query_name = literal(kwargs.get('related_query_name'))
+            field.parent_link = literal(kwargs.get('parent_link'), False) is True
+
+        field.null = literal(kwargs.get('null'), False) is True
+        field.primary_key = literal(kwargs.get('primary_key'), False) is True
+        return field
+
+    # -------------------------
+    # Models
+    # -------------------------
+
+    def load_app(self, app_module):
+        """
+        Register the concrete models of an app in the order django would register them: the order in
+        which the class statements run when `<app>.models` is imported
+        """
+        registered, visited = [], set()
+
+        def visit(module):
+            if module is None or module.name in visited:
+                return
+            visited.add(module.name)
+            for stmt in iter_statements(module.tree.body):
+                if isinstance(stmt, (ast.Import, ast.ImportFrom)):
+                    for name in imported_modules(module, stmt):
+                        if name == app_module or name.startswith(f"{app_module}."):
+                            visit(self.get_module(name))
+                elif isinstance(stmt, ast.ClassDef):
+                    cls = self.class_info(module, stmt)
+                    if cls.is_model() and not cls.is_abstract():
+                        registered.append(cls)
+
+        visit(self.get_module(f"{app_module}.models"))
+        self.app_models[self.app_label(f"{app_module}.models")] = registered
+        self.reverse_name_index = None
+        return registered
+
+    def find_model(self, app_label, name):
+        for model in self.app_models.get(app_label, []):
+            if model.name == name:
+                return model
+        return None
+
+    def resolve_model_reference(self, reference, model):
+        """Resolve the target of a relation declared on (or inherited by) `model`"""
+        if isinstance(reference, Value):
+            if isinstance(reference.node, ast.Constant) and isinstance(reference.node.value, str):
+                reference = reference.node.value
+            else:
+                resolved = self.resolve(reference.node, reference.scope)
+                if isinstance(resolved, External):
+                    if resolved.path == AUTH_USER_MODEL_SETTING:
+                        return self.resolve_model_reference(self.auth_user_model, model)
+                    resolved = resolved.load()
+                return resolved if isinstance(resolved, ClassInfo) or isinstance(resolved, type) else None
+
+        if isinstance(reference, str):
+            if reference == 'self':
+                return model
+            app_label, _, name = reference.rpartition('.')
+            return self.find_model(app_label or model.app_label, name)
+        return reference
+
+    def reverse_names(self, model):
+        """Names of the reverse relations django adds to `model` from the registered models"""
+        if self.reverse_name_index is None:
+            index = {}
+            for models_of_app in self.app_models.values():
+                for source in models_of_app:
+                    if source.is_proxy():
+                        continue
+                    for field in source.local_fields():
+                        if not field.is_relation or field.target is None:
+                            continue
+                        target = self.resolve_model_reference(field.target, source)
+                        if isinstance(target, ClassInfo):
+                            if field.related_name and field.related_name.endswith('+'):
+                                continue
+                            index.setdefault(target, set()).add(field.reverse_name or source.name.lower())
+            self.reverse_name_index = index
+        return self.reverse_name_index.get(model, set())
+
+
+def iter_statements(body):
+    """Statements that run on import, descending into if/try blocks"""
+    for stmt in body:
+        if isinstance(stmt, ast.If):
+            yield from iter_statements(stmt.body + stmt.orelse)
+        elif isinstance(stmt, ast.Try):
+            handlers = [s for handler in stmt.handlers for s in handler.body]
+            yield from iter_statements(stmt.body + handlers + stmt.orelse + stmt.finalbody)
+        else:
+            yield stmt
+
+
+def imported_modules(module, stmt):
+    if isinstance(stmt, ast.Import):
+        return [alias.name for alias in stmt.names]
+    base = module.absolute_module(stmt)
+    return [base] + [f"{base}.{alias.name}" for alias in stmt.names if alias.name != '*']
+
+
+def setting_value(node, name, value):
+    """
+    The value of a setting expression made of literals, the setting itself and + between them,
+    None when it is something else
+    """
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+        left, right = setting_value(node.left, name, value), setting_value(node.right, name, value)
+        try:
+            return None if left is None or right is None else left + right
+        except TypeError:
+            return None
+    if isinstance(node, ast.Name) and node.id == name:
+        return value
+    return literal(node)
+
+
+def read_setting(settings_path, name, default):
+    """
+    A setting as assigned in settings.py, without importing it. Literal assignments are read and
+    so are the additions generated settings make, like INSTALLED_APPS += ['shop'].
+    """
+    try:
+        tree = ast.parse(Path(settings_path).read_text(encoding='utf-8', errors='replace'))
+    except SyntaxError:
+        return default
+    value = default
+    for stmt in iter_statements(tree.body):
+        expression = None
+        if isinstance(stmt, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == name for target in stmt.targets
+        ):
+            expression = stmt.value
+        elif isinstance(stmt, ast.AugAssign) and isinstance(stmt.target, ast.Name) and stmt.target.id == name:
+            expression = ast.BinOp(left=ast.Name(id=name), op=stmt.op, right=stmt.value)
+        if expression is not None:
+            result = setting_value(expression, name, value)
+            value = value if result is None else result
+    return value
+
+
+def read_auth_user_model(settings_path):
+    return read_setting(settings_path, 'AUTH_USER_MODEL', DEFAULT_AUTH_USER_MODEL)
+
+
+def read_project_apps(settings_path):
+    """
+    The modules of the installed apps of the project itself, in INSTALLED_APPS order: Django's own
+    apps and apps installed as packages are left out, as they are by get_project_app_configs. An
+    AppConfig path like shop.apps.ShopConfig stands for the shop module.
+    """
+    base_dir = Path(settings_path).parent.parent
+    app_modules = []
+    for app in read_setting(settings_path, 'INSTALLED_APPS', []):
+        # configure_django_settings drops a bare admin app, it clashes with django.contrib.admin
+        if not isinstance(app, str) or app.startswith('django.') or app == 'admin':
+            continue
+        if '.apps.' in app:
+            app = app[:app.index('.apps.')]
+        path = base_dir.joinpath(*app.split('.'))
+        if not (path.is_dir() or path.with_suffix('.py').is_file()):
+            continue
+        if app not in app_modules:
+            app_modules.append(app)
+    return app_modules
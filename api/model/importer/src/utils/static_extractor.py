@@ -0,0 +1,171 @@
+import os
+import sys
+from pathlib import Path
+
+from .diagram_builder import initialize_app_data, initialize_diagram_data, has_edge, has_node, merge_app_data
+from .diagram_serializer import build_diagram, serialize_diagram
+from .helper import is_enum_field, initialize_model_ptr_map, verify_data_integrity
+from .node_handler import create_attribute, create_class_node, process_enum_field_node
+from .relationship_handler import (
+    add_method_dependency_edges,
+    append_relationship_edge,
+    classify_relationship,
+    create_edge,
+    foreign_key_multiplicity,
+    get_model_name_map,
+    many_to_many_multiplicity,
+    one_to_one_multiplicity,
+    process_enum_field,
+)
+from .static_analysis import (
+    FOREIGN_KEY,
+    MANY_TO_MANY,
+    ONE_TO_ONE,
+    StaticProject,
+    class_name,
+    get_mro,
+    is_model_class,
+    read_auth_user_model,
+    read_project_apps,
+)
+
+# Static counterpart of extract_prototype_main.py: builds the same diagram from the sources of the
+# uploaded project without django.setup(), so the project is never imported and its dependencies
+# do not need to be installed.
+
+APP_NAME = 'shared_models'
+
+# analysis_mode of the importer API: import the project and let django describe its models,
+# or read them from the sources only
+ANALYSIS_DJANGO = "django"
+ANALYSIS_STATIC = "static"
+
+
+def load_static_project(extract_path):
+    """Locate settings.py the way configure_django_settings does and index the project around it"""
+    settings_files = list(Path(extract_path).glob('**/settings.py'))
+    if not settings_files:
+        sys.exit("No Django settings.py file found in the extracted directory. Verify the integrity of your Django project or try to import another file/folder")
+
+    if os.stat(settings_files[0]).st_size == 0:
+        sys.exit("Django settings.py is empty. Verify the integrity of your Django project or try to import another file/folder")
+
+    project = StaticProject(settings_files[0].parent.parent, read_auth_user_model(settings_files[0]))
+    return project, settings_files[0]
+
+
+def collect_static_models(app_models):
+    """Static counterpart of collect_all_valid_models"""
+    models_set = set(app_models)
+    for model in app_models:
+        for parent in model.bases():
+            name = class_name(parent)
+            if is_model_class(parent) and not name.startswith(('django.', 'Abstract')) and name != 'Model':
+                models_set.add(parent)
+    return models_set
+
+
+def process_static_model(project, model, data, app_models, is_show_method_dependency):
+    """Static counterpart of process_model"""
+    try:
+        cls_ptr = data['model_ptr_map'][model]
+
+        if not has_node(data['nodes'], cls_ptr):
+            attributes = []
+            for field in model.forward_fields():
+                if field.is_relation:
+                    continue
+                enum_ref = None
+                if is_enum_field(field.field):
+                    enum_node, enum_ref = process_enum_field_node(field.field, data['enum_ptr_map'])
+                    if enum_node:
+                        data['nodes'].append(enum_node)
+                attributes.append(create_attribute(field.field, enum_ref))
+
+            data['nodes'].append(create_class_node(model.name, cls_ptr, attributes, model.custom_methods()))
+
+        if is_show_method_dependency:
+            add_method_dependency_edges(
+                model, model.method_sources(), get_model_name_map(tuple(app_models)), data, cls_ptr
+            )
+
+        process_static_relationships(project, model, data, cls_ptr)
+
+    except Exception as e:
+        sys.exit(f"Error processing model: {model.name}, error: {str(e)}")
+
+
+def process_static_relationships(project, model, data, source_ptr):
+    """Static counterpart of process_model_relationships"""
+    model_ptr_map, edges = data['model_ptr_map'], data['edges']
+
+    for parent in model.bases():
+        if parent is object or class_name(parent).startswith('django.') or class_name(parent) == 'Model':
+            continue
+        target_ptr = model_ptr_map.get(parent)
+        if target_ptr:
+            edges.append(create_edge("generalization", "inherits", {"source": "1", "target": "1"},
+                                     source_ptr, target_ptr))
+
+    inherited_fields = model.inherited_field_names()
+    for field in model.forward_fields():
+        if field.name in inherited_fields:
+            continue
+
+        if not field.is_relation:
+            if is_enum_field(field.field):
+                process_enum_field(field.field, data['enum_ptr_map'], edges, source_ptr)
+            continue
+
+        target = project.resolve_model_reference(field.target, model)
+        target_ptr = model_ptr_map.get(target)
+        if not target_ptr or has_edge(edges, source_ptr, target_ptr, 'calls'):
+            continue
+
+        if field.kind == MANY_TO_MANY:
+            edges.append(create_edge("association", "connect", many_to_many_multiplicity(field.null),
+                                     source_ptr, target_ptr))
+        elif field.kind in (ONE_TO_ONE, FOREIGN_KEY):
+            if target in get_mro(model):
+                continue
+            multiplicity = one_to_one_multiplicity(field.null) if field.kind == ONE_TO_ONE \
+                else foreign_key_multiplicity(field.null)
+            append_relationship_edge(edges, classify_relationship(field.cascade, field.null), multiplicity,
+                                     source_ptr, target_ptr)
+
+
+def generate_static_diagram_json(extract_path, project_id, system_id, show_method_dependencies, all_apps=False):
+    """
+    Main function to generate the diagram JSON from the sources of the project at `extract_path`,
+    of the shared_models app or of every project app listed in INSTALLED_APPS
+    """
+    data = initialize_diagram_data(project_id, system_id)
+    project, settings_path = load_static_project(extract_path)
+
+    app_modules = read_project_apps(settings_path) if all_apps else [APP_NAME]
+    apps_models = [project.load_app(app_module) for app_module in app_modules]
+    data['model_ptr_map'] = initialize_model_ptr_map(
+        set().union(*(collect_static_models(app_models) for app_models in apps_models))
+    )
+
+    # Apps are extracted separately and merged in order, as the django extractor does
+    for app_models in apps_models:
+        app_data = initialize_app_data(data['model_ptr_map'])
+        for model in app_models:
+            process_static_model(project, model, app_data, app_models, show_method_dependencies)
+        merge_app_data(data, app_data)
+
+    verify_data_integrity(data)
+    return serialize_diagram(
+        build_diagram(data['diagram_id'], data['project_id'], data['system_id'], data['nodes'], data['edges'])
+    )
+
+
+def run_static_extraction(extract_path, project_id, system_id, method_dependencies, all_apps=False):
+    """Run the static extraction in this process, returns (success, output) like run_cold_extraction"""
+    try:
+        return True, generate_static_diagram_json(extract_path, project_id, system_id, method_dependencies, all_apps)
+    except SystemExit as e:
+        return False, str(e.code)
+    except Exception as e:
+        return False, f"Error extracting diagram: {str(e)}"
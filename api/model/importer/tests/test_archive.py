@@ -0,0 +1,152 @@
+import io
+import zipfile
+import pytest
+from pathlib import Path
+from api.model.importer.src.utils.archive import (
+    EXTRACT_SELECTIVE,
+    ArchiveLimitError,
+    copy_stream,
+    extract_zip_streaming,
+    safe_member_path,
+    select_project_members,
+)
+from api.model.importer.src.extraction_pool import run_cold_extraction
+
+ZIP_DIR = Path(__file__).parent / "zips"
+
+
+# -------------------------
+# Fixtures
+# -------------------------
+
+class RecordingReader(io.BytesIO):
+    """BytesIO that records how many bytes every read asked for"""
+    def __init__(self, data):
+        super().__init__(data)
+        self.requested = []
+
+    def read(self, size=-1):
+        self.requested.append(size)
+        return super().read(size)
+
+
+@pytest.fixture
+def make_zip(tmp_path):
+    """Build a zip file from a {name: content} mapping"""
+    def _make_zip(members):
+        zip_path = tmp_path / "upload.zip"
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zip_ref:
+            for name, content in members.items():
+                zip_ref.writestr(name, content)
+        return zip_path
+    return _make_zip
+
+
+# -------------------------
+# Tests
+# -------------------------
+
+@pytest.mark.parametrize("name, expected", [
+    ("shop/settings.py", Path("shop/settings.py")),
+    ("../test_prototype/shop/models.py", Path("test_prototype/shop/models.py")),
+    ("/etc/passwd", Path("etc/passwd")),
+    ("a/./b/../c.py", Path("a/b/c.py")),
+    ("..\\windows\\path.py", Path("windows/path.py")),
+    ("../", None),
+])
+def test_safe_member_path(name, expected):
+    assert safe_member_path(name) == expected
+
+
+def test_extract_matches_extractall(tmp_path):
+    """Streaming extraction yields the same tree as ZipFile.extractall"""
+    streamed, reference = tmp_path / "streamed", tmp_path / "reference"
+    zip_path = ZIP_DIR / "test_prototype.zip"
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        zip_ref.extractall(reference)
+
+    written, skipped = extract_zip_streaming(zip_path, streamed)
+
+    files = sorted(p.relative_to(reference) for p in reference.rglob('*') if p.is_file())
+    assert files == sorted(p.relative_to(streamed) for p in streamed.rglob('*') if p.is_file())
+    assert all((streamed / f).read_bytes() == (reference / f).read_bytes() for f in files)
+    assert written == sum((reference / f).stat().st_size for f in files)
+    assert skipped == 0
+
+
+def test_extract_rejects_too_many_members(make_zip, tmp_path):
+    zip_path = make_zip({f"file_{i}.py": "" for i in range(5)})
+
+    with pytest.raises(ArchiveLimitError, match="more than 4 files"):
+        extract_zip_streaming(zip_path, tmp_path / "out", max_members=4)
+
+
+def test_extract_rejects_too_large_archive(make_zip, tmp_path):
+    zip_path = make_zip({"big.py": "x" * 1000})
+
+    with pytest.raises(ArchiveLimitError):
+        extract_zip_streaming(zip_path, tmp_path / "out", max_total_size=999)
+
+
+def test_copy_stream_uses_bounded_chunks():
+    """Reads never request more than chunk_size bytes and stop at the budget"""
+    source = RecordingReader(b"x" * 10)
+    dest = io.BytesIO()
+
+    assert copy_stream(source, dest, budget=10, chunk_size=3) == 10
+    assert dest.getvalue() == b"x" * 10
+    assert max(source.requested) == 3
+
+    with pytest.raises(ArchiveLimitError):
+        copy_stream(RecordingReader(b"x" * 10), io.BytesIO(), budget=9, chunk_size=3)
+
+
+def test_select_project_members(make_zip):
+    """Only python sources next to the project package are selected"""
+    zip_path = make_zip({
+        "repo/node_modules/pkg/settings.py": "",
+        "repo/site/shop/settings.py": "X = 1",
+        "repo/site/shop/__init__.py": "",
+        "repo/site/shared_models/models.py": "",
+        "repo/site/shared_models/templates/index.html": "<html>",
+        "repo/site/shared_models/static/app.py": "",
+        "repo/site/media/photo.jpg": "jpg",
+        "repo/site/db.sqlite3": "db",
+        "repo/site/manage.py": "",
+        "repo/README.md": "readme",
+    })
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        selected = sorted(member.filename for member in select_project_members(zip_ref.infolist()))
+
+    assert selected == [
+        "repo/site/manage.py",
+        "repo/site/shared_models/models.py",
+        "repo/site/shop/__init__.py",
+        "repo/site/shop/settings.py",
+    ]
+
+
+def test_select_project_members_without_settings(make_zip):
+    zip_path = make_zip({"lib/module.py": ""})
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        assert select_project_members(zip_ref.infolist()) is None
+
+
+def test_selective_extraction_falls_back_to_full(make_zip, tmp_path):
+    """Archives without a Django project are extracted completely"""
+    zip_path = make_zip({"lib/module.py": "", "lib/data.json": "{}"})
+
+    written, skipped = extract_zip_streaming(zip_path, tmp_path / "out", mode=EXTRACT_SELECTIVE)
+
+    assert (written, skipped) == (2, 0)
+    assert (tmp_path / "out" / "lib" / "data.json").exists()
+
+
+def test_selective_extraction_still_extracts_models(tmp_path):
+    """The selectively extracted prototype is enough for the model extractor"""
+    written, skipped = extract_zip_streaming(ZIP_DIR / "test_prototype.zip", tmp_path, mode=EXTRACT_SELECTIVE)
+
+    assert skipped > 0
+    assert not list(tmp_path.rglob('*.html'))
+    success, output = run_cold_extraction(str(tmp_path), "pid", "sid", False)
+    assert success, output
@@ -0,0 +1,80 @@
+import os
+import json
+import pytest
+from api.model.importer.src.utils.cache import (
+    UPLOAD_INFO_FILE,
+    DiagramCache,
+    read_upload_info,
+    restamp_diagram,
+    write_upload_info,
+)
+
+
+# -------------------------
+# Fixtures
+# -------------------------
+
+@pytest.fixture
+def cache(tmp_path):
+    return DiagramCache(tmp_path / "cache", max_bytes=100)
+
+
+def age(path, seconds):
+    """Move the last-access time of a cache entry into the past"""
+    stat = path.stat()
+    os.utime(path, (stat.st_atime - seconds, stat.st_mtime - seconds))
+
+
+# -------------------------
+# Tests
+# -------------------------
+
+def test_cache_round_trip(cache):
+    assert cache.get("abc", False) is None
+
+    cache.put("abc", False, '{"nodes": []}')
+
+    assert cache.get("abc", False) == '{"nodes": []}'
+    assert cache.get("abc", True) is None
+
+
+def test_cache_evicts_least_recently_used(cache):
+    """Entries are dropped oldest-access first once the cache exceeds its byte budget"""
+    cache.put("first", False, "x" * 40)
+    cache.put("second", False, "x" * 40)
+    age(cache.path("first", False), 20)
+    age(cache.path("second", False), 10)
+    cache.get("first", False)
+
+    cache.put("third", False, "x" * 40)
+
+    assert cache.get("first", False) is not None
+    assert cache.get("second", False) is None
+    assert cache.get("third", False) is not None
+
+
+def test_restamp_diagram():
+    """A cached diagram is pointed at the project and system of the new request"""
+    cached = json.dumps({"project": "old-pid", "system": "old-sid", "nodes": [{"id": 1}]})
+
+    diagram = json.loads(restamp_diagram(cached, "pid", "sid"))
+
+    assert (diagram['project'], diagram['system']) == ("pid", "sid")
+    assert diagram['nodes'] == [{"id": 1}]
+
+
+def test_upload_info_round_trip(tmp_path):
+    assert read_upload_info(tmp_path) is None
+
+    write_upload_info(tmp_path, "abc", skipped_bytes=12)
+
+    assert read_upload_info(tmp_path) == {"hash": "abc", "skipped_bytes": 12}
+
+
+def test_reading_upload_info_marks_it_used(tmp_path):
+    write_upload_info(tmp_path, "abc", size=34)
+    info_path = tmp_path / UPLOAD_INFO_FILE
+    os.utime(info_path, (1, 1))
+
+    assert read_upload_info(tmp_path) == {"hash": "abc", "skipped_bytes": 0, "bytes": 34}
+    assert info_path.stat().st_mtime > 1
@@ -0,0 +1,72 @@
+from api.model.importer.src.utils.diagram_builder import (
+    EdgeList,
+    NodeList,
+    get_node_ids,
+    has_edge,
+    has_node,
+    initialize_app_data,
+    merge_app_data,
+)
+
+
+def make_edge(source_ptr, target_ptr, label):
+    return {"rel": {"label": label}, "source_ptr": source_ptr, "target_ptr": target_ptr}
+
+
+# -------------------------
+# Tests
+# -------------------------
+
+def test_node_list_indexes_ids():
+    nodes = NodeList([{"id": "a"}])
+    nodes.append({"id": "b"})
+    nodes.extend([{"id": "c"}])
+
+    assert nodes == [{"id": "a"}, {"id": "b"}, {"id": "c"}]
+    assert get_node_ids(nodes) == {"a", "b", "c"}
+    assert has_node(nodes, "b")
+    assert not has_node(nodes, "d")
+
+
+def test_edge_list_indexes_source_target_label():
+    edges = EdgeList()
+    edges.append(make_edge("a", "b", "calls"))
+
+    assert has_edge(edges, "a", "b", "calls")
+    assert not has_edge(edges, "b", "a", "calls")
+    assert not has_edge(edges, "a", "b", "connect")
+
+
+def test_lookups_fall_back_to_plain_lists():
+    """Plain lists give the same answers as the indexed ones"""
+    nodes = [{"id": "a"}]
+    edges = [make_edge("a", "b", "calls")]
+
+    assert get_node_ids(nodes) == {"a"}
+    assert has_node(nodes, "a") and not has_node(nodes, "b")
+    assert has_edge(edges, "a", "b", "calls") and not has_edge(edges, "a", "b", "compose")
+
+
+def test_merge_app_data_reuses_enums_of_earlier_apps():
+    """An enum field name seen in an earlier app points the later app at the existing enum node"""
+    data = {"nodes": NodeList(), "edges": EdgeList(), "enum_ptr_map": {}}
+    first = initialize_app_data({})
+    first["nodes"].extend([{"id": "enum-1", "cls": {"type": "enum"}}, {"id": "a", "cls": {"attributes": []}}])
+    first["edges"].append(make_edge("a", "enum-1", "depend"))
+    first["enum_ptr_map"]["status"] = "enum-1"
+
+    second = initialize_app_data({})
+    second["nodes"].extend([
+        {"id": "enum-2", "cls": {"type": "enum"}},
+        {"id": "b", "cls": {"attributes": [{"name": "status", "enum": "enum-2"}]}},
+    ])
+    second["edges"].append(make_edge("b", "enum-2", "depend"))
+    second["enum_ptr_map"]["status"] = "enum-2"
+
+    merge_app_data(data, first)
+    merge_app_data(data, second)
+
+    assert [node["id"] for node in data["nodes"]] == ["enum-1", "a", "b"]
+    assert data["nodes"][2]["cls"]["attributes"][0]["enum"] == "enum-1"
+    assert has_edge(data["edges"], "b", "enum-1", "depend")
+    assert data["enum_ptr_map"] == {"status": "enum-1"}
@@ -0,0 +1,99 @@
+import io
+import json
+import pytest
+from api.model.importer.src.utils.diagram_serializer import (
+    OUTPUT_NDJSON,
+    build_diagram,
+    convert_diagram,
+    serialize_diagram,
+    write_diagram,
+)
+from api.model.importer.src.utils.diagram_template import diagram_template_obj
+
+
+# -------------------------
+# Fixtures
+# -------------------------
+
+@pytest.fixture
+def diagram_parts():
+    """Nodes and edges in the shape the node and relationship handlers create them"""
+    enum = {
+        "id": "enum-1",
+        "cls": {"name": "status", "type": "enum", "literals": ["NEW", 2], "namespace": ""},
+        "data": {"position": {"x": -960, "y": -30}},
+        "cls_ptr": "enum-cls",
+    }
+    shop = {
+        "id": "shop",
+        "cls": {
+            "leaf": False,
+            "name": "Shop",
+            "type": "class",
+            "methods": [{"body": "", "name": "open", "type": "str", "description": ""}],
+            "abstract": False,
+            "namespace": "",
+            "attributes": [
+                {"body": None, "enum": None, "name": "name", "type": "str", "derived": False, "description": None},
+                {"body": None, "enum": "enum-1", "name": "status", "type": "enum", "derived": False,
+                 "description": None},
+            ],
+        },
+        "data": {"position": {"x": 0, "y": 0}},
+        "cls_ptr": "shop-cls",
+    }
+    edge = {
+        "id": "edge-1",
+        "rel": {"type": "dependency", "label": "depend", "derived": False,
+                "multiplicity": {"source": "1", "target": "1"}},
+        "data": {},
+        "rel_ptr": "rel-1",
+        "source_ptr": "shop",
+        "target_ptr": "enum-1",
+    }
+    return [enum, shop], [edge]
+
+
+# -------------------------
+# Tests
+# -------------------------
+
+def test_build_diagram_matches_template(diagram_parts):
+    """The dict serialises to exactly the document the Jinja template rendered"""
+    nodes, edges = diagram_parts
+    rendered = diagram_template_obj.render(
+        diagram_id="d", project_id="p", system_id="s", nodes=nodes, edges=edges
+    )
+
+    diagram = build_diagram("d", "p", "s", nodes, edges)
+
+    assert json.loads(serialize_diagram(diagram)) == json.loads(rendered)
+
+
+def test_serialize_diagram_is_compact(diagram_parts):
+    output = serialize_diagram(build_diagram("d", "p", "s", *diagram_parts))
+
+    assert "\n" not in output
+    assert ", " not in output and '": ' not in output
+
+
+def test_ndjson_has_one_line_per_node_and_edge(diagram_parts):
+    """The header comes first, then the nodes, then the edges"""
+    diagram = build_diagram("d", "p", "s", *diagram_parts)
+
+    lines = [json.loads(line) for line in serialize_diagram(diagram, OUTPUT_NDJSON).splitlines()]
+
+    assert lines[0] == {"id": "d", "name": "Diagram", "type": "classes", "system": "s", "project": "p",
+                        "description": ""}
+    assert [line["node"]["id"] for line in lines[1:3]] == ["enum-1", "shop"]
+    assert lines[3]["edge"]["id"] == "edge-1"
+
+
+def test_write_diagram_streams_the_same_document(diagram_parts):
+    diagram = build_diagram("d", "p", "s", *diagram_parts)
+    stream = io.StringIO()
+
+    write_diagram(diagram, stream)
+
+    assert stream.getvalue() == serialize_diagram(diagram) + "\n"
+    assert convert_diagram(serialize_diagram(diagram), OUTPUT_NDJSON) == serialize_diagram(diagram, OUTPUT_NDJSON)
@@ -0,0 +1,220 @@
+import json
+import time
+import zipfile
+import threading
+import pytest
+from pathlib import Path
+from api.model.importer.management.synthetic_project import write_synthetic_apps
+from api.model.importer.src import extraction_pool
+from api.model.importer.src.extraction_pool import ExtractionPool, run_cold_extraction
+
+ZIP_DIR = Path(__file__).parent / "zips"
+
+
+# -------------------------
+# Fixtures
+# -------------------------
+
+@pytest.fixture
+def extracted_prototype(tmp_path):
+    """Unzip the test prototype into a temporary upload directory"""
+    with zipfile.ZipFile(ZIP_DIR / "test_prototype.zip", 'r') as zip_ref:
+        zip_ref.extractall(tmp_path)
+    return str(tmp_path)
+
+
+@pytest.fixture
+def pool():
+    pool = ExtractionPool(max_workers=2, idle_timeout=0, max_jobs=3)
+    yield pool
+    pool.shutdown()
+
+
+def node_names(diagram_json):
+    return sorted(node['cls']['name'] for node in json.loads(diagram_json)['nodes'])
+
+
+def named_edges(diagram_json):
+    """Edges as (type, source, target) in output order, nodes named by class and attribute names"""
+    nodes = json.loads(diagram_json)['nodes']
+    names = {
+        node['id']: (node['cls']['name'], tuple(a['name'] for a in node['cls'].get('attributes', [])))
+        for node in nodes
+    }
+    return [
+        (edge['rel']['type'], names[edge['source_ptr']], names[edge['target_ptr']])
+        for edge in json.loads(diagram_json)['edges']
+    ]
+
+
+# -------------------------
+# Tests
+# -------------------------
+
+def test_pool_matches_cold_extraction(pool, extracted_prototype):
+    """The warm worker produces the same diagram as a one-off subprocess"""
+    cold_success, cold_output = run_cold_extraction(extracted_prototype, "pid", "sid", False)
+    success, output = pool.extract(extracted_prototype, "pid", "sid", False)
+
+    assert cold_success and success
+    assert node_names(output) == node_names(cold_output)
+    assert json.loads(output)['system'] == "sid"
+    assert json.loads(output)['project'] == "pid"
+
+
+def test_pool_reuses_worker(pool, extracted_prototype):
+    """Subsequent jobs for the same project are served by the same process"""
+    pool.extract(extracted_prototype, "pid", "sid", True)
+    worker = pool.workers[extracted_prototype]
+    pool.extract(extracted_prototype, "pid", "sid", True)
+
+    assert pool.workers[extracted_prototype] is worker
+    assert worker.jobs_handled == 2
+
+
+def test_pool_recycles_worker_after_max_jobs(pool, extracted_prototype):
+    """A worker that handled max_jobs jobs is replaced by a fresh one"""
+    for _ in range(3):
+        pool.extract(extracted_prototype, "pid", "sid", False)
+    worker = pool.workers[extracted_prototype]
+
+    pool.extract(extracted_prototype, "pid", "sid", False)
+
+    assert pool.workers[extracted_prototype] is not worker
+    assert not worker.is_alive()
+
+
+def test_pool_evicts_least_recently_used(extracted_prototype, tmp_path_factory):
+    """The pool never holds more than max_workers workers"""
+    other = tmp_path_factory.mktemp("other")
+    with zipfile.ZipFile(ZIP_DIR / "test_prototype.zip", 'r') as zip_ref:
+        zip_ref.extractall(other)
+
+    pool = ExtractionPool(max_workers=1, idle_timeout=0)
+    try:
+        pool.extract(extracted_prototype, "pid", "sid", False)
+        first = pool.workers[extracted_prototype]
+        pool.extract(str(other), "pid", "sid", False)
+
+        assert list(pool.workers) == [str(other)]
+        assert not first.is_alive()
+    finally:
+        pool.shutdown()
+
+
+def test_pool_reports_missing_settings(pool, tmp_path):
+    """A project without settings.py fails to start a worker and is not kept in the pool"""
+    success, output = pool.extract(str(tmp_path), "pid", "sid", False)
+
+    assert not success
+    assert "No Django settings.py file found" in output
+    assert str(tmp_path) not in pool.workers
+
+
+@pytest.mark.parametrize("workers", ["1", "3"])
+def test_all_apps_extraction_merges_apps_in_order(monkeypatch, tmp_path, workers):
+    """Every project app is extracted, forked workers give the diagram of the sequential run"""
+    write_synthetic_apps(tmp_path, 3, 20)
+    monkeypatch.setenv("IMPORTER_APP_WORKERS", workers)
+    pool = ExtractionPool(max_workers=1, idle_timeout=0)
+    try:
+        success, output = pool.extract(str(tmp_path), "pid", "sid", True, all_apps=True)
+    finally:
+        pool.shutdown()
+    cold_success, cold_output = run_cold_extraction(str(tmp_path), "pid", "sid", True, all_apps=True)
+
+    assert success and cold_success
+    # 20 models per app, the status_0 and status_10 enums are shared by all apps
+    assert len(json.loads(output)['nodes']) == 3 * 20 + 2
+    assert named_edges(output) == named_edges(cold_output)
+
+
+def test_checked_out_worker_is_not_reaped(extracted_prototype):
+    """A worker handed out by get_worker stays in the pool until it is checked in"""
+    pool = ExtractionPool(max_workers=1, idle_timeout=0.01)
+    try:
+        worker = pool.get_worker(extracted_prototype)
+        time.sleep(0.05)
+        pool.reap()
+        assert pool.workers[extracted_prototype] is worker and worker.is_alive()
+
+        pool.check_in(worker)
+        pool.reap()
+        assert extracted_prototype not in pool.workers
+        assert not worker.is_alive()
+    finally:
+        pool.shutdown()
+
+
+def test_cold_start_does_not_block_other_projects(monkeypatch):
+    """A worker that is starting only makes the callers for its own project wait"""
+    started, release = threading.Event(), threading.Event()
+
+    class SlowWorker:
+        def __init__(self, extract_path):
+            self.extract_path = extract_path
+            self.checked_out = 0
+            if extract_path == "slow":
+                started.set()
+                release.wait(5)
+
+        def is_alive(self):
+            return True
+
+        def is_idle(self):
+            return self.checked_out == 0
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(extraction_pool, "ExtractionWorker", SlowWorker)
+    pool = ExtractionPool(max_workers=4, idle_timeout=0)
+    slow = threading.Thread(target=pool.get_worker, args=("slow",))
+    slow.start()
+    try:
+        assert started.wait(5)
+        assert pool.get_worker("fast").extract_path == "fast"
+        assert "slow" not in pool.workers
+    finally:
+        release.set()
+        slow.join()
+    assert pool.get_worker("slow") is pool.workers["slow"]
+    assert pool.workers["slow"].checked_out == 2
+
+
+def test_worker_stderr_is_reported(monkeypatch, tmp_path):
+    """A worker that dies while starting reports what it wrote to stderr"""
+    script = tmp_path / "broken_worker.py"
+    script.write_text("import sys\nsys.stderr.write('ImportError: no module named app\\n')\nsys.exit(1)\n")
+    monkeypatch.setattr(extraction_pool, "WORKER_SCRIPT", script)
+    pool = ExtractionPool(max_workers=1, idle_timeout=0)
+
+    success, output = pool.extract(str(tmp_path), "pid", "sid", False)
+
+    assert not success
+    assert "exited unexpectedly" in output
+    assert "ImportError: no module named app" in output
+    assert not pool.starting and not pool.workers
+
+
+def test_worker_stuck_in_a_line_is_killed(monkeypatch, tmp_path):
+    """A worker that stops halfway through the diagram line times out and is killed"""
+    script = tmp_path / "stuck_worker.py"
+    script.write_text(
+        "import sys, time\n"
+        "sys.stdout.write('{\"ready\": true}\\n')\n"
+        "sys.stdout.flush()\n"
+        "sys.stdin.readline()\n"
+        "sys.stdout.write('{\"success\": true, \"diagram_follows\": true}\\n{\"nodes\": [')\n"
+        "sys.stdout.flush()\n"
+        "time.sleep(60)\n"
+    )
+    monkeypatch.setattr(extraction_pool, "WORKER_SCRIPT", script)
+    worker = extraction_pool.ExtractionWorker(str(tmp_path))
+
+    start = time.monotonic()
+    with pytest.raises(extraction_pool.ExtractionWorkerError, match="timed out"):
+        worker.run("pid", "sid", False, timeout=0.5)
+
+    assert time.monotonic() - start < 5
+    assert not worker.is_alive()
@@ -0,0 +1,164 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from django.apps import apps
+
+# The import jobs live in the database, run them with the Django test runner:
+#   python manage.py test importer.tests.test_jobs
+if not (apps.ready and apps.is_installed("importer")):
+    pytest.skip("needs the Django test runner", allow_module_level=True)
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.files.uploadedfile import SimpleUploadedFile  # noqa: E402
+from django.test import Client, TestCase  # noqa: E402
+
+from importer.api.utils import extraction, jobs, uploads  # noqa: E402
+from importer.models import ImportJob  # noqa: E402
+from importer.src.utils.cache import DiagramCache  # noqa: E402
+from model.auth import create_token  # noqa: E402
+
+ZIP_DIR = Path(__file__).parent / "zips"
+
+
+class ImportJobTests(TestCase):
+    """Jobs are stored, run once committed, reported by the /jobs endpoints and failed after a restart"""
+
+    def setUp(self):
+        get_user_model().objects.create_user("importer", "importer@example.com", "importer")
+        _, token = create_token("importer", "importer")
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        self.upload_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.upload_dir, ignore_errors=True)
+        for patch in (
+            mock.patch.object(uploads, "UPLOAD_DIR", self.upload_dir),
+            mock.patch.object(extraction, "diagram_cache", DiagramCache(self.upload_dir / "cache")),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def submit(self, **fields):
+        with open(ZIP_DIR / "test_prototype.zip", "rb") as f:
+            upload = SimpleUploadedFile("test_prototype.zip", f.read(), content_type="application/zip")
+        data = {"project_id": "pid", "system_id": "sid", "analysis_mode": "static", "file": upload, **fields}
+        return self.client.post("/api/v1/importer/importer/jobs", data)
+
+    def test_job_is_run_once_committed(self):
+        with mock.patch.object(jobs.job_executor, "submit") as submit:
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.submit()
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["status"], ImportJob.Status.QUEUED)
+                submit.assert_not_called()
+            self.assertEqual(len(callbacks), 1)
+            callbacks[0]()
+
+        job = ImportJob.objects.get(id=response.json()["id"])
+        submit.assert_called_once_with(jobs.run_import_job, job.id)
+        self.assertTrue(job.archive_hash)
+
+    def test_run_import_job(self):
+        with mock.patch.object(jobs.job_executor, "submit"), self.captureOnCommitCallbacks(execute=True):
+            job_id = self.submit().json()["id"]
+
+        with mock.patch.object(jobs, "close_old_connections"):
+            jobs.run_import_job(job_id)
+
+        response = self.client.get(f"/api/v1/importer/importer/jobs/{job_id}")
+        self.assertEqual(response.json()["status"], ImportJob.Status.DONE)
+        self.assertEqual(response.json()["progress"], 100)
+        result = self.client.get(f"/api/v1/importer/importer/jobs/{job_id}/result").json()
+        self.assertTrue(result["success"])
+        self.assertIn('"nodes"', result["diagram_json"])
+
+    def test_unfinished_and_unknown_jobs(self):
+        job = ImportJob.objects.create(extract_path="/nonexistent", project_id="pid", system_id="sid")
+
+        result = self.client.get(f"/api/v1/importer/importer/jobs/{job.id}/result").json()
+        self.assertFalse(result["success"])
+        self.assertEqual(result["header"], "Import job not finished")
+
+        missing = "00000000-0000-0000-0000-000000000000"
+        self.assertEqual(self.client.get(f"/api/v1/importer/importer/jobs/{missing}").status_code, 404)
+        self.assertEqual(self.client.get(f"/api/v1/importer/importer/jobs/{missing}/result").status_code, 404)
+
+    def upload(self, **params):
+        with open(ZIP_DIR / "test_prototype.zip", "rb") as f:
+            upload = SimpleUploadedFile("test_prototype.zip", f.read(), content_type="application/zip")
+        query = "&".join(f"{name}={value}" for name, value in params.items())
+        return self.client.post(f"/api/v1/importer/importer/upload_zip?{query}", {"file": upload}).json()
+
+    def test_upload_extracts_every_file_by_default(self):
+        response = self.upload()
+        self.assertTrue(response["success"])
+        self.assertEqual(response["skipped_bytes"], 0)
+        files = {path.suffix for path in Path(response["extract_path"]).rglob("*") if path.is_file()}
+        self.assertTrue({".py", ".html", ".css"} <= files)
+
+    def test_selective_extraction_is_opt_in(self):
+        response = self.upload(extract_mode="selective")
+        self.assertTrue(response["success"])
+        self.assertGreater(response["skipped_bytes"], 0)
+        files = {path.suffix for path in Path(response["extract_path"]).rglob("*") if path.is_file()}
+        self.assertNotIn(".html", files)
+
+        with mock.patch.object(jobs.job_executor, "submit"):
+            self.assertEqual(self.submit().json()["extract_mode"], "full")
+
+    def test_upload_removes_the_archive(self):
+        self.assertTrue(self.upload()["success"])
+        self.assertEqual(list(self.upload_dir.glob("*.zip")), [])
+
+        upload = SimpleUploadedFile("broken.zip", b"not a zip file", content_type="application/zip")
+        response = self.client.post("/api/v1/importer/importer/upload_zip", {"file": upload}).json()
+        self.assertFalse(response["success"])
+        self.assertEqual(list(self.upload_dir.glob("*.zip")), [])
+
+        def write_half(uploaded_file, dest_path):
+            Path(dest_path).write_bytes(b"PK")
+            raise OSError("Connection reset")
+
+        with mock.patch.object(uploads, "write_chunks", side_effect=write_half):
+            self.assertFalse(self.upload()["success"])
+        self.assertEqual(list(self.upload_dir.glob("*.zip")), [])
+
+    def test_extraction_dirs_are_evicted_least_recently_used(self):
+        full = Path(self.upload()["extract_path"])
+        selective = Path(self.upload(extract_mode="selective")["extract_path"])
+        # Uploading the archive again reuses its full extraction and marks it as used
+        self.assertEqual(Path(self.upload()["extract_path"]), full)
+
+        with mock.patch.object(uploads, "EXTRACT_MAX_BYTES", uploads.dir_size(full)):
+            uploads.evict_extract_dirs()
+        self.assertTrue(full.exists())
+        self.assertFalse(selective.exists())
+
+        # A new extraction is kept even when it does not fit, the others make room
+        with mock.patch.object(uploads, "EXTRACT_MAX_BYTES", 1):
+            selective = Path(self.upload(extract_mode="selective")["extract_path"])
+        self.assertTrue(selective.exists())
+        self.assertFalse(full.exists())
+        self.assertEqual(list(self.upload_dir.glob("evicted_*")), [])
+
+    def test_submit_without_file(self):
+        response = self.client.post("/api/v1/importer/importer/jobs", {"project_id": "pid", "system_id": "sid"})
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(ImportJob.objects.exists())
+
+    def test_fail_interrupted_jobs(self):
+        queued, running, done = ImportJob.objects.bulk_create([
+            ImportJob(extract_path="/a", project_id="pid", system_id="sid", status=status)
+            for status in (ImportJob.Status.QUEUED, ImportJob.Status.RUNNING, ImportJob.Status.DONE)
+        ])
+
+        self.assertEqual(jobs.fail_interrupted_jobs(), 2)
+
+        statuses = dict(ImportJob.objects.values_list("id", "status"))
+        self.assertEqual(statuses[queued.id], ImportJob.Status.FAILED)
+        self.assertEqual(statuses[running.id], ImportJob.Status.FAILED)
+        self.assertEqual(statuses[done.id], ImportJob.Status.DONE)
+        result = self.client.get(f"/api/v1/importer/importer/jobs/{queued.id}/result").json()
+        self.assertEqual(result["header"], "Import job interrupted")
@@ -17,7 +17,8 @@ from api.model.importer.src.utils.relationship_handler import (
     process_foreign_key_field,
     process_enum_field,
     process_model_relationships,
-    add_method_dependency_edges
+    add_method_dependency_edges,
+    find_referenced_names
 )
 from api.model.importer.src.utils.django_environment_setup import configure_mock_django_settings
 
@@ -182,9 +183,15 @@ def test_process_field_relationships(model_setup):
         model_setup['edges'],
         source_ptr
     )
-    edges = [e for e in model_setup['edges']
-             if e["rel"]["type"] in ["composition", "association", "generalization"]]
-    assert len(edges) > 0
+    # The parent link and the foreign key to the parent are the inheritance itself, which
+    # process_inheritance_relationships draws
+    assert model_setup['edges'] == []
+
+def test_process_model_relationships_draws_one_generalization(model_setup):
+    model = model_setup['child_model']
+    process_model_relationships(model, model_setup['model_ptr_map'], {}, model_setup['edges'])
+    assert [e["rel"]["type"] for e in model_setup['edges']] == ["generalization"]
+    assert model_setup['edges'][0]["target_ptr"] == model_setup['model_ptr_map'][model_setup['parent_model']]
 
 def test_relationship_type_detection(model_setup):
     field = model_setup['child_model']._meta.get_field('parent')
@@ -370,7 +377,9 @@ def test_process_field_relationships_with_non_field_attribute(model_setup):
     del mock_field.get_internal_type
     with patch.object(model._meta, 'get_fields', return_value=[*original_fields, mock_field]):
         process_field_relationships(model, model_setup['model_ptr_map'], {}, edges, source_ptr)
-    assert len(edges) > 0
+    expected = []
+    process_field_relationships(model, model_setup['model_ptr_map'], {}, expected, source_ptr)
+    assert len(edges) == len(expected)
 
 def test_extract_method_dependencies_creates_edge(dependency_setup):
     """
@@ -431,4 +440,29 @@ def test_process_field_relationships_skips_existing_calls_edge(model_setup):
     )
     
     has_unwanted_edge = any(e['rel'].get('type') in ['composition', 'association'] for e in edges)
-    assert not has_unwanted_edge
\ No newline at end of file
+    assert not has_unwanted_edge
+
+def test_find_referenced_names_matches_whole_words_only():
+    """
+    Model names are found as whole words in one scan, in order of first mention.
+    """
+    names = frozenset({"Order", "OrderLine", "Customer"})
+    code = 'def total(self):\n    lines = OrderLine.objects.all()  # not Orders or MyOrder\n    return "Customer", Order'
+
+    assert find_referenced_names(code, names) == ("OrderLine", "Customer", "Order")
+    assert find_referenced_names("Orders = MyCustomer_", names) == ()
+
+def test_add_method_dependency_edges_adds_one_edge_per_target(dependency_setup):
+    """
+    A model mentioned in several methods still gets a single 'calls' edge.
+    """
+    model_a = dependency_setup['model_a']
+    model_b = dependency_setup['model_b']
+    data = copy.deepcopy(dependency_setup['data'])
+    source_ptr = data['model_ptr_map'][model_a]
+    model_names = {model_a.__name__: model_a, model_b.__name__: model_b}
+    source_code_map = {'first': 'ModelB()', 'second': 'ModelB.objects; ModelA()'}
+
+    add_method_dependency_edges(model_a, source_code_map, model_names, data, source_ptr)
+
+    assert [e['target_ptr'] for e in data['edges']] == [data['model_ptr_map'][model_b]]
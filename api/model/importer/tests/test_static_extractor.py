@@ -0,0 +1,201 @@
+import json
+import textwrap
+import zipfile
+import pytest
+from pathlib import Path
+from api.model.importer.src.extraction_pool import ExtractionPool, run_cold_extraction
+from api.model.importer.src.utils.django_environment_setup import configure_mock_django_settings
+from api.model.importer.src.utils.static_analysis import read_project_apps
+from api.model.importer.src.utils.static_extractor import run_static_extraction
+
+configure_mock_django_settings()
+
+ZIP_DIR = Path(__file__).parent / "zips"
+
+SETTINGS = """
+SECRET_KEY = 'static'
+INSTALLED_APPS = ['django.contrib.contenttypes', 'django.contrib.auth', 'shared_models']
+DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+"""
+
+MODELS = """
+from django.db import models
+from django.conf import settings
+
+
+class Status(models.TextChoices):
+    OPEN = 'open'
+    CLOSED = 'closed', 'Closed for good'
+
+
+class AbstractStamped(models.Model):
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        abstract = True
+
+    def age(self):
+        return self.created
+
+
+class Shop(AbstractStamped):
+    name = models.CharField(max_length=50)
+    status = models.CharField(max_length=10, choices=Status.choices)
+    owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+
+    def first_product(self):
+        return Product.objects.filter(shop=self).first()
+
+    @property
+    def label(self):
+        return self.name
+
+
+class Product(AbstractStamped):
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, related_name='products')
+    parent = models.ForeignKey('self', null=True, on_delete=models.SET_NULL)
+    tags = models.ManyToManyField('Tag', blank=True)
+    price = models.IntegerField(default=0)
+
+    def in_stock(self):
+        return self.price > 0
+
+
+class Tag(models.Model):
+    name = models.CharField(max_length=20)
+    size = models.IntegerField(choices=[(1, 'Small'), (2, 'Large')])
+
+
+class SpecialProduct(Product):
+    note = models.TextField(null=True)
+    origin = models.OneToOneField(Shop, null=True, on_delete=models.SET_NULL)
+"""
+
+
+# -------------------------
+# Fixtures
+# -------------------------
+
+def write_project(root, models_source, settings=SETTINGS):
+    (root / "project").mkdir()
+    (root / "project" / "settings.py").write_text(settings)
+    (root / "shared_models").mkdir()
+    (root / "shared_models" / "__init__.py").write_text("")
+    (root / "shared_models" / "models.py").write_text(textwrap.dedent(models_source))
+    return str(root)
+
+
+@pytest.fixture
+def sample_project(tmp_path):
+    return write_project(tmp_path, MODELS)
+
+
+@pytest.fixture
+def pool():
+    pool = ExtractionPool(max_workers=1, idle_timeout=0)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def extracted_prototype(tmp_path):
+    with zipfile.ZipFile(ZIP_DIR / "test_prototype.zip", 'r') as zip_ref:
+        zip_ref.extractall(tmp_path)
+    return str(tmp_path)
+
+
+def signature(diagram_json):
+    """The diagram without its generated ids: nodes and edges by name, in output order"""
+    diagram = json.loads(diagram_json)
+    names = {node['id']: node['cls']['name'] for node in diagram['nodes']}
+    nodes = [
+        (
+            node['cls']['name'],
+            node['cls'].get('literals'),
+            [(a['name'], a['type'], names.get(a['enum'])) for a in node['cls'].get('attributes', [])],
+            [method['name'] for method in node['cls'].get('methods', [])],
+        )
+        for node in diagram['nodes']
+    ]
+    edges = [
+        (edge['rel']['type'], edge['rel']['label'], edge['rel']['multiplicity'],
+         names[edge['source_ptr']], names[edge['target_ptr']])
+        for edge in diagram['edges']
+    ]
+    return nodes, edges
+
+
+# -------------------------
+# Tests
+# -------------------------
+
+@pytest.mark.parametrize("method_dependencies", [False, True])
+def test_static_extraction_matches_django_extraction(pool, sample_project, method_dependencies):
+    """Reading the sources gives the diagram django.setup() gives, node for node and edge for edge"""
+    success, output = run_static_extraction(sample_project, "pid", "sid", method_dependencies)
+    django_success, django_output = pool.extract(sample_project, "pid", "sid", method_dependencies)
+
+    assert success and django_success
+    assert signature(output) == signature(django_output)
+    assert json.loads(output)['project'] == "pid"
+    # Drawn once per parent by both extractors
+    generalizations = [edge for edge in signature(output)[1] if edge[0] == "generalization"]
+    assert [(edge[3], edge[4]) for edge in generalizations] == [("SpecialProduct", "Product")]
+
+
+def test_static_extraction_matches_on_prototype(extracted_prototype):
+    success, output = run_static_extraction(extracted_prototype, "pid", "sid", True)
+    cold_success, cold_output = run_cold_extraction(extracted_prototype, "pid", "sid", True)
+
+    assert success and cold_success
+    assert signature(output) == signature(cold_output)
+
+
+def test_static_extraction_of_all_apps(pool, extracted_prototype):
+    """The apps a generated prototype adds with INSTALLED_APPS += [...] are read, as the django extractor imports them"""
+    success, output = run_static_extraction(extracted_prototype, "pid", "sid", True, all_apps=True)
+    django_success, django_output = pool.extract(extracted_prototype, "pid", "sid", True, all_apps=True)
+
+    assert success and django_success
+    assert signature(output) == signature(django_output)
+    assert [node[0] for node in signature(output)[0]] == ["product_category", "Product", "Customer", "Cart"]
+
+
+def test_project_apps_of_prototype(extracted_prototype):
+    settings_path = next(Path(extracted_prototype).glob('**/settings.py'))
+    assert read_project_apps(settings_path) == ['shared_models', 'noauth_home', 'user']
+
+
+def test_all_apps_leave_installed_packages_out(pool, tmp_path):
+    """An app installed as a package is not part of the project, neither extractor draws its models"""
+    settings = SETTINGS + "INSTALLED_APPS = INSTALLED_APPS + ['rest_framework.authtoken']\n"
+    project = write_project(tmp_path, MODELS, settings)
+
+    success, output = run_static_extraction(project, "pid", "sid", False, all_apps=True)
+    django_success, django_output = pool.extract(project, "pid", "sid", False, all_apps=True)
+
+    assert success and django_success
+    assert signature(output) == signature(django_output)
+    names = [node[0] for node in signature(output)[0]]
+    assert "Shop" in names and "Token" not in names
+
+
+def test_static_extraction_without_installed_dependencies(tmp_path):
+    """Imports of packages that are not installed do not stop the static analysis"""
+    project = write_project(tmp_path, "import not_installed\nfrom not_installed.fields import Money\n" + MODELS)
+
+    success, output = run_static_extraction(project, "pid", "sid", False)
+    cold_success, _ = run_cold_extraction(project, "pid", "sid", False)
+
+    assert success and not cold_success
+    assert [node[0] for node in signature(output)[0]] == [
+        "status", "Shop", "Product", "size", "Tag", "SpecialProduct"
+    ]
+
+
+def test_static_extraction_without_settings(tmp_path):
+    success, output = run_static_extraction(str(tmp_path), "pid", "sid", False)
+
+    assert not success
+    assert output.startswith("No Django settings.py file found")
@@ -1,7 +1,7 @@
 from .project import ReadProject, UpdateProject, CreateProject
 from .system import ReadSystem, UpdateSystem, CreateSystem
 from .interface import ReadInterface, UpdateInterface, CreateInterface
-from .release import ReadRelease, UpdateRelease
+from .release import ReadRelease, ListRelease, UpdateRelease, LoadReleaseReport, ReleaseDiff
 from .meta import MetaSchema, MetaClassifiersSchema, MetaRelationsSchema
 
 __all__ = [
@@ -18,5 +18,8 @@ __all__ = [
     "UpdateInterface",
     "CreateInterface",
     "ReadRelease",
+    "ListRelease",
     "UpdateRelease",
+    "LoadReleaseReport",
+    "ReleaseDiff",
 ]
@@ -1,11 +1,32 @@
-from ninja import ModelSchema
+from typing import Any, Dict, List, Optional, Union
+from uuid import UUID
+
+from ninja import ModelSchema, Schema
 from metadata.models import Release
+from metadata.storage import release_snapshot
 
 
 class ReadRelease(ModelSchema):
+    diagrams: Any
+    interfaces: Any
+
     class Meta:
         model = Release
-        fields = ["id", "name", "created_at", "project", "system", "diagrams", "metadata", "interfaces", "release_notes" ]
+        fields = ["id", "name", "created_at", "project", "system", "metadata", "release_notes" ]
+
+    @staticmethod
+    def resolve_diagrams(obj):
+        return release_snapshot(obj)[0]
+
+    @staticmethod
+    def resolve_interfaces(obj):
+        return release_snapshot(obj)[1]
+
+
+class ListRelease(ModelSchema):
+    class Meta:
+        model = Release
+        fields = ["id", "name", "created_at", "project", "system", "metadata", "release_notes", "summary" ]
 
 
 class UpdateRelease(ModelSchema):
@@ -14,4 +35,53 @@ class UpdateRelease(ModelSchema):
         fields = ["id", "name", "created_at", "project", "system", "diagrams", "metadata", "interfaces", "release_notes" ]
 
 
-__all__ = ["ReadRelease", "UpdateRelease"]
+class LoadReleaseReport(Schema):
+    # Restored rows per model and the time each step took, a delta load only restores what
+    # differs and reports the rows it updated and deleted as well
+    counts: Dict[str, int]
+    updated: Dict[str, int] = {}
+    deleted: Dict[str, int] = {}
+    milliseconds: Dict[str, float]
+
+
+class FieldChange(Schema):
+    # Keys and list indexes from the element down to the changed value
+    path: List[Union[str, int]]
+    old: Any = None
+    new: Any = None
+
+
+class ModifiedElement(Schema):
+    id: str
+    changes: List[FieldChange]
+
+
+class ElementsDiff(Schema):
+    # Added and removed elements with their fields, references are ids
+    added: List[Dict[str, Any]] = []
+    removed: List[Dict[str, Any]] = []
+    modified: List[ModifiedElement] = []
+
+
+class ReleaseDiff(Schema):
+    source: UUID
+    # None is the live system
+    target: Optional[UUID] = None
+    diagrams: ElementsDiff
+    classifiers: ElementsDiff
+    nodes: ElementsDiff
+    relations: ElementsDiff
+    edges: ElementsDiff
+    interfaces: ElementsDiff
+
+
+__all__ = [
+    "ReadRelease",
+    "ListRelease",
+    "UpdateRelease",
+    "LoadReleaseReport",
+    "FieldChange",
+    "ModifiedElement",
+    "ElementsDiff",
+    "ReleaseDiff",
+]
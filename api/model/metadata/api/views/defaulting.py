@@ -1,3 +1,4 @@
+from django.db.models import Q
 from metadata.models import System, Classifier, Interface
 from metadata.api.schemas import ReadInterface
 from typing import List, Dict, Any, Optional
@@ -39,7 +40,8 @@ class DefaultUsecase():
 
 def get_directly_linked_use_cases(system: System, actor: Classifier) -> List[Classifier]:
     directly_linked_use_cases = []
-    for relation in system.relations.filter(data__type='interaction'):
+    relations = system.relations.of_type('interaction').filter(Q(source=actor) | Q(target=actor))
+    for relation in relations.select_related('source', 'target'):
         if relation.source == actor:
             directly_linked_use_cases.append(relation.target)
         elif relation.target == actor:
@@ -50,7 +52,8 @@ def get_directly_linked_use_cases(system: System, actor: Classifier) -> List[Cla
 
 def get_extended_use_cases(system: System, use_cases: List[Classifier]) -> List[Classifier]:
     extended_use_cases = []
-    for relation in system.relations.filter(data__type='extension'):
+    relations = system.relations.of_type('extension').filter(source__in=use_cases)
+    for relation in relations.select_related('source', 'target'):
         for use_case in use_cases:
             if relation.source == use_case and relation.target not in use_cases and relation.target not in extended_use_cases:
                 extended_use_cases.append(relation.target)
@@ -59,11 +62,11 @@ def get_extended_use_cases(system: System, use_cases: List[Classifier]) -> List[
 
 
 def get_class_acted_on(system: System, use_case_name: str) -> str:
-    for cls in system.classifiers.filter(data__type='class'):
-        if 'name' not in cls.data:
+    for cls_id, cls_name in system.classifiers.of_type('class').values_list('id', 'name'):
+        if not cls_name:
             continue
-        if cls.data['name'].lower() in use_case_name:
-            return cls.id
+        if cls_name.lower() in use_case_name:
+            return cls_id
 
     return None
 
@@ -143,11 +146,11 @@ def get_default_use_cases(system: System, relevant_use_cases: List[Classifier])
             classes_visited.append(class_acted_on)
             attributes = get_class_attributes(class_acted_on)
             model_name = None
-            for cls in system.classifiers.filter(data__type='class'):
-                if 'name' not in cls.data:
+            for cls_name in system.classifiers.of_type('class').values_list('name', flat=True):
+                if not cls_name:
                     continue
-                if cls.data['name'].lower() in name:
-                    model_name = cls.data['name']
+                if cls_name.lower() in name:
+                    model_name = cls_name
             default_use_case = DefaultUsecase(
                 name = name,
                 crud_types = crud_types_per_class[class_acted_on],
@@ -269,7 +272,7 @@ def get_default_interface_data(system: System, actor: Classifier) -> str:
 
 
 def create_default_interface(system: System, actor: Classifier) -> ReadInterface:
-    if actor.data['type'] != 'actor':
+    if actor.type != 'actor':
         return 404, "Classifier is not an actor"
 
     return Interface.objects.create(
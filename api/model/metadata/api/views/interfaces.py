@@ -41,7 +41,7 @@ def create_default_interfaces(request, system_id: str):
     if not system:
         return []
 
-    actors = system.classifiers.filter(data__type='actor')
+    actors = system.classifiers.of_type('actor')
 
     out = []
     for actor in actors:
@@ -1,20 +1,24 @@
 from typing import List, Optional
+from uuid import UUID
 
-from metadata.api.schemas import ReadRelease, UpdateRelease
-from metadata.api.views.utils.releases import serialize_interfaces, serialize_diagrams, load_interfaces, load_diagrams
+from metadata.api.schemas import ListRelease, LoadReleaseReport, ReadRelease, ReleaseDiff, UpdateRelease
+from metadata.api.views.utils.diff import diff_indexes, live_index, release_index, restore_release_delta
+from metadata.api.views.utils.releases import LoadReleaseError, serialize_interfaces, serialize_diagrams, restore_release
 from metadata.models import Release, System
+from metadata.storage import create_release as store_release
 from ninja import Router
 import json
 
 releases = Router()
 
 
-@releases.get("/system/{uuid:system_id}/", response=List[ReadRelease])
+@releases.get("/system/{uuid:system_id}/", response=List[ListRelease])
 def list_releases(request, system_id):
     system = System.objects.get(id=system_id)
     if not system:
         return 404, "System not found"
-    return Release.objects.filter(system=system).order_by('created_at')
+    # The snapshots are only read by read_release
+    return Release.objects.filter(system=system).defer('diagrams', 'interfaces', 'manifest').order_by('created_at')
 
 
 @releases.get("/{uuid:release_id}", response=ReadRelease)
@@ -36,19 +40,19 @@ def create_release(request, system_id: str, name: str, release_notes: Optional[s
     serialized_interfaces = serialize_interfaces(system=system)
     serialized_diagrams = serialize_diagrams(system=system)
 
-    return Release.objects.create(
+    return store_release(
+        diagrams=serialized_diagrams,
+        interfaces=serialized_interfaces,
         name=name,
         project=system.project,
         system=system,
-        diagrams=serialized_diagrams,
         metadata={},
         release_notes=json.loads(release_notes or ""),
-        interfaces=serialized_interfaces,
     )
 
 
-@releases.post("/{uuid:release_id}/load/")
-def load_release(request, release_id):
+@releases.post("/{uuid:release_id}/load/", response={200: LoadReleaseReport, 404: str, 422: str})
+def load_release(request, release_id, delta: bool = False):
     release = Release.objects.get(id=release_id)
     if not release:
         return 404, "Release not found"
@@ -57,17 +61,41 @@ def load_release(request, release_id):
     if not system:
         return 404, "System not found"
 
-    if not load_diagrams(system=system, release=release):
-        return 422
-
-    if not load_interfaces(system=system, release=release):
-        return 422
-
-    return 200
-
-
-
+    # All or nothing, a release that fails to load leaves the system as it was. A delta load
+    # only writes what differs from the live system instead of deleting and recreating it all.
+    try:
+        if delta:
+            return restore_release_delta(system=system, release=release)
+        return restore_release(system=system, release=release)
+    except LoadReleaseError as e:
+        return 422, str(e)
+
+
+@releases.get("/{uuid:release_id}/diff/", response={200: ReleaseDiff, 404: str})
+def diff_release(request, release_id, target: Optional[UUID] = None):
+    """
+    What changed from the release to the target release, or to the live system of the release
+    without a target. Elements are matched by id, modified ones list their changed fields.
+    """
+    source = Release.objects.filter(id=release_id).first()
+    if source is None:
+        return 404, "Release not found"
 
+    if target is None:
+        if source.system is None:
+            return 404, "System not found"
+        target_index = live_index(source.system)
+    else:
+        target_release = Release.objects.filter(id=target).first()
+        if target_release is None:
+            return 404, "Target release not found"
+        target_index = release_index(target_release)
+
+    return {
+        "source": source.id,
+        "target": target,
+        **diff_indexes(release_index(source), target_index),
+    }
 
 
 @releases.put("/{uuid:release_id}/", response=ReadRelease)
@@ -2,10 +2,12 @@ from typing import List, Optional
 
 from metadata.api.schemas import CreateSystem, ReadSystem, UpdateSystem
 from metadata.models import Project, System
+from diagram.models import Diagram
 from .meta import meta
 from .classifiers import classifiers, classes, actors
 from .relations import relations, classifier_relations
 
+from django.db import transaction
 from ninja import Router
 
 systems = Router()
@@ -45,7 +47,11 @@ def update_system(request, id, payload: UpdateSystem):
 def delete_system(request, id):
     try:
         system = System.objects.get(id=id)
-        system.delete()
+        with transaction.atomic():
+            # Set-based delete of the diagrams and their elements, the cascade of the system
+            # is then left with few rows to collect
+            Diagram.objects.filter(system=system).delete()
+            system.delete()
     except Exception as e:
         raise Exception("Failed to delete system, error: " + e)
     return True
@@ -61,7 +61,7 @@ def read_classes(request: HttpRequest):
         return 404, "System not found"
 
     return {
-        "classifiers": system.classifiers.filter(data__type='class').order_by('id'),
+        "classifiers": system.classifiers.of_type('class').order_by('id'),
     }
 
 
@@ -79,7 +79,7 @@ def read_actors(request: HttpRequest):
         return 404, "System not found"
 
     return {
-        "classifiers": system.classifiers.filter(data__type='actor'),
+        "classifiers": system.classifiers.of_type('actor'),
     }
 
 
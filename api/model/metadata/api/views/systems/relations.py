@@ -60,12 +60,7 @@ def read_classifier_relations(request: HttpRequest):
     if not system:
         return 404, "System not found"
 
-    associations = system.relations.filter(data__type='association')
-    generalizations = system.relations.filter(data__type='generalization')
-    compositions = system.relations.filter(data__type='composition')
-    dependencies = system.relations.filter(data__type='dependency')
-
-    classifier_relations = associations | generalizations | compositions | dependencies
+    classifier_relations = system.relations.of_type('association', 'generalization', 'composition', 'dependency')
 
     return {
         "relations": classifier_relations.order_by('id')
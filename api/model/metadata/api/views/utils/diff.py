@@ -0,0 +1,310 @@
+import json
+import time
+from typing import Any, Dict, List, Set, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import ForeignKey, JSONField, Q, TextField, UUIDField
+from django.db.models.functions import Cast
+
+from diagram.api.utils.bulk import BULK_BATCH_SIZE
+from diagram.models import Diagram, Edge, Node, delete_querysets
+from metadata.models import Classifier, Interface, Relation, Release, System
+from metadata.api.views.utils.releases import LoadReleaseError, serialize_diagrams, serialize_interfaces
+from metadata.storage import release_snapshot
+
+# The kinds of elements of a snapshot, in the order they are diffed and reported
+ELEMENT_KINDS = ("diagrams", "classifiers", "nodes", "relations", "edges", "interfaces")
+
+# The model of each kind. The fields of an element are named like the model's fields.
+KIND_MODELS = {
+    "diagrams": Diagram,
+    "classifiers": Classifier,
+    "nodes": Node,
+    "relations": Relation,
+    "edges": Edge,
+    "interfaces": Interface,
+}
+
+# The fields of the elements of each kind, as snapshot_index builds them
+ELEMENT_FIELDS = {
+    "diagrams": ("name", "description", "type"),
+    "classifiers": ("data",),
+    "nodes": ("diagram", "cls", "data"),
+    "relations": ("source", "target", "data"),
+    "edges": ("diagram", "rel", "data"),
+    "interfaces": ("name", "description", "actor", "data"),
+}
+
+
+def snapshot_index(diagrams: List[Dict[str, Any]], interfaces: List[Dict[str, Any]]):
+    """
+    Index serialised diagrams and interfaces by kind and id, one pass over the snapshot. Every
+    element is a dict of its fields with references by id, so two indexes compare in linear time.
+    A classifier or relation shown in several diagrams is one element, the last copy wins like
+    release_rows. Relations get the classifiers of their edge's nodes.
+    """
+    index: Dict[str, Dict[str, Dict[str, Any]]] = {kind: {} for kind in ELEMENT_KINDS}
+    node_classifiers: Dict[str, str] = {}
+
+    for diagram in diagrams:
+        diagram_id = str(diagram["id"])
+        index["diagrams"][diagram_id] = {
+            "name": diagram["name"],
+            "description": diagram["description"],
+            "type": diagram["type"],
+        }
+        for node in diagram["nodes"]:
+            cls_id = str(node["cls"]["id"])
+            index["classifiers"][cls_id] = {"data": node["cls"]["data"]}
+            index["nodes"][str(node["id"])] = {"diagram": diagram_id, "cls": cls_id, "data": node["data"]}
+            node_classifiers[str(node["id"])] = cls_id
+
+    for diagram in diagrams:
+        for edge in diagram["edges"]:
+            rel_id = str(edge["rel"]["id"])
+            index["relations"][rel_id] = {
+                "source": node_classifiers.get(str(edge["source_ptr"])),
+                "target": node_classifiers.get(str(edge["target_ptr"])),
+                "data": edge["rel"]["data"],
+            }
+            index["edges"][str(edge["id"])] = {"diagram": str(diagram["id"]), "rel": rel_id, "data": edge["data"]}
+
+    for interface in interfaces:
+        index["interfaces"][str(interface["id"])] = {
+            "name": interface["name"],
+            "description": interface["description"],
+            "actor": str(interface["actor"]) if interface["actor"] else None,
+            "data": interface["data"],
+        }
+    return index
+
+
+def release_index(release: Release):
+    return snapshot_index(*release_snapshot(release))
+
+
+def live_index(system: System):
+    """The index of the system as a release of it now would be, read as rows"""
+    return snapshot_index(serialize_diagrams(system), serialize_interfaces(system))
+
+
+def uuid_text(value):
+    """An id read as text in the form str(uuid) gives, sqlite stores them as bare hex"""
+    if value is None or len(value) != 32:
+        return value
+    return f"{value[:8]}-{value[8:12]}-{value[12:16]}-{value[16:20]}-{value[20:]}"
+
+
+def row_columns(model, names):
+    """
+    The columns to read for the fields of an element and how to turn each into its indexed value.
+    Ids and JSON are read as text: building UUID objects and decoding through the field converters
+    takes most of the time of reading a large system.
+    """
+    columns = [Cast("pk", TextField())]
+    loaders = []
+    for name in names:
+        field = model._meta.get_field(name)
+        if isinstance(field, JSONField):
+            columns.append(Cast(field.attname, TextField()))
+            loaders.append(json.loads)
+        elif isinstance(field, (ForeignKey, UUIDField)):
+            columns.append(Cast(field.attname, TextField()))
+            loaders.append(uuid_text)
+        else:
+            columns.append(field.attname)
+            loaders.append(None)
+    return columns, loaders
+
+
+def live_rows(system: System):
+    """
+    The index of the rows of the system like live_index, read table by table without building
+    snapshots. Unlike live_index it has the classifiers and relations of the system that no
+    diagram shows, so restoring a release updates or deletes them too.
+    """
+    nodes = Node.objects.filter(diagram__system=system)
+    edges = Edge.objects.filter(diagram__system=system)
+    querysets = {
+        "diagrams": Diagram.objects.filter(system=system),
+        "classifiers": Classifier.objects.filter(Q(system=system) | Q(pk__in=nodes.values("cls_id"))),
+        "nodes": nodes,
+        "relations": Relation.objects.filter(Q(system=system) | Q(pk__in=edges.values("rel_id"))),
+        "edges": edges,
+        "interfaces": Interface.objects.filter(system=system),
+    }
+    index: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for kind, model in KIND_MODELS.items():
+        names = ELEMENT_FIELDS[kind]
+        columns, loaders = row_columns(model, names)
+        rows = index[kind] = {}
+        for id, *values in querysets[kind].values_list(*columns):
+            rows[uuid_text(id)] = {
+                name: value if load is None or value is None else load(value)
+                for name, load, value in zip(names, loaders, values)
+            }
+    return index
+
+
+def json_diff(old, new, path: Tuple = ()):
+    """
+    The changes from one JSON value to another as {"path", "old", "new"}, one per changed leaf.
+    Objects are compared key by key and lists of equal length item by item, a list that grew or
+    shrank is reported as a whole.
+    """
+    if old == new:
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        changes = []
+        for key in old.keys() | new.keys():
+            changes += json_diff(old.get(key), new.get(key), path + (key,))
+        return sorted(changes, key=lambda change: [str(step) for step in change["path"]])
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        changes = []
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            changes += json_diff(old_item, new_item, path + (i,))
+        return changes
+    return [{"path": list(path), "old": old, "new": new}]
+
+
+def diff_elements(old: Dict[str, Dict[str, Any]], new: Dict[str, Dict[str, Any]]):
+    """Added, removed and modified elements of one kind, by id"""
+    added = [{"id": id, **new[id]} for id in sorted(new.keys() - old.keys())]
+    removed = [{"id": id, **old[id]} for id in sorted(old.keys() - new.keys())]
+    modified = [
+        {"id": id, "changes": json_diff(old[id], new[id])}
+        for id in sorted(old.keys() & new.keys())
+        if old[id] != new[id]
+    ]
+    return {"added": added, "removed": removed, "modified": modified}
+
+
+def diff_indexes(old, new):
+    return {kind: diff_elements(old[kind], new[kind]) for kind in ELEMENT_KINDS}
+
+
+def delta_changes(live, target):
+    """
+    The ids to insert, the ids and fields to update and the ids to delete per kind to turn the
+    live rows of the system into the target index
+    """
+    inserts: Dict[str, Set[str]] = {}
+    updates: Dict[str, Dict[str, Set[str]]] = {}
+    deletes: Dict[str, Set[str]] = {}
+    for kind in ELEMENT_KINDS:
+        old, new = live[kind], target[kind]
+        inserts[kind] = new.keys() - old.keys()
+        deletes[kind] = old.keys() - new.keys()
+        updates[kind] = {}
+        for id in old.keys() & new.keys():
+            if old[id] != new[id]:
+                updates[kind][id] = {name for name, value in new[id].items() if old[id].get(name) != value}
+    return inserts, updates, deletes
+
+
+def delete_rows(deletes: Dict[str, Set[str]]):
+    """
+    Delete the rows by kind with set based DELETEs, with the rows that point at the deleted
+    classifiers and relations from other systems like clear_system. Returns the counts per model.
+    """
+    classifiers = Classifier.objects.filter(id__in=deletes["classifiers"])
+    relations = Relation.objects.filter(
+        Q(id__in=deletes["relations"]) | Q(source__in=classifiers) | Q(target__in=classifiers)
+    )
+    deleted = delete_querysets(
+        Interface.objects.filter(Q(id__in=deletes["interfaces"]) | Q(actor__in=classifiers)),
+        Edge.objects.filter(Q(id__in=deletes["edges"]) | Q(rel__in=relations)),
+        Node.objects.filter(Q(id__in=deletes["nodes"]) | Q(cls__in=classifiers)),
+        relations,
+        classifiers,
+        # Only the diagram rows, Diagram.objects.delete() would take their classifiers along
+        Diagram._base_manager.filter(id__in=deletes["diagrams"]),
+    )
+    return {model._meta.model_name: deleted[model._meta.label] for model in KIND_MODELS.values()}
+
+
+def element_instance(model, system: System, id: str, element: Dict[str, Any]):
+    """An unsaved instance of an indexed element, references set by id"""
+    fields = {model._meta.get_field(name).attname: value for name, value in element.items()}
+    if model in (Diagram, Classifier, Relation, Interface):
+        fields["system_id"] = system.id
+    return model(id=id, **fields)
+
+
+def restore_release_delta(system: System, release: Release, batch_size: int = BULK_BATCH_SIZE):
+    """
+    Turn the system into the release like restore_release, writing only what differs: elements
+    of the release that are missing are inserted, changed ones updated in the changed fields only
+    and the others deleted, all in bulk in one transaction. Instances are only made for the rows
+    that are written, unchanged rows are left alone, so node ids and positions stay as they are
+    and a release close to the live system loads in a few queries. Returns the inserted, updated
+    and deleted rows per model and the milliseconds each step took. Raises LoadReleaseError for a
+    payload that cannot be restored.
+    """
+    milliseconds: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    def step(name):
+        nonlocal start
+        now = time.perf_counter()
+        milliseconds[name] = round((now - start) * 1000, 1)
+        start = now
+
+    try:
+        target = release_index(release)
+    except (KeyError, TypeError) as e:
+        raise LoadReleaseError(f"The release is missing {e}")
+    for edge_id, edge in target["edges"].items():
+        relation = target["relations"][edge["rel"]]
+        if relation["source"] is None or relation["target"] is None:
+            raise LoadReleaseError(f"Edge {edge_id} connects a node that is not part of the release")
+    step("payload")
+    live = live_rows(system)
+    step("live")
+    inserts, updates, deletes = delta_changes(live, target)
+    step("diff")
+
+    inserted: Dict[str, int] = {}
+    updated: Dict[str, int] = {}
+    try:
+        with transaction.atomic():
+            # Inserts and updates in dependency order, so a changed row may point at a new one, and
+            # deletes last, when nothing that stays points at the deleted rows anymore
+            for kind, model in KIND_MODELS.items():
+                objs = [element_instance(model, system, id, target[kind][id]) for id in sorted(inserts[kind])]
+                model.objects.bulk_create(objs, batch_size=batch_size)
+                inserted[model._meta.model_name] = len(objs)
+            step("insert")
+            for kind, model in KIND_MODELS.items():
+                objs = [element_instance(model, system, id, target[kind][id]) for id in sorted(updates[kind])]
+                fields = set().union(*updates[kind].values())
+                if objs:
+                    model.objects.bulk_update(objs, sorted(fields), batch_size=batch_size)
+                updated[model._meta.model_name] = len(objs)
+            step("update")
+            deleted = delete_rows(deletes)
+            step("delete")
+            if any(inserted.values()) or any(updated.values()) or any(deleted.values()):
+                System.bump_relations_version(system.id)
+    except IntegrityError as e:
+        raise LoadReleaseError(f"The release does not match the database: {e}")
+    except (ValidationError, ValueError) as e:
+        raise LoadReleaseError(f"The release has an invalid value: {e}")
+
+    return {
+        "counts": inserted,
+        "updated": updated,
+        "deleted": deleted,
+        "milliseconds": milliseconds,
+    }
+
+
+__all__ = [
+    "snapshot_index",
+    "release_index",
+    "live_index",
+    "json_diff",
+    "diff_indexes",
+    "restore_release_delta",
+]
@@ -1,152 +1,233 @@
 
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
 from metadata.models import System, Interface, Release, Classifier, Relation
-from diagram.models import Diagram, Node, Edge
-from typing import Dict, Any
+from diagram.api.utils.bulk import BULK_BATCH_SIZE
+from diagram.models import Diagram, Node, Edge, delete_querysets
+from metadata.storage import release_snapshot
 
 def serialize_interfaces(system: System):
     out = []
-    interfaces = Interface.objects.filter(system=system)
-    for interface in interfaces:
+    interfaces = Interface.objects.filter(system=system).values_list(
+        "id", "name", "description", "system_id", "actor_id", "data"
+    )
+    for interface_id, name, description, system_id, actor_id, data in interfaces:
         obj = {
-            "id": str(interface.id),
-            "name": str(interface.name),
-            "description": str(interface.description),
-            "system": str(interface.system.id),
-            "actor": str(interface.actor.id),
-            "data": interface.data
+            "id": str(interface_id),
+            "name": str(name),
+            "description": str(description),
+            "system": str(system_id),
+            "actor": str(actor_id) if actor_id else None,
+            "data": data
         }
         out.append(obj)
     return out
 
 
-def serialize_nodes(diagram: Diagram):
+def serialize_nodes(nodes):
+    """Rows of (id, cls_id, cls data, data), see serialize_diagrams"""
     out = []
-    nodes = Node.objects.filter(diagram=diagram)
-    for node in nodes:
+    for node_id, cls_id, cls_data, data in nodes:
         serialized_node = {
-            "id": str(node.id),
+            "id": str(node_id),
             "cls": {
-                "id": str(node.cls.id),
-                "data": node.cls.data,
+                "id": str(cls_id),
+                "data": cls_data,
             },
-            "cls_ptr": str(node.cls.id),
-            "data": node.data,
+            "cls_ptr": str(cls_id),
+            "data": data,
         }
         out.append(serialized_node)
     return out
 
 
-def serialize_edges(diagram: Diagram):
+def serialize_edges(edges, nodes_by_cls):
+    """
+    Rows of (id, rel_id, rel data, source cls_id, target cls_id, data), see serialize_diagrams.
+    The source and target are the diagram's nodes of the relation's classifiers in nodes_by_cls.
+    """
     out = []
-    edges = Edge.objects.filter(diagram=diagram)
-    for edge in edges:
+    for edge_id, rel_id, rel_data, source_id, target_id, data in edges:
+        source, target = nodes_by_cls.get(source_id), nodes_by_cls.get(target_id)
         serialized_edge = {
-            "id": str(edge.id),
+            "id": str(edge_id),
             "rel": {
-                "id": str(edge.rel.id),
-                "data": edge.rel.data,
+                "id": str(rel_id),
+                "data": rel_data,
             },
-            "rel_ptr": str(edge.rel.id),
-            "source_ptr": str(edge.source.id) if edge.source else None,
-            "target_ptr": str(edge.target.id) if edge.target else None,
-            "data": edge.data,
+            "rel_ptr": str(rel_id),
+            "source_ptr": str(source) if source else None,
+            "target_ptr": str(target) if target else None,
+            "data": data,
         }
         out.append(serialized_edge)
     return out
 
 
 def serialize_diagrams(system: System):
+    """
+    The diagrams of the system with their nodes and edges, from three queries however many
+    diagrams, nodes and edges there are. The nodes and edges of all diagrams are read at once
+    as rows joined with their classifier or relation, and grouped by diagram in memory. No model
+    instances are made, the rows are serialised as they come.
+    """
+    nodes_by_diagram = defaultdict(list)
+    # Per diagram classifier id -> node id. Like Edge.source, the first node by primary key wins.
+    node_ids_by_cls = defaultdict(dict)
+    node_rows = Node.objects.filter(diagram__system=system).order_by("pk").values_list(
+        "diagram_id", "id", "cls_id", "cls__data", "data"
+    )
+    for diagram_id, *node in node_rows:
+        nodes_by_diagram[diagram_id].append(node)
+        node_ids_by_cls[diagram_id].setdefault(node[1], node[0])
+
+    edges_by_diagram = defaultdict(list)
+    edge_rows = Edge.objects.filter(diagram__system=system).order_by("pk").values_list(
+        "diagram_id", "id", "rel_id", "rel__data", "rel__source_id", "rel__target_id", "data"
+    )
+    for diagram_id, *edge in edge_rows:
+        edges_by_diagram[diagram_id].append(edge)
+
     out = []
-    diagrams = Diagram.objects.filter(system=system)
-    for diagram in diagrams:
-        serialized_nodes = serialize_nodes(diagram=diagram)
-        serialized_edges = serialize_edges(diagram=diagram)
+    diagrams = Diagram.objects.filter(system=system).values_list("id", "name", "description", "type", "system_id")
+    for diagram_id, name, description, diagram_type, system_id in diagrams:
         obj = {
-            "id": str(diagram.id),
-            "project": str(system.project.id),
-            "name": str(diagram.name),
-            "description": str(diagram.description),
-            "type": str(diagram.type),
-            "system": str(diagram.system.id),
-            "nodes": serialized_nodes,
-            "edges": serialized_edges,
+            "id": str(diagram_id),
+            "project": str(system.project_id),
+            "name": str(name),
+            "description": str(description),
+            "type": str(diagram_type),
+            "system": str(system_id),
+            "nodes": serialize_nodes(nodes_by_diagram[diagram_id]),
+            "edges": serialize_edges(edges_by_diagram[diagram_id], node_ids_by_cls[diagram_id]),
         }
         out.append(obj)
     return out
 
 
-def load_interfaces(system: System, release: Release) -> bool:
-    Interface.objects.filter(system=system).delete()
+class LoadReleaseError(ValueError):
+    pass
+
+
+def release_rows(system: System, release: Release):
+    """
+    The rows of a release as unsaved instances, by model in the order they have to be created.
+    Relations get the classifiers of their edge's nodes from the payload. A classifier or
+    relation shown in several diagrams is one row, the last copy in the payload wins.
+    """
+    diagrams: List[Diagram] = []
+    classifiers: Dict[str, Classifier] = {}
+    nodes: List[Node] = []
+    relations: Dict[str, Relation] = {}
+    edges: List[Edge] = []
+    # Node id -> classifier id, across all diagrams of the release
+    node_classifiers: Dict[str, str] = {}
+    snapshot_diagrams, snapshot_interfaces = release_snapshot(release)
 
     try:
-        for interface in release.interfaces:
-            Interface.objects.create(
-                id = interface['id'],
-                system = system,
-                name = interface['name'],
-                description = interface['description'],
-                actor_id = interface['actor'],
-                data = interface['data']
+        for diagram in snapshot_diagrams:
+            diagrams.append(Diagram(
+                id=diagram['id'],
+                type=diagram['type'],
+                name=diagram['name'],
+                description=diagram['description'],
+                system_id=system.id,
+            ))
+            for node in diagram['nodes']:
+                cls_id = str(node['cls']['id'])
+                classifiers[cls_id] = Classifier(id=cls_id, system_id=system.id, data=node['cls']['data'])
+                nodes.append(Node(id=node['id'], diagram_id=diagram['id'], cls_id=cls_id, data=node['data']))
+                node_classifiers[str(node['id'])] = cls_id
+
+        for diagram in snapshot_diagrams:
+            for edge in diagram['edges']:
+                source = node_classifiers.get(str(edge['source_ptr']))
+                target = node_classifiers.get(str(edge['target_ptr']))
+                if source is None or target is None:
+                    raise LoadReleaseError(f"Edge {edge['id']} connects a node that is not part of the release")
+                rel_id = str(edge['rel']['id'])
+                relations[rel_id] = Relation(
+                    id=rel_id, system_id=system.id, data=edge['rel']['data'], source_id=source, target_id=target
+                )
+                edges.append(Edge(id=edge['id'], diagram_id=diagram['id'], rel_id=rel_id, data=edge['data']))
+
+        interfaces = [
+            Interface(
+                id=interface['id'],
+                system_id=system.id,
+                name=interface['name'],
+                description=interface['description'],
+                actor_id=interface['actor'],
+                data=interface['data'],
             )
-    except:
-        return False
-    return True
-
-
-def load_nodes(system: System, diagram: Dict[str, Any]):
-    Node.objects.filter(diagram_id=diagram['id']).delete()
-    for node in diagram['nodes']:
-        Classifier.objects.create(
-            id = node['cls']['id'],
-            system = system,
-            data = node['cls']['data']
-        )
-        Node.objects.create(
-            id = node['id'],
-            diagram_id = diagram['id'],
-            cls_id = node['cls']['id'],
-            data = node['data'],
-        )
-
-
-def load_edges(system: System, diagram: Dict[str, Any]):
-    Edge.objects.filter(diagram_id=diagram['id']).delete()
-    for edge in diagram['edges']:
-        source_node = Node.objects.get(id=edge['source_ptr'])
-        target_node = Node.objects.get(id=edge['target_ptr'])
-        Relation.objects.create(
-            id = edge['rel']['id'],
-            system = system,
-            data = edge['rel']['data'],
-            source = source_node.cls,
-            target = target_node.cls
-        )
-        Edge.objects.create(
-            id = edge['id'],
-            diagram_id = diagram['id'],
-            rel_id = edge['rel']['id'],
-            source = source_node.cls,
-            target = target_node.cls,
-            data = edge['data'],
-        )
-
-
-def load_diagrams(system: System, release: Release) -> bool:
+            for interface in snapshot_interfaces
+        ]
+    except (KeyError, TypeError) as e:
+        raise LoadReleaseError(f"The release is missing {e}")
+
+    return {
+        Diagram: diagrams,
+        Classifier: list(classifiers.values()),
+        Node: nodes,
+        Relation: list(relations.values()),
+        Edge: edges,
+        Interface: interfaces,
+    }
+
+
+def clear_system(system: System):
+    """Delete the diagrams, classifiers, relations and interfaces of the system with set based DELETEs"""
     Diagram.objects.filter(system=system).delete()
-    Classifier.objects.filter(system=system).delete()
-    Relation.objects.filter(system=system).delete()
-
+    classifiers = Classifier.objects.filter(system=system)
+    relations = Relation.objects.filter(Q(system=system) | Q(source__in=classifiers) | Q(target__in=classifiers))
+    # Whatever another system's diagrams or interfaces still show of this one
+    delete_querysets(
+        Interface.objects.filter(Q(system=system) | Q(actor__in=classifiers)),
+        Edge.objects.filter(rel__in=relations),
+        Node.objects.filter(cls__in=classifiers),
+        relations,
+        classifiers,
+    )
+
+
+def restore_release(system: System, release: Release, batch_size: int = BULK_BATCH_SIZE):
+    """
+    Replace the diagrams, classifiers, relations and interfaces of the system with those of the
+    release, in one transaction: nothing changes if any of it fails. The rows are written with
+    bulk_create in dependency order. Returns the number of rows per model and the milliseconds
+    each step took. Raises LoadReleaseError for a payload that cannot be restored.
+    """
+    milliseconds: Dict[str, float] = {}
+    start = time.perf_counter()
+
+    def step(name):
+        nonlocal start
+        now = time.perf_counter()
+        milliseconds[name] = round((now - start) * 1000, 1)
+        start = now
+
+    rows = release_rows(system, release)
+    step("payload")
     try:
-        for diagram in release.diagrams:
-            Diagram.objects.create(
-                id = diagram['id'],
-                type = diagram['type'],
-                name = diagram['name'],
-                description = diagram['description'],
-                system = system
-            )
-            load_nodes(system, diagram)
-            load_edges(system, diagram)
-    except:
-        return False
-    return True
+        with transaction.atomic():
+            clear_system(system)
+            step("delete")
+            for model, objs in rows.items():
+                model.objects.bulk_create(objs, batch_size=batch_size)
+                step(model._meta.model_name)
+            System.bump_relations_version(system.id)
+    except IntegrityError as e:
+        raise LoadReleaseError(f"The release does not match the database: {e}")
+    except (ValidationError, ValueError) as e:
+        raise LoadReleaseError(f"The release has an invalid value: {e}")
+
+    return {
+        "counts": {model._meta.model_name: len(objs) for model, objs in rows.items()},
+        "milliseconds": milliseconds,
+    }
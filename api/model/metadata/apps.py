@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MetadataConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "metadata"
+
+    def ready(self):
+        # Connects the signal that releases the chunks of deleted releases
+        import metadata.storage  # noqa: F401
@@ -0,0 +1,90 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from diagram.models import Diagram, Edge, Node
+from metadata.api.views.utils.diff import restore_release_delta
+from metadata.api.views.utils.releases import restore_release, serialize_diagrams, serialize_interfaces
+from metadata.management.commands.benchmark_release_snapshot import populate
+from metadata.models import Classifier, Interface, Project, Relation, Release, System
+
+
+def load_one_by_one(system, release):
+    """The restore as it was done before, one create per row and two node lookups per edge"""
+    Diagram.objects.filter(system=system).delete()
+    Classifier.objects.filter(system=system).delete()
+    Relation.objects.filter(system=system).delete()
+    for diagram in release.diagrams:
+        Diagram.objects.create(id=diagram['id'], type=diagram['type'], name=diagram['name'],
+                               description=diagram['description'], system=system)
+        for node in diagram['nodes']:
+            Classifier.objects.create(id=node['cls']['id'], system=system, data=node['cls']['data'])
+            Node.objects.create(id=node['id'], diagram_id=diagram['id'], cls_id=node['cls']['id'], data=node['data'])
+        for edge in diagram['edges']:
+            source_node = Node.objects.get(id=edge['source_ptr'])
+            target_node = Node.objects.get(id=edge['target_ptr'])
+            Relation.objects.create(id=edge['rel']['id'], system=system, data=edge['rel']['data'],
+                                    source=source_node.cls, target=target_node.cls)
+            Edge.objects.create(id=edge['id'], diagram_id=diagram['id'], rel_id=edge['rel']['id'],
+                                source=source_node.cls, target=target_node.cls, data=edge['data'])
+    Interface.objects.filter(system=system).delete()
+    for interface in release.interfaces:
+        Interface.objects.create(id=interface['id'], system=system, name=interface['name'],
+                                 description=interface['description'], actor_id=interface['actor'],
+                                 data=interface['data'])
+
+
+class Command(BaseCommand):
+    help = ("Records query count and wall time of loading releases of growing size, row by row, in bulk and as "
+            "a delta of a system that changed in a few classifiers since the release")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--classifiers", type=int, nargs="+", default=[100, 1000, 5000])
+        parser.add_argument("--diagram_size", type=int, default=500)
+        parser.add_argument("--legacy_max", type=int, default=1000,
+                            help="skip the row by row load for releases with more classifiers than this")
+        parser.add_argument("--changed", type=int, default=10,
+                            help="classifiers renamed in the system after the release was taken")
+
+    def measure(self, system, release, loader):
+        """Load the release in a transaction that is rolled back afterwards, returns (seconds, queries)"""
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with transaction.atomic(), connection.execute_wrapper(count_query):
+            start = time.perf_counter()
+            loader(system, release)
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        return elapsed, len(queries)
+
+    def handle(self, *args, **options):
+        project = Project.objects.create(name="Release benchmark", description="")
+        try:
+            self.stdout.write(f"{'classifiers':>12}{'edges':>8}  {'load':<12}{'queries':>9}{'time':>12}")
+            for classifier_count in options["classifiers"]:
+                system = System.objects.create(project=project, name="Release benchmark", description="")
+                populate(system, classifier_count, options["diagram_size"], 0.01)
+                release = Release(project=project, system=system, name="Benchmark", metadata={}, release_notes={},
+                                  diagrams=serialize_diagrams(system), interfaces=serialize_interfaces(system))
+                edge_count = sum(len(diagram["edges"]) for diagram in release.diagrams)
+
+                changed = list(system.classifiers.order_by("pk")[:options["changed"]])
+                for classifier in changed:
+                    classifier.data = {**classifier.data, "name": f"{classifier.name} changed"}
+                Classifier.objects.bulk_update(changed, ["data"])
+
+                runs = {"bulk": restore_release, "delta": restore_release_delta}
+                if classifier_count <= options["legacy_max"]:
+                    runs = {"row by row": load_one_by_one, **runs}
+                for name, loader in runs.items():
+                    elapsed, queries = self.measure(system, release, loader)
+                    self.stdout.write(
+                        f"{classifier_count:>12}{edge_count:>8}  {name:<12}{queries:>9}{elapsed * 1000:10.1f}ms"
+                    )
+        finally:
+            project.delete()
@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from diagram.api.utils import bulk_import_elements
+from diagram.management.commands.benchmark_diagram_import import synthetic_payload
+from diagram.models import Diagram
+from metadata.api.views.utils.releases import serialize_diagrams, serialize_interfaces
+from metadata.models import Interface, Project, System
+
+
+def populate(system, classifier_count, diagram_size, interface_share):
+    """Diagrams of at most diagram_size classes, and interfaces for a share of the classes"""
+    for start in range(0, classifier_count, diagram_size):
+        diagram = Diagram.objects.create(name=f"Diagram {start}", system=system, type="classes")
+        body = synthetic_payload(system.id, min(diagram_size, classifier_count - start))
+        bulk_import_elements(diagram, body.nodes, body.edges)
+
+    actors = system.classifiers.order_by("pk")[: max(1, int(classifier_count * interface_share))]
+    Interface.objects.bulk_create([
+        Interface(system=system, name=f"Interface {i}", description="", actor=actor, data={})
+        for i, actor in enumerate(actors)
+    ])
+
+
+class Command(BaseCommand):
+    help = "Records query count and wall time of serialising the snapshot of a release for systems of growing size"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--classifiers", type=int, nargs="+", default=[10, 100, 1000, 5000])
+        parser.add_argument("--diagram_size", type=int, default=500)
+        parser.add_argument("--interfaces", type=float, default=0.01,
+                            help="interfaces per classifier")
+
+    def measure(self, system):
+        """Serialise the diagrams and interfaces like create_release does, returns (seconds, queries)"""
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_query):
+            start = time.perf_counter()
+            serialize_diagrams(system=system)
+            serialize_interfaces(system=system)
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries)
+
+    def handle(self, *args, **options):
+        project = Project.objects.create(name="Release benchmark", description="")
+        try:
+            self.stdout.write(f"{'classifiers':>12}{'diagrams':>10}{'edges':>8}{'queries':>9}{'time':>12}")
+            for classifier_count in options["classifiers"]:
+                with transaction.atomic():
+                    system = System.objects.create(project=project, name="Release benchmark", description="")
+                    populate(system, classifier_count, options["diagram_size"], options["interfaces"])
+                    elapsed, queries = self.measure(system)
+                    self.stdout.write(
+                        f"{classifier_count:>12}{system.diagrams.count():>10}{system.relations.count():>8}"
+                        f"{queries:>9}{elapsed * 1000:10.1f}ms"
+                    )
+                    transaction.set_rollback(True)
+        finally:
+            project.delete()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from metadata.models import Release, ReleaseChunk
+from metadata.storage import pack_release
+
+
+class Command(BaseCommand):
+    help = "Moves the full snapshot copies of releases from before manifests into shared compressed chunks"
+
+    def handle(self, *args, **options):
+        packed = 0
+        for release_id in Release.objects.filter(manifest__isnull=True).values_list("id", flat=True):
+            packed += pack_release(Release.objects.get(id=release_id))
+        self.stdout.write(f"Packed {packed} releases, {ReleaseChunk.objects.count()} chunks are stored")
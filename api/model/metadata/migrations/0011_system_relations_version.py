@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 11:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0010_release_release_notes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='system',
+            name='relations_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
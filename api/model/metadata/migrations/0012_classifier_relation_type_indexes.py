@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 11:12
+
+import django.db.models.fields.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0011_system_relations_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classifier',
+            index=models.Index(models.F('system'), django.db.models.fields.json.KeyTextTransform('type', 'data'), name='classifier_system_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='relation',
+            index=models.Index(models.F('system'), django.db.models.fields.json.KeyTextTransform('type', 'data'), name='relation_system_type_idx'),
+        ),
+    ]
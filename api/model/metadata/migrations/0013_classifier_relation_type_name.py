@@ -0,0 +1,78 @@
+# Generated by Django 5.2 on 2026-10-18 11:15
+
+from django.db import migrations, models
+from django.db.models import CharField, Value
+from django.db.models.fields.json import KT
+from django.db.models.functions import Coalesce, Left
+
+
+def column_from_data(key):
+    """data[key] as text, cut off at the column length, '' where it is missing"""
+    return Left(Coalesce(KT(f"data__{key}"), Value(""), output_field=CharField()), 255)
+
+
+def backfill_type_and_name(apps, schema_editor):
+    # One UPDATE per table, the rows are not loaded
+    Classifier = apps.get_model("metadata", "Classifier")
+    Classifier.objects.update(type=column_from_data("type"), name=column_from_data("name"))
+    Relation = apps.get_model("metadata", "Relation")
+    Relation.objects.update(type=column_from_data("type"), name=column_from_data("label"))
+
+
+def reverse_func(*_, **__):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0012_classifier_relation_type_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='classifier',
+            name='classifier_system_type_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='relation',
+            name='relation_system_type_idx',
+        ),
+        migrations.AddField(
+            model_name='classifier',
+            name='name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='classifier',
+            name='type',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='relation',
+            name='name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='relation',
+            name='type',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.RunPython(backfill_type_and_name, reverse_func),
+        migrations.AddIndex(
+            model_name='classifier',
+            index=models.Index(fields=['system', 'type'], name='classifier_system_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classifier',
+            index=models.Index(fields=['system', 'name'], name='classifier_system_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='relation',
+            index=models.Index(fields=['system', 'type'], name='relation_system_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='relation',
+            index=models.Index(fields=['system', 'name'], name='relation_system_name_idx'),
+        ),
+    ]
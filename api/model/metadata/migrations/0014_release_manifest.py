@@ -0,0 +1,41 @@
+# Generated by Django 5.2 on 2026-10-18 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('metadata', '0013_classifier_relation_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReleaseChunk',
+            fields=[
+                ('digest', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('references', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='release',
+            name='manifest',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AddField(
+            model_name='release',
+            name='summary',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AlterField(
+            model_name='release',
+            name='diagrams',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='release',
+            name='interfaces',
+            field=models.JSONField(null=True),
+        ),
+    ]
@@ -1,6 +1,7 @@
 import uuid
 
 from django.db import models
+from django.db.models import F
 
 
 class Project(models.Model):
@@ -14,6 +15,12 @@ class System(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
     description = models.TextField()
+    # Incremented whenever relations, or the nodes of its diagrams, are added or removed
+    relations_version = models.PositiveIntegerField(default=0)
+
+    @staticmethod
+    def bump_relations_version(system_id):
+        System.objects.filter(pk=system_id).update(relations_version=F("relations_version") + 1)
 
 
 class Release(models.Model):
@@ -22,18 +29,101 @@ class Release(models.Model):
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
     system = models.ForeignKey(System, on_delete=models.CASCADE)
     name = models.CharField(max_length=255)
-    diagrams = models.JSONField()
+    # Full copies of the snapshot, only kept for releases from before manifests
+    diagrams = models.JSONField(null=True)
     metadata = models.JSONField()
-    interfaces = models.JSONField()
+    interfaces = models.JSONField(null=True)
     release_notes = models.JSONField()
+    # The snapshot with classifier and relation data replaced by ReleaseChunk digests,
+    # see metadata.storage
+    manifest = models.JSONField(null=True)
+    # Counts of the snapshot's elements, listed without loading the snapshot
+    summary = models.JSONField(default=dict)
+
+
+class ReleaseChunk(models.Model):
+    """A part of release snapshots stored once per content and compressed, see metadata.storage"""
+    digest = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    # Number of releases whose manifest points at the chunk, it is deleted at zero
+    references = models.PositiveIntegerField(default=0)
+
+
+# Length of the type and name columns, longer names are cut off there
+DATA_COLUMN_LENGTH = 255
+
+
+class TypedQuerySet(models.QuerySet):
+    """Keeps the type and name columns in sync with data on bulk writes"""
+
+    def of_type(self, *types):
+        return self.filter(type__in=types)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.sync_data_columns()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if "data" in fields:
+            for obj in objs:
+                obj.sync_data_columns()
+            fields = [*fields, "type", "name"]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        if isinstance(kwargs.get("data"), dict):
+            kwargs.update(self.model.data_columns(kwargs["data"]))
+        return super().update(**kwargs)
 
 
-class Classifier(models.Model):
+class DataColumnsMixin:
+    """
+    The type and name of a classifier or relation are copied out of data into indexed columns, so
+    that they are filtered and sorted on without loading and parsing the JSON
+    """
+
+    # The key of data copied into the name column
+    name_key = "name"
+
+    @classmethod
+    def data_columns(cls, data):
+        return {
+            "type": str(data.get("type") or "")[:DATA_COLUMN_LENGTH],
+            "name": str(data.get(cls.name_key) or "")[:DATA_COLUMN_LENGTH],
+        }
+
+    def sync_data_columns(self):
+        for column, value in self.data_columns(self.data).items():
+            setattr(self, column, value)
+
+    def save(self, *args, **kwargs):
+        self.sync_data_columns()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "data" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "type", "name"}
+        super().save(*args, **kwargs)
+
+
+class Classifier(DataColumnsMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     system = models.ForeignKey(
         System, on_delete=models.CASCADE, related_name="classifiers"
     )
     data = models.JSONField()
+    # Copies of data['type'] and data['name']
+    type = models.CharField(max_length=DATA_COLUMN_LENGTH, blank=True, default="")
+    name = models.CharField(max_length=DATA_COLUMN_LENGTH, blank=True, default="")
+
+    objects = TypedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["system", "type"], name="classifier_system_type_idx"),
+            models.Index(fields=["system", "name"], name="classifier_system_name_idx"),
+        ]
 
 
 class Interface(models.Model):
@@ -45,7 +135,7 @@ class Interface(models.Model):
     data = models.JSONField(default=dict)
 
 
-class Relation(models.Model):
+class Relation(DataColumnsMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     data = models.JSONField()
     system = models.ForeignKey(
@@ -57,3 +147,16 @@ class Relation(models.Model):
     target = models.ForeignKey(
         Classifier, related_name="relations_from", on_delete=models.CASCADE
     )
+    # Copies of data['type'] and data['label'], the name of a relation
+    type = models.CharField(max_length=DATA_COLUMN_LENGTH, blank=True, default="")
+    name = models.CharField(max_length=DATA_COLUMN_LENGTH, blank=True, default="")
+
+    objects = TypedQuerySet.as_manager()
+
+    name_key = "label"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["system", "type"], name="relation_system_type_idx"),
+            models.Index(fields=["system", "name"], name="relation_system_name_idx"),
+        ]
@@ -0,0 +1,242 @@
+"""
+Release storage. A release keeps a manifest of its snapshot: the diagrams with the digests of
+their node and edge lists, which hold the digests of the classifier and relation data. Every
+list and data is stored once per content as a zlib compressed ReleaseChunk, shared by all
+releases that contain it, so a release of a system that barely changed adds little more than
+its manifest and the chunks of what changed.
+"""
+import hashlib
+import json
+import os
+import zlib
+from typing import Any, Dict, List, Tuple
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from metadata.models import Release, ReleaseChunk
+
+MANIFEST_FORMAT = 1
+
+CHUNK_COMPRESSION_LEVEL = int(os.environ.get("RELEASE_CHUNK_COMPRESSION_LEVEL", 6))
+
+# Rows per INSERT of new chunks
+CHUNK_BATCH_SIZE = 1000
+
+
+def encode_chunk(data) -> Tuple[str, bytes]:
+    """The sha256 digest and canonical JSON of a chunk, equal data gives equal bytes"""
+    encoded = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode()
+    return hashlib.sha256(encoded).hexdigest(), encoded
+
+
+def pack_snapshot(diagrams: List[Dict[str, Any]], interfaces: List[Dict[str, Any]]):
+    """
+    Split serialised diagrams and interfaces into a manifest and its chunks. The nodes and the
+    edges of every diagram and the interfaces are chunks too, which point at the chunks of their
+    classifier and relation data, so a diagram that did not change is shared as a whole.
+    Returns the manifest, a digest -> canonical JSON map of all chunks and the summary.
+    """
+    chunks: Dict[str, bytes] = {}
+
+    def chunk(data):
+        digest, encoded = encode_chunk(data)
+        chunks[digest] = encoded
+        return digest
+
+    manifest_diagrams = []
+    for diagram in diagrams:
+        nodes = [
+            {
+                "id": node["id"],
+                "cls_id": node["cls"]["id"],
+                "cls": chunk(node["cls"]["data"]),
+                "data": node["data"],
+            }
+            for node in diagram["nodes"]
+        ]
+        edges = [
+            {
+                "id": edge["id"],
+                "rel_id": edge["rel"]["id"],
+                "rel": chunk(edge["rel"]["data"]),
+                "source_ptr": edge["source_ptr"],
+                "target_ptr": edge["target_ptr"],
+                "data": edge["data"],
+            }
+            for edge in diagram["edges"]
+        ]
+        manifest_diagrams.append({**diagram, "nodes": chunk(nodes), "edges": chunk(edges)})
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "diagrams": manifest_diagrams,
+        "interfaces": chunk(interfaces),
+    }
+    summary = {
+        "diagrams": len(diagrams),
+        "nodes": sum(len(diagram["nodes"]) for diagram in diagrams),
+        "edges": sum(len(diagram["edges"]) for diagram in diagrams),
+        "interfaces": len(interfaces),
+        "chunks": len(chunks),
+    }
+    return manifest, chunks, summary
+
+
+def lock_chunks(digests):
+    """Lock the stored chunks of the digests in digest order, so concurrent releases do not deadlock"""
+    return set(
+        ReleaseChunk.objects.select_for_update().filter(digest__in=digests).order_by("digest")
+        .values_list("digest", flat=True)
+    )
+
+
+def store_chunks(chunks: Dict[str, bytes]):
+    """
+    Add a reference to each chunk for a new release, compressing and inserting the chunks
+    that are not stored yet. The chunks are locked before they are counted, so a release that
+    is deleted at the same time cannot delete them, and a chunk another release inserted or
+    deleted in the meantime is found again. Returns the number of chunks that were missing.
+    """
+    inserted = 0
+    with transaction.atomic():
+        stored = set(ReleaseChunk.objects.filter(digest__in=chunks).values_list("digest", flat=True))
+        while True:
+            new = [
+                ReleaseChunk(digest=digest, data=zlib.compress(encoded, CHUNK_COMPRESSION_LEVEL), references=0)
+                for digest, encoded in chunks.items()
+                if digest not in stored
+            ]
+            # Another release may insert the same chunk first
+            ReleaseChunk.objects.bulk_create(new, batch_size=CHUNK_BATCH_SIZE, ignore_conflicts=True)
+            inserted += len(new)
+            # Locked chunks stay until this release is committed, chunks deleted before are inserted again
+            stored = lock_chunks(chunks)
+            if len(stored) == len(chunks):
+                break
+        ReleaseChunk.objects.filter(digest__in=chunks).update(references=F("references") + 1)
+    return inserted
+
+
+def release_chunks(digests) -> Dict[str, Any]:
+    """digest -> data of the chunks, loaded with one query"""
+    return {
+        digest: json.loads(zlib.decompress(data))
+        for digest, data in ReleaseChunk.objects.filter(digest__in=digests).values_list("digest", "data")
+    }
+
+
+def manifest_lists(manifest) -> Dict[str, Any]:
+    """digest -> data of the node and edge lists of a manifest"""
+    return release_chunks([diagram[key] for diagram in manifest["diagrams"] for key in ("nodes", "edges")])
+
+
+def manifest_chunks(manifest) -> Dict[str, Any]:
+    """digest -> data of every chunk of a manifest, the node, edge and interface lists first"""
+    chunks = manifest_lists(manifest)
+    chunks.update(release_chunks([manifest["interfaces"]]))
+
+    data = set()
+    for diagram in manifest["diagrams"]:
+        data.update(node["cls"] for node in chunks[diagram["nodes"]])
+        data.update(edge["rel"] for edge in chunks[diagram["edges"]])
+    chunks.update(release_chunks(data))
+    return chunks
+
+
+def manifest_digests(manifest):
+    """The digests of every chunk of a manifest, only the node and edge lists are read"""
+    lists = manifest_lists(manifest)
+    digests = {manifest["interfaces"], *lists}
+    for diagram in manifest["diagrams"]:
+        digests.update(node["cls"] for node in lists[diagram["nodes"]])
+        digests.update(edge["rel"] for edge in lists[diagram["edges"]])
+    return digests
+
+
+def unpack_manifest(manifest, chunks: Dict[str, Any]):
+    """The serialised diagrams and interfaces of a manifest, as serialize_diagrams made them"""
+    diagrams = []
+    for diagram in manifest["diagrams"]:
+        nodes = [
+            {
+                "id": node["id"],
+                "cls": {"id": node["cls_id"], "data": chunks[node["cls"]]},
+                "cls_ptr": node["cls_id"],
+                "data": node["data"],
+            }
+            for node in chunks[diagram["nodes"]]
+        ]
+        edges = [
+            {
+                "id": edge["id"],
+                "rel": {"id": edge["rel_id"], "data": chunks[edge["rel"]]},
+                "rel_ptr": edge["rel_id"],
+                "source_ptr": edge["source_ptr"],
+                "target_ptr": edge["target_ptr"],
+                "data": edge["data"],
+            }
+            for edge in chunks[diagram["edges"]]
+        ]
+        diagrams.append({**diagram, "nodes": nodes, "edges": edges})
+    return diagrams, chunks[manifest["interfaces"]]
+
+
+def release_snapshot(release: Release):
+    """
+    The serialised diagrams and interfaces of a release, from its manifest and chunks or from
+    the full copies of a release from before manifests. Kept on the instance after the first call.
+    """
+    snapshot = getattr(release, "_snapshot", None)
+    if snapshot is None:
+        if release.manifest is None:
+            snapshot = (release.diagrams, release.interfaces)
+        else:
+            snapshot = unpack_manifest(release.manifest, manifest_chunks(release.manifest))
+        release._snapshot = snapshot
+    return snapshot
+
+
+def create_release(diagrams, interfaces, **fields) -> Release:
+    """Store a release of the serialised diagrams and interfaces as a manifest and chunks"""
+    manifest, chunks, summary = pack_snapshot(diagrams, interfaces)
+    with transaction.atomic():
+        store_chunks(chunks)
+        release = Release.objects.create(manifest=manifest, summary=summary, **fields)
+    release._snapshot = (diagrams, interfaces)
+    return release
+
+
+def pack_release(release: Release):
+    """Move the full copies of a release from before manifests into a manifest and chunks"""
+    if release.manifest is not None:
+        return False
+    manifest, chunks, summary = pack_snapshot(release.diagrams or [], release.interfaces or [])
+    with transaction.atomic():
+        store_chunks(chunks)
+        release.manifest, release.summary = manifest, summary
+        release.diagrams = release.interfaces = None
+        release.save(update_fields=["manifest", "summary", "diagrams", "interfaces"])
+    return True
+
+
+@receiver(post_delete, sender=Release)
+def release_chunks_deleted(sender, instance, **kwargs):
+    """Drop the release's references to its chunks and delete the chunks no release points at"""
+    if instance.manifest is None:
+        return
+    digests = manifest_digests(instance.manifest)
+    with transaction.atomic():
+        lock_chunks(digests)
+        ReleaseChunk.objects.filter(digest__in=digests).update(references=F("references") - 1)
+        ReleaseChunk.objects.filter(digest__in=digests, references=0).delete()
+
+
+__all__ = [
+    "create_release",
+    "pack_release",
+    "release_snapshot",
+    "store_chunks",
+]
@@ -1 +1,430 @@
-# Create your tests here.
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+
+from diagram.models import Diagram, Edge, Node
+from metadata.api.views.utils.diff import diff_indexes, json_diff, live_index, release_index, restore_release_delta
+from metadata.api.views.utils.releases import restore_release, serialize_diagrams, serialize_interfaces
+from metadata.models import Classifier, Interface, Project, Relation, Release, ReleaseChunk, System
+from metadata import storage
+from metadata.storage import create_release, release_snapshot
+from model.auth import create_token
+
+
+@skipUnless(connection.vendor == "postgresql", "the expression indexes are planned for PostgreSQL")
+class TypeIndexTests(TestCase):
+    """The queries of of_type use the (system, type) indexes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        project = Project.objects.create(name="Project", description="")
+        cls.system = System.objects.create(project=project, name="System", description="")
+        classifiers = Classifier.objects.bulk_create([
+            Classifier(system=cls.system, data={"type": "class" if i % 2 else "enum", "name": f"C{i}"})
+            for i in range(200)
+        ])
+        Relation.objects.bulk_create([
+            Relation(system=cls.system, data={"type": "association"}, source=source, target=target)
+            for source, target in zip(classifiers, classifiers[1:])
+        ])
+
+    def explain(self, queryset):
+        # The tables are too small for the planner to prefer an index on its own
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def test_classifier_of_type_uses_index(self):
+        plan = self.explain(self.system.classifiers.of_type("class"))
+        self.assertIn("classifier_system_type_idx", plan)
+
+    def test_relation_of_types_uses_index(self):
+        plan = self.explain(self.system.relations.of_type("association", "generalization"))
+        self.assertIn("relation_system_type_idx", plan)
+
+    def test_name_uses_index(self):
+        plan = self.explain(self.system.classifiers.filter(name="C1"))
+        self.assertIn("classifier_system_name_idx", plan)
+
+    def test_of_type_matches_data_type(self):
+        self.assertEqual(
+            set(self.system.classifiers.of_type("class")),
+            set(self.system.classifiers.filter(data__type="class")),
+        )
+
+
+class DataColumnsTests(TestCase):
+    """type and name follow data on every way classifiers and relations are written"""
+
+    @classmethod
+    def setUpTestData(cls):
+        project = Project.objects.create(name="Project", description="")
+        cls.system = System.objects.create(project=project, name="System", description="")
+
+    def test_save(self):
+        classifier = Classifier.objects.create(system=self.system, data={"type": "class", "name": "Order"})
+        self.assertEqual((classifier.type, classifier.name), ("class", "Order"))
+
+        classifier.data = {"type": "enum", "name": "Status"}
+        classifier.save(update_fields=["data"])
+        classifier.refresh_from_db()
+        self.assertEqual((classifier.type, classifier.name), ("enum", "Status"))
+
+    def test_bulk_create_and_update(self):
+        source, target = Classifier.objects.bulk_create([
+            Classifier(system=self.system, data={"type": "class", "name": "A"}),
+            Classifier(system=self.system, data={"type": "class"}),
+        ])
+        relation = Relation.objects.bulk_create([
+            Relation(system=self.system, data={"type": "association", "label": "has"}, source=source, target=target)
+        ])[0]
+        self.assertEqual((target.type, target.name), ("class", ""))
+        self.assertEqual((relation.type, relation.name), ("association", "has"))
+
+        source.data = {"type": "class", "name": "B"}
+        Classifier.objects.bulk_update([source], ["data"])
+        Relation.objects.filter(pk=relation.pk).update(data={"type": "dependency", "label": ""})
+        self.assertEqual(Classifier.objects.get(pk=source.pk).name, "B")
+        self.assertEqual(
+            Relation.objects.values_list("type", "name").get(pk=relation.pk), ("dependency", "")
+        )
+
+
+class ReleaseSnapshotTests(TestCase):
+    """A system is serialised for a release with the same queries whatever its size"""
+
+    def create_system(self, size):
+        project = Project.objects.create(name="Project", description="")
+        system = System.objects.create(project=project, name=f"System {size}", description="")
+        for d in range(2):
+            diagram = Diagram.objects.create(system=system, name=f"Diagram {d}", type="classes")
+            classifiers = Classifier.objects.bulk_create([
+                Classifier(system=system, data={"type": "class", "name": f"C{d}.{i}"}) for i in range(size)
+            ])
+            Node.objects.bulk_create([
+                Node(diagram=diagram, cls=classifier, data={"position": {"x": 0, "y": 0}}) for classifier in classifiers
+            ])
+            relations = Relation.objects.bulk_create([
+                Relation(system=system, source=source, target=target, data={"type": "association"})
+                for source, target in zip(classifiers, classifiers[1:])
+            ])
+            Edge.objects.bulk_create([Edge(diagram=diagram, rel=relation, data={}) for relation in relations])
+        Interface.objects.bulk_create([
+            Interface(system=system, name="With actor", description="", actor=classifiers[0], data={}),
+            Interface(system=system, name="Without actor", description="", actor=None, data={}),
+        ])
+        return system
+
+    def test_constant_queries(self):
+        for size in (5, 50):
+            system = self.create_system(size)
+            with self.subTest(size=size), self.assertNumQueries(4):
+                diagrams = serialize_diagrams(system)
+                serialize_interfaces(system)
+            self.assertEqual(sum(len(diagram["nodes"]) for diagram in diagrams), 2 * size)
+            self.assertEqual(sum(len(diagram["edges"]) for diagram in diagrams), 2 * (size - 1))
+
+    def test_interface_without_actor(self):
+        system = self.create_system(3)
+        interfaces = serialize_interfaces(system)
+        actors = {interface["name"]: interface["actor"] for interface in interfaces}
+        self.assertEqual(actors, {"With actor": str(Interface.objects.get(name="With actor").actor_id),
+                                  "Without actor": None})
+
+        release = create_release(serialize_diagrams(system), interfaces, name="First", project=system.project,
+                                 system=system, metadata={}, release_notes={})
+        restore_release(system, Release.objects.get(pk=release.pk))
+        self.assertIsNone(Interface.objects.get(system=system, name="Without actor").actor_id)
+        report = restore_release_delta(system, Release.objects.get(pk=release.pk))
+        self.assertEqual(set(report["updated"].values()), {0})
+
+
+class ReleaseStorageTests(TestCase):
+    """Releases are stored as manifests of shared chunks and read back as they were serialised"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(name="Project", description="")
+        cls.system = System.objects.create(project=cls.project, name="System", description="")
+
+    def snapshot(self, name):
+        def node(i):
+            return {
+                "id": f"n{i}", "cls": {"id": f"c{i}", "data": {"type": "class", "name": name if i == 0 else f"C{i}"}},
+                "cls_ptr": f"c{i}", "data": {"position": {"x": i, "y": 0}},
+            }
+
+        edge = {
+            "id": "e0", "rel": {"id": "r0", "data": {"type": "association", "label": ""}},
+            "rel_ptr": "r0", "source_ptr": "n0", "target_ptr": "n1", "data": {},
+        }
+        diagrams = [{"id": "d0", "name": "Diagram", "nodes": [node(i) for i in range(3)], "edges": [edge]}]
+        return diagrams, [{"id": "i0", "name": "Interface", "actor": "c0", "data": {}}]
+
+    def create(self, name):
+        diagrams, interfaces = self.snapshot(name)
+        return create_release(diagrams, interfaces, name=name, project=self.project, system=self.system,
+                              metadata={}, release_notes={})
+
+    def test_round_trip(self):
+        release = self.create("First")
+        self.assertIsNone(release.diagrams)
+        self.assertEqual(release_snapshot(Release.objects.get(pk=release.pk)), self.snapshot("First"))
+        self.assertEqual(release.summary["nodes"], 3)
+
+    def test_chunks_are_shared_and_deleted_with_the_last_release(self):
+        first = self.create("First")
+        stored = ReleaseChunk.objects.count()
+        second = self.create("Second")
+        # A changed classifier, the node list pointing at it, the interfaces and edges are shared
+        self.assertEqual(ReleaseChunk.objects.count(), stored + 2)
+
+        first.delete()
+        self.assertEqual(ReleaseChunk.objects.count(), stored)
+        self.assertEqual(release_snapshot(Release.objects.get(pk=second.pk)), self.snapshot("Second"))
+        second.delete()
+        self.assertFalse(ReleaseChunk.objects.exists())
+
+
+    def test_chunk_inserted_by_another_release(self):
+        _, chunks, _ = storage.pack_snapshot(*self.snapshot("First"))
+        bulk_create = ReleaseChunk.objects.bulk_create
+
+        def insert_after_other_release(objs, **kwargs):
+            # The other release checked for the chunks at the same time and inserts them first
+            with mock.patch.object(ReleaseChunk.objects, "bulk_create", bulk_create):
+                storage.store_chunks(chunks)
+            return bulk_create(objs, **kwargs)
+
+        with mock.patch.object(ReleaseChunk.objects, "bulk_create", side_effect=insert_after_other_release):
+            storage.store_chunks(chunks)
+
+        self.assertEqual(set(ReleaseChunk.objects.values_list("references", flat=True)), {2})
+        self.assertEqual(ReleaseChunk.objects.count(), len(chunks))
+
+    def test_chunk_deleted_by_another_release(self):
+        first = self.create("First")
+        first_pk, deleting = first.pk, [first]
+        lock_chunks = storage.lock_chunks
+
+        def lock_after_delete(digests):
+            # The only other release is deleted after its chunks were found, before they are locked
+            if deleting:
+                deleting.pop().delete()
+            return lock_chunks(digests)
+
+        with mock.patch.object(storage, "lock_chunks", side_effect=lock_after_delete):
+            second = self.create("First")
+
+        self.assertFalse(Release.objects.filter(pk=first_pk).exists())
+        self.assertEqual(set(ReleaseChunk.objects.values_list("references", flat=True)), {1})
+        self.assertEqual(release_snapshot(Release.objects.get(pk=second.pk)), self.snapshot("First"))
+
+    def test_delete_reads_the_node_and_edge_lists_only(self):
+        release = self.create("First")
+        lists = {release.manifest["diagrams"][0]["nodes"], release.manifest["diagrams"][0]["edges"]}
+
+        with mock.patch.object(storage, "release_chunks", wraps=storage.release_chunks) as release_chunks:
+            release.delete()
+
+        self.assertEqual([set(call.args[0]) for call in release_chunks.call_args_list], [lists])
+        self.assertFalse(ReleaseChunk.objects.exists())
+
+
+class ReleaseRestoreTests(TestCase):
+    """Loading a release replaces the system with it, or reports a 422 and leaves the system as it was"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(name="Project", description="")
+        cls.system = System.objects.create(project=cls.project, name="System", description="")
+        order, item = Classifier.objects.bulk_create([
+            Classifier(system=cls.system, data={"type": "class", "name": "Order"}),
+            Classifier(system=cls.system, data={"type": "class", "name": "Item"}),
+        ])
+        relation = Relation.objects.create(system=cls.system, source=order, target=item, data={"type": "composition"})
+        # Both diagrams show the classifiers and their relation
+        for name in ("Orders", "Items"):
+            diagram = Diagram.objects.create(system=cls.system, name=name, type="classes")
+            Node.objects.bulk_create([Node(diagram=diagram, cls=cls_, data={}) for cls_ in (order, item)])
+            Edge.objects.create(diagram=diagram, rel=relation, data={})
+        Interface.objects.create(system=cls.system, name="Shop", description="", actor=order, data={})
+
+    def setUp(self):
+        get_user_model().objects.create_user("releases", "releases@example.com", "releases")
+        _, token = create_token("releases", "releases")
+        self.client = Client(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def release(self, change=None):
+        diagrams, interfaces = serialize_diagrams(self.system), serialize_interfaces(self.system)
+        if change:
+            change(diagrams)
+        return create_release(diagrams, interfaces, name="Release", project=self.project, system=self.system,
+                              metadata={}, release_notes={})
+
+    def load(self, release, delta=False):
+        return self.client.post(f"/api/v1/metadata/releases/{release.id}/load/?delta={str(delta).lower()}")
+
+    def test_round_trip(self):
+        release = self.release()
+        Diagram.objects.filter(name="Items").delete()
+        Classifier.objects.filter(name="Order").update(data={"type": "class", "name": "Purchase"})
+
+        response = self.load(release)
+
+        self.assertEqual(response.status_code, 200)
+        # A classifier and relation shown in two diagrams is restored once
+        self.assertEqual(response.json()["counts"]["classifier"], 2)
+        self.assertEqual(response.json()["counts"]["relation"], 1)
+        self.assertEqual(response.json()["counts"]["node"], 4)
+        self.assertEqual(diff_indexes(release_index(release), live_index(self.system)), {
+            kind: {"added": [], "removed": [], "modified": []}
+            for kind in ("diagrams", "classifiers", "nodes", "relations", "edges", "interfaces")
+        })
+        self.assertEqual(Classifier.objects.filter(system=self.system).count(), 2)
+
+    def assert_not_loaded(self, release, message):
+        before = live_index(self.system)
+        version = System.objects.get(pk=self.system.pk).relations_version
+        for delta in (False, True):
+            with self.subTest(delta=delta):
+                response = self.load(release, delta)
+                self.assertEqual(response.status_code, 422)
+                self.assertIn(message, response.json())
+                self.assertEqual(live_index(self.system), before)
+                self.assertEqual(System.objects.get(pk=self.system.pk).relations_version, version)
+
+    def test_edge_to_missing_node(self):
+        def drop_node(diagrams):
+            diagrams[0]["nodes"].pop()
+            diagrams[1]["nodes"].pop()
+            diagrams[0]["nodes"][0]["cls"]["data"]["name"] = "Changed"
+
+        self.assert_not_loaded(self.release(drop_node), "connects a node that is not part of the release")
+
+    def test_invalid_value(self):
+        def break_id(diagrams):
+            diagrams[0]["id"] = "not a uuid"
+            diagrams[0]["nodes"][0]["cls"]["data"]["name"] = "Changed"
+
+        self.assert_not_loaded(self.release(break_id), "invalid value")
+
+
+class ReleaseDiffTests(TestCase):
+    """Releases and the live system are diffed by element id with the changed fields"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.project = Project.objects.create(name="Project", description="")
+        cls.system = System.objects.create(project=cls.project, name="System", description="")
+        cls.diagram = Diagram.objects.create(system=cls.system, name="Diagram", type="classes")
+        cls.order, cls.item = Classifier.objects.bulk_create([
+            Classifier(system=cls.system, data={"type": "class", "name": "Order", "attributes": []}),
+            Classifier(system=cls.system, data={"type": "class", "name": "Item", "attributes": []}),
+        ])
+        cls.order_node, cls.item_node = Node.objects.bulk_create([
+            Node(diagram=cls.diagram, cls=cls.order, data={"position": {"x": 0, "y": 0}}),
+            Node(diagram=cls.diagram, cls=cls.item, data={"position": {"x": 100, "y": 0}}),
+        ])
+        cls.relation = Relation.objects.create(
+            system=cls.system, source=cls.order, target=cls.item, data={"type": "composition", "label": ""}
+        )
+        Edge.objects.create(diagram=cls.diagram, rel=cls.relation, data={})
+
+    def release(self, name):
+        return create_release(
+            serialize_diagrams(self.system), serialize_interfaces(self.system),
+            name=name, project=self.project, system=self.system, metadata={}, release_notes={},
+        )
+
+    def test_json_diff(self):
+        old = {"name": "Order", "attributes": [{"name": "id"}], "methods": []}
+        new = {"name": "Order", "attributes": [{"name": "key"}], "methods": [{"name": "pay"}], "abstract": True}
+        self.assertEqual(json_diff(old, new), [
+            {"path": ["abstract"], "old": None, "new": True},
+            {"path": ["attributes", 0, "name"], "old": "id", "new": "key"},
+            {"path": ["methods"], "old": [], "new": [{"name": "pay"}]},
+        ])
+
+    def test_unchanged_release_has_no_diff(self):
+        release = self.release("First")
+        diff = diff_indexes(release_index(release), live_index(self.system))
+        self.assertTrue(all(not any(changes.values()) for changes in diff.values()))
+
+    def test_diff_to_live_system(self):
+        release = self.release("First")
+        self.order.data = {**self.order.data, "name": "Purchase"}
+        self.order.save()
+        Node.objects.filter(pk=self.item_node.pk).delete()
+        Relation.objects.filter(pk=self.relation.pk).delete()
+
+        diff = diff_indexes(release_index(release), live_index(self.system))
+
+        self.assertEqual(diff["classifiers"]["modified"], [
+            {"id": str(self.order.id), "changes": [{"path": ["data", "name"], "old": "Order", "new": "Purchase"}]}
+        ])
+        self.assertEqual([node["id"] for node in diff["nodes"]["removed"]], [str(self.item_node.id)])
+        self.assertEqual(diff["relations"]["removed"][0]["source"], str(self.order.id))
+        self.assertEqual(len(diff["edges"]["removed"]), 1)
+        self.assertEqual(diff["nodes"]["added"], [])
+
+    def test_diff_between_releases(self):
+        first = Release.objects.get(pk=self.release("First").pk)
+        Classifier.objects.create(system=self.system, data={"type": "enum", "name": "Status"})
+        node = Node.objects.create(diagram=self.diagram, cls=Classifier.objects.get(name="Status"), data={})
+        second = Release.objects.get(pk=self.release("Second").pk)
+
+        diff = diff_indexes(release_index(first), release_index(second))
+        self.assertEqual(diff["nodes"]["added"], [
+            {"id": str(node.id), "diagram": str(self.diagram.id), "cls": str(node.cls_id), "data": {}}
+        ])
+        self.assertEqual(diff["classifiers"]["added"][0]["data"]["name"], "Status")
+        self.assertEqual(diff["diagrams"], {"added": [], "removed": [], "modified": []})
+
+    def test_delta_restore(self):
+        release = Release.objects.get(pk=self.release("First").pk)
+        self.order.data = {**self.order.data, "name": "Purchase"}
+        self.order.save()
+        Node.objects.filter(pk=self.order_node.pk).update(data={"position": {"x": 50, "y": 50}})
+        Node.objects.filter(pk=self.item_node.pk).delete()
+        Relation.objects.filter(pk=self.relation.pk).delete()
+        status = Classifier.objects.create(system=self.system, data={"type": "enum", "name": "Status"})
+        Node.objects.create(diagram=self.diagram, cls=status, data={})
+        hidden = Classifier.objects.create(system=self.system, data={"type": "class", "name": "Hidden"})
+
+        report = restore_release_delta(self.system, release)
+
+        self.assertEqual(diff_indexes(release_index(release), live_index(self.system)), {
+            kind: {"added": [], "removed": [], "modified": []}
+            for kind in ("diagrams", "classifiers", "nodes", "relations", "edges", "interfaces")
+        })
+        self.assertEqual(report["counts"]["node"], 1)
+        self.assertEqual(report["counts"]["relation"], 1)
+        self.assertEqual(report["counts"]["diagram"], 0)
+        # Item lost its node but not its row, it is left as it is rather than inserted again
+        self.assertEqual(report["updated"]["classifier"], 1)
+        self.assertEqual(report["counts"]["classifier"], 0)
+        self.assertEqual(report["updated"]["node"], 1)
+        self.assertEqual(report["deleted"]["classifier"], 2)
+        self.assertFalse(Classifier.objects.filter(pk__in=[status.pk, hidden.pk]).exists())
+        self.assertEqual(Classifier.objects.get(pk=self.order.pk).name, "Order")
+
+    def test_delta_restore_of_one_change(self):
+        release = Release.objects.get(pk=self.release("First").pk)
+        Classifier.objects.filter(pk=self.item.pk).update(data={"type": "class", "name": "Line", "attributes": []})
+
+        # The release chunks, one read per table, the changed row, the relations version and the savepoint
+        with self.assertNumQueries(13):
+            report = restore_release_delta(self.system, release)
+
+        self.assertEqual(report["updated"], {"diagram": 0, "classifier": 1, "node": 0, "relation": 0, "edge": 0,
+                                             "interface": 0})
+        self.assertEqual(Classifier.objects.get(pk=self.item.pk).name, "Item")
+
+    def test_delta_restore_of_the_live_system_writes_nothing(self):
+        release = Release.objects.get(pk=self.release("First").pk)
+        report = restore_release_delta(self.system, release)
+        for rows in (report["counts"], report["updated"], report["deleted"]):
+            self.assertEqual(set(rows.values()), {0})